@@ -7,7 +7,8 @@ Explainer class.
 DEFAULT_META_ANCHOR = {"name": None,
                        "type": ["blackbox"],
                        "explanations": ["local"],
-                       "params": {}}
+                       "params": {},
+                       "stats": {}}
 """
 Default anchor metadata.
 """
@@ -33,7 +34,8 @@ Default anchor image data.
 DEFAULT_META_CEM = {"name": None,
                     "type": ["blackbox", "tensorflow", "keras"],
                     "explanations": ["local"],
-                    "params": {}}
+                    "params": {},
+                    "stats": {}}
 """
 Default CEM metadata.
 """
@@ -55,7 +57,8 @@ Default CEM data.
 DEFAULT_META_CF = {"name": None,
                    "type": ["blackbox", "tensorflow", "keras"],
                    "explanations": ["local"],
-                   "params": {}}
+                   "params": {},
+                   "stats": {}}
 """
 Default counterfactual metadata.
 """
@@ -73,7 +76,8 @@ Default counterfactual data.
 DEFAULT_META_CFP = {"name": None,
                     "type": ["blackbox", "tensorflow", "keras"],
                     "explanations": ["local"],
-                    "params": {}}
+                    "params": {},
+                    "stats": {}}
 """
 Default counterfactual prototype metadata.
 """
@@ -93,7 +97,8 @@ DEFAULT_META_SHAP = {
     "name": None,
     "type": ["blackbox"],
     "explanations": ["local", "global"],
-    "params": {}
+    "params": {},
+    "stats": {}
 }  # type: dict
 """
 Default KernelSHAP metadata.
@@ -1,19 +1,197 @@
-import copy
 import logging
+import time
 import numpy as np
 from collections import defaultdict, namedtuple
 from functools import partial
-from typing import Callable, Tuple, Set, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union, cast
 
+from alibi.utils import bitmap
 from alibi.utils.distributed import ActorPool, RAY_INSTALLED
 from alibi.utils.distributions import kl_bernoulli
+from alibi.utils.profiling import Profiler, profile_phase
 
 
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = ['bitmap', 'set']
+
+
+def n_predict_batches(n_samples: int, max_predict_batch: int = None) -> int:
+    """
+    Returns the number of predictor calls needed to label n_samples if at most max_predict_batch samples
+    are passed to the predictor in one call (all samples are labelled in a single call if not set).
+    """
+
+    if max_predict_batch is None:
+        return 1
+
+    return -(-n_samples // max_predict_batch)  # ceil
+
+
+def batch_compare_labels(compare_labels: Callable, samples: List[np.ndarray],
+                         max_predict_batch: int = None) -> List[np.ndarray]:
+    """
+    Labels the samples drawn for several anchors with as few predictor calls as possible. The samples
+    are concatenated, the predictor is called on chunks of at most max_predict_batch samples and the
+    labels are split back per anchor.
+
+    Parameters
+    ----------
+    compare_labels
+        Sampler method that compares the predictions on a set of samples with the instance label.
+    samples
+        Perturbed samples drawn for each anchor.
+    max_predict_batch
+        Maximum number of samples passed to the predictor in one call. If not set, all the samples
+        are labelled in a single call.
+
+    Returns
+    -------
+        A list with the comparisons between the predictions on the samples drawn for each anchor and
+        the instance label.
+    """
+
+    samples_batch = np.concatenate(samples)
+    n_samples = samples_batch.shape[0]
+    chunk_size = n_samples if max_predict_batch is None else max_predict_batch
+    labels = np.concatenate(
+        [compare_labels(samples_batch[start:start + chunk_size]) for start in range(0, n_samples, chunk_size)]
+    )
+
+    return np.split(labels, np.cumsum([batch.shape[0] for batch in samples])[:-1])
+
 
 # TODO: Discuss logging strategy
 
+class SampleCache:
+    """
+    Stores the binarised samples drawn during the anchor search along with the labels returned by the sampler.
+    The samples are stored in fixed-size blocks, so the cache grows by appending blocks instead of copying
+    the samples already stored.
+    """
+
+    def __init__(self, n_features: int, block_size: int, max_bytes: int = None) -> None:
+        """
+        Parameters
+        ----------
+        n_features
+            Number of (encoded) features of the binarised samples.
+        block_size
+            Number of samples stored in a block. Reduced to the number of samples that fit in max_bytes if
+            a block would exceed it.
+        max_bytes
+            If set, the cache will not grow beyond this size.
+        """
+
+        self.n_features = n_features
+        if max_bytes is not None:
+            block_size = max(1, min(block_size, max_bytes // (n_features + 1)))
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.data_blocks = []  # type: List[np.ndarray]
+        self.label_blocks = []  # type: List[np.ndarray]
+        self.n_rows = 0      # nb of samples stored
+        self.n_evicted = 0   # nb of samples removed during compaction
+        self.peak_nbytes = 0
+
+    @property
+    def block_nbytes(self) -> int:
+        return self.block_size * (self.n_features + 1)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data_blocks) * self.block_nbytes
+
+    def has_room(self, n_samples: int) -> bool:
+        """
+        Checks whether n_samples can be stored without the cache exceeding max_bytes.
+        """
+
+        if self.max_bytes is None:
+            return True
+        n_blocks = -(-(self.n_rows + n_samples) // self.block_size)  # ceil
+
+        return n_blocks * self.block_nbytes <= self.max_bytes
+
+    def append(self, data: np.ndarray, labels: np.ndarray) -> Tuple[int, int]:
+        """
+        Stores samples and their labels, allocating new blocks as necessary.
+
+        Returns
+        -------
+            The range of cache rows where the samples were stored.
+        """
+
+        start, n_samples, written = self.n_rows, data.shape[0], 0
+        while written < n_samples:
+            block, offset = divmod(self.n_rows, self.block_size)
+            if block == len(self.data_blocks):
+                self.data_blocks.append(np.zeros((self.block_size, self.n_features), dtype=np.uint8))
+                self.label_blocks.append(np.zeros(self.block_size, dtype=np.uint8))
+                self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+            n_write = min(n_samples - written, self.block_size - offset)
+            self.data_blocks[block][offset:offset + n_write] = data[written:written + n_write]
+            self.label_blocks[block][offset:offset + n_write] = labels[written:written + n_write]
+            written += n_write
+            self.n_rows += n_write
+
+        return start, self.n_rows
+
+    def blocks(self):
+        """
+        Iterates through the stored samples, yielding the index of the first row of each block along
+        with the samples and labels stored in the block.
+        """
+
+        for block, (data, labels) in enumerate(zip(self.data_blocks, self.label_blocks)):
+            start = block * self.block_size
+            n_valid = min(self.block_size, self.n_rows - start)
+            yield start, data[:n_valid], labels[:n_valid]
+
+    def gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retrieves the samples and labels stored in the specified cache rows.
+        """
+
+        data = np.zeros((rows.shape[0], self.n_features), dtype=np.uint8)
+        labels = np.zeros(rows.shape[0], dtype=np.uint8)
+        if rows.shape[0] == 0:
+            return data, labels
+
+        blocks, offsets = np.divmod(rows, self.block_size)
+        order = np.argsort(blocks, kind='stable')
+        for segment in np.split(order, np.flatnonzero(np.diff(blocks[order])) + 1):
+            block = blocks[segment[0]]
+            data[segment] = self.data_blocks[block][offsets[segment]]
+            labels[segment] = self.label_blocks[block][offsets[segment]]
+
+        return data, labels
+
+    def compact(self, keep: np.ndarray) -> None:
+        """
+        Evicts all samples except the ones stored in the rows specified by keep. The retained samples are moved
+        in place to the first keep.shape[0] rows of the cache and the blocks no longer needed are released.
+
+        Parameters
+        ----------
+        keep
+            Sorted array of unique cache rows to be retained.
+        """
+
+        # a retained sample moves to a row index lower or equal to the current one, so chunks can be
+        # moved in order without overwriting samples that have not been moved yet
+        for start in range(0, keep.shape[0], self.block_size):
+            data, labels = self.gather(keep[start:start + self.block_size])
+            block = start // self.block_size
+            self.data_blocks[block][:data.shape[0]] = data
+            self.label_blocks[block][:labels.shape[0]] = labels
+
+        n_blocks = -(-keep.shape[0] // self.block_size)
+        del self.data_blocks[n_blocks:], self.label_blocks[n_blocks:]
+        self.n_evicted += self.n_rows - keep.shape[0]
+        self.n_rows = keep.shape[0]
+
+
 class AnchorBaseBeam:
 
     def __init__(self, samplers: List[Callable], **kwargs) -> None:
@@ -26,11 +204,34 @@ class AnchorBaseBeam:
 
         self.sample_fcn = samplers[0]
         self.samplers = None  # type: List[Callable]
-        # Initial size (in batches) of data/raw data samples cache.
+        # Size (in batches) of the blocks of the binary samples cache. The cache grows one block at a time.
         self.sample_cache_size = kwargs.get('sample_cache_size', 10000)
-        # when only the max of self.margin or batch size remain emptpy, the cache is
-        # extended to accommodate an additional sample_cache_size batches.
+        # no longer used since the cache grows by appending blocks, kept for backwards compatibility
         self.margin = kwargs.get('cache_margin', 1000)
+        # if set, the samples cache does not grow beyond this size. When it is full, samples that are not needed
+        # to extend anchors in the current beam are evicted
+        self.cache_max_bytes = kwargs.get('cache_max_bytes', None)
+        # how the sets of sample cache and coverage rows where each anchor applies are stored: 'bitmap' uses
+        # sorted int32 arrays for the sample cache and packed bitmaps for the coverage set, 'set' uses python sets
+        self.index_type = kwargs.get('index_type', 'bitmap')
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError("Unknown index type {}. Accepted values are {}".format(self.index_type, INDEX_TYPES))
+        # if True, the samples drawn for all the anchors in a sampling round are labelled with a single
+        # predictor call instead of calling the predictor for each anchor
+        self.fuse_predictions = kwargs.get('fuse_predictions', True)
+        # max nb of samples passed to the predictor in one call when predictions are fused (None = no limit)
+        self.max_predict_batch = kwargs.get('max_predict_batch', None)
+        # if set, returns the nb of times the predictor was called so far (e.g. by the samplers' instrumented
+        # predictor), so that calls served by a prediction cache are not counted. Otherwise, the nb of calls is
+        # derived from the nb of samples drawn and max_predict_batch
+        self.predictor_calls = kwargs.get('predictor_calls', None)  # type: Optional[Callable[[], int]]
+        # search budget, set by anchor_beam: time after which the search stops and max nb of predictor calls
+        self.deadline = None  # type: float
+        self.max_predictor_calls = None  # type: int
+        # if set (or if profile=True), records the time spent in the search phases (see alibi.utils.profiling)
+        self.profiler = kwargs.get('profiler', None)  # type: Profiler
+        if self.profiler is None and kwargs.get('profile', False):
+            self.profiler = Profiler()
 
     def _init_state(self, batch_size: int, coverage_data: np.ndarray) -> None:
         """
@@ -48,23 +249,33 @@ class AnchorBaseBeam:
         """
 
         prealloc_size = batch_size * self.sample_cache_size
+        # factories for the indices of the sample cache & coverage set rows where the anchors apply
+        if self.index_type == 'bitmap':
+            idx_factory, cov_idx_factory = partial(np.zeros, 0, dtype=np.int32), None  # type: Callable, Any
+        else:
+            idx_factory, cov_idx_factory = set, set
         # t_ indicates that the attribute is a dictionary with entries for each anchor
         self.state = {
             't_coverage': defaultdict(lambda: 0.),   # anchors' coverage
-            't_coverage_idx': defaultdict(set),      # index of anchors in coverage set
+            't_coverage_idx': defaultdict(cov_idx_factory),  # index of anchors in coverage set
             't_covered_true': defaultdict(None),     # samples with same pred as instance where t_ applies
             't_covered_false': defaultdict(None),    # samples with dif pred to instance where t_ applies
-            't_idx': defaultdict(set),               # row idx in sample cache where the anchors apply
+            't_idx': defaultdict(idx_factory),       # row idx in sample cache where the anchors apply
             't_nsamples': defaultdict(lambda: 0.),   # total number of samples drawn for the anchors
-            't_order': defaultdict(list),            # anchors are sorted to avoid exploring permutations
+            't_order': defaultdict(tuple),           # anchors are sorted to avoid exploring permutations
                                                      # this is the order in which anchors were found
             't_positives': defaultdict(lambda: 0.),  # nb of samples where result pred = pred on instance
-            'prealloc_size': prealloc_size,          # samples caches size
-            'data': np.zeros((prealloc_size, coverage_data.shape[1]), coverage_data.dtype),  # samples caches
-            'labels': np.zeros(prealloc_size, ),     # clf pred labels on raw_data
-            'current_idx': 0,
+            'prealloc_size': prealloc_size,          # samples cache block size
+            'cache': SampleCache(coverage_data.shape[1], prealloc_size, max_bytes=self.cache_max_bytes),
+            'n_samples': 0,                          # total number of samples drawn
+            'n_predictor_calls': 0,                  # nb of times the predictor was called to label samples
+            'predictor_calls_start': self.predictor_calls() if self.predictor_calls else 0,  # see predictor_calls
+            'live_anchors': None,                    # anchors whose cached samples can't be evicted (None = all)
+            'cache_full': False,                     # whether the cache could not accommodate new samples
+            'stopped_by': None,                      # budget that stopped the search before convergence
             'n_features': coverage_data.shape[1],    # data set dim after encoding
             'coverage_data': coverage_data,          # coverage data
+            'coverage_idx': self._coverage_index(coverage_data),  # index of coverage data rows where feats apply
         }  # type: dict
         self.state['t_order'][()] = ()  # Trivial order for the empty result
 
@@ -90,6 +301,102 @@ class AnchorBaseBeam:
 
         return tuple(sorted(set(x)))
 
+    def _rows_index(self, rows: np.ndarray) -> Union[np.ndarray, Set[int]]:
+        """
+        Converts an array of sample cache row indices to the representation given by `index_type`.
+        """
+
+        if self.index_type == 'bitmap':
+            return rows.astype(np.int32)
+
+        return set(rows)
+
+    def _index_rows(self, index: Union[np.ndarray, Set[int]]) -> np.ndarray:
+        """
+        Returns the sample cache row indices stored in `index` as an integer array.
+        """
+
+        # in 'bitmap' mode the indices are arrays of row indices, otherwise sets
+        if isinstance(index, np.ndarray):
+            return index
+
+        return np.array(list(index), dtype=int)
+
+    def _index_extend(self, anchor: tuple, start: int, stop: int) -> None:
+        """
+        Records that the anchor applies to the sample cache rows in the range [start, stop).
+        """
+
+        if self.index_type == 'bitmap':
+            rows = self.state['t_idx'][anchor]
+            self.state['t_idx'][anchor] = np.concatenate((rows, np.arange(start, stop, dtype=np.int32)))
+        else:
+            self.state['t_idx'][anchor].update(range(start, stop))
+
+    def _evict_samples(self) -> None:
+        """
+        Evicts the cached samples which are not needed to extend the anchors in the current beam (i.e., samples
+        drawn for anchors that were pruned from the beam) and updates the anchors' sample cache indices.
+        """
+
+        live_anchors = self.state['live_anchors']
+        if live_anchors is None:
+            return
+
+        cache = self.state['cache']
+        live_rows = [self._index_rows(self.state['t_idx'][anchor]) for anchor in live_anchors]
+        keep = np.unique(np.concatenate([np.zeros(0, dtype=int)] + live_rows))
+        if keep.shape[0] == cache.n_rows:
+            return
+        cache.compact(keep)
+
+        # map the rows of the retained samples to their new positions and drop the evicted ones
+        for anchor, index in self.state['t_idx'].items():
+            rows = self._index_rows(index)
+            pos = np.searchsorted(keep, rows)
+            retained = pos < keep.shape[0]
+            retained[retained] = keep[pos[retained]] == rows[retained]
+            self.state['t_idx'][anchor] = self._rows_index(pos[retained])
+
+    def _coverage_index(self, coverage_data: np.ndarray) -> Union[np.ndarray, List[Set[int]]]:
+        """
+        Builds an index of the coverage set rows where each encoded feature applies. In 'bitmap' mode, the
+        index is an array whose rows are packed bitmaps with one bit per coverage set row.
+        """
+
+        if self.index_type == 'bitmap':
+            return np.ascontiguousarray(bitmap.pack(coverage_data).T)
+
+        return [set(coverage_data[:, f].nonzero()[0]) for f in range(coverage_data.shape[1])]
+
+    def _coverage_extend(self, index: Union[np.ndarray, Set[int]]) -> Tuple[Union[np.ndarray, list], np.ndarray]:
+        """
+        Intersects the index of the coverage set rows where an anchor applies with the index of each
+        encoded feature.
+
+        Returns
+        -------
+            The index of the anchors obtained by adding each feature to the anchor and the number of coverage
+            set rows where they apply.
+        """
+
+        if isinstance(index, np.ndarray):
+            extended = bitmap.intersect(self.state['coverage_idx'], index)
+            return extended, cast(np.ndarray, bitmap.popcount(extended, axis=1))
+
+        extended_sets = [index.intersection(feat_index) for feat_index in self.state['coverage_idx']]
+        return extended_sets, np.array([len(feat_index) for feat_index in extended_sets], dtype=float)
+
+    def _coverage_count(self, index: Union[np.ndarray, Set[int]]) -> float:
+        """
+        Counts the coverage set rows in an index.
+        """
+
+        if isinstance(index, np.ndarray):
+            return float(bitmap.popcount(index))
+
+        return float(len(index))
+
     @staticmethod
     def dup_bernoulli(p: np.ndarray, level: np.ndarray, n_iter: int = 17) -> np.ndarray:
         """
@@ -307,7 +614,7 @@ class AnchorBaseBeam:
         B = ub[crit_a_idx.ut] - lb[crit_a_idx.lt]
         verbose_count = 0
 
-        while B > epsilon:
+        while B > epsilon and not self._budget_exhausted():
 
             verbose_count += 1
             if verbose and verbose_count % verbose_every == 0:
@@ -350,18 +657,56 @@ class AnchorBaseBeam:
 
         for anchor in anchors:
             if anchor not in self.state['t_order']:
-                self.state['t_order'][anchor] = list(anchor)
+                self.state['t_order'][anchor] = anchor
 
         sample_stats, pos, total = [], (), ()  # type: List, Tuple, Tuple
-        samples_iter = [self.sample_fcn((i, tuple(self.state['t_order'][anchor])), num_samples=batch_size)
-                        for i, anchor in enumerate(anchors)]
-        for samples, anchor in zip(samples_iter, anchors):
-            covered_true, covered_false, labels, *additionals, _ = samples
-            sample_stats.append(self.update_state(covered_true, covered_false, labels, additionals, anchor))
-            pos, total = list(zip(*sample_stats))
+        order_map = [(i, self.state['t_order'][anchor]) for i, anchor in enumerate(anchors)]
+        with profile_phase(self.profiler, 'sample', rows=len(anchors) * batch_size):
+            if self.fuse_predictions:
+                # draw samples for all anchors and label them with as few predictor calls as possible
+                samples_iter = self.sample_fcn(
+                    order_map,
+                    num_samples=batch_size,
+                    max_predict_batch=self.max_predict_batch,
+                )
+                n_calls = n_predict_batches(len(anchors) * batch_size, self.max_predict_batch)
+            else:
+                samples_iter = [self.sample_fcn(anchor, num_samples=batch_size) for anchor in order_map]
+                n_calls = len(anchors)
+        with profile_phase(self.profiler, 'update_state'):
+            for samples, anchor in zip(samples_iter, anchors):
+                covered_true, covered_false, labels, *additionals, _ = samples
+                sample_stats.append(self.update_state(covered_true, covered_false, labels, additionals, anchor))
+                pos, total = list(zip(*sample_stats))
+        self._record_predictor_calls(n_calls)
+        self._record_cache()
 
         return pos, total
 
+    def _record_predictor_calls(self, n_calls: int) -> None:
+        """
+        Updates the number of predictor calls made by the search after a sampling round.
+
+        Parameters
+        ----------
+        n_calls
+            Number of calls derived from the samples drawn in the round, only used if `predictor_calls`
+            is not set.
+        """
+
+        if self.predictor_calls is None:
+            self.state['n_predictor_calls'] += n_calls
+        else:
+            self.state['n_predictor_calls'] = self.predictor_calls() - self.state['predictor_calls_start']
+
+    def _record_cache(self) -> None:
+        """
+        Records the size of the samples cache if the search is profiled.
+        """
+
+        if self.profiler is not None:
+            self.profiler.record_cache(self.state['n_samples'], self.state['cache'].nbytes)
+
     def propose_anchors(self, previous_best: list) -> list:
         """
         Parameters
@@ -379,23 +724,45 @@ class AnchorBaseBeam:
         state = self.state
         all_features = range(state['n_features'])
         coverage_data = state['coverage_data']
-        current_idx = state['current_idx']
-        data = state['data'][:current_idx]
-        labels = state['labels'][:current_idx]
+        coverage_idx = state['coverage_idx']
+        cache = state['cache']
 
         # initially, every feature separately is an result
         if len(previous_best) == 0:
             tuples = [(x,) for x in all_features]
+            nsamples, positives = np.zeros(state['n_features']), np.zeros(state['n_features'])
+            # select samples whose feat value is = to the result value
+            pres = [[np.zeros(0, dtype=int)] for _ in all_features]  # type: List[List[np.ndarray]]
+            for start, data, labels in cache.blocks():
+                nsamples += data.sum(axis=0)
+                positives += labels @ data.astype(float)
+                for f in all_features:
+                    pres[f].append(start + data[:, f].nonzero()[0])
             for x in tuples:
-                pres = data[:, x[0]].nonzero()[0]  # Select samples whose feat value is = to the result value
-                state['t_idx'][x] = set(pres)
-                state['t_nsamples'][x] = float(len(pres))
-                state['t_positives'][x] = float(labels[pres].sum())
-                state['t_order'][x].append(x[0])
-                state['t_coverage_idx'][x] = set(coverage_data[:, x[0]].nonzero()[0])
-                state['t_coverage'][x] = (float(len(state['t_coverage_idx'][x])) / coverage_data.shape[0])
+                state['t_idx'][x] = self._rows_index(np.concatenate(pres[x[0]]))
+                state['t_nsamples'][x] = float(nsamples[x[0]])
+                state['t_positives'][x] = float(positives[x[0]])
+                state['t_order'][x] = x
+                state['t_coverage_idx'][x] = coverage_idx[x[0]]
+                state['t_coverage'][x] = self._coverage_count(coverage_idx[x[0]]) / coverage_data.shape[0]
             return tuples
 
+        # the statistics of all the anchors obtained by adding a feature to a result in the current best are
+        # computed at once from the samples where the result applies
+        extensions = {}
+        for t in previous_best:
+            t_idx = self._index_rows(state['t_idx'][t])  # indices of samples where the len-1 result applies
+            t_data, t_labels = cache.gather(t_idx)
+            t_coverage_idx, t_coverage_counts = self._coverage_extend(state['t_coverage_idx'][t])
+            extensions[t] = {
+                'idx': t_idx,
+                'present': t_data == 1,
+                'nsamples': t_data.sum(axis=0),
+                'positives': t_data.T @ t_labels.astype(float),
+                'coverage_idx': t_coverage_idx,
+                'coverage': t_coverage_counts / coverage_data.shape[0],
+            }
+
         # create new anchors: add a feature to every result in current best
         new_tuples = set()  # type: Set[tuple]
         for f in all_features:
@@ -405,19 +772,14 @@ class AnchorBaseBeam:
                     continue
                 if new_t not in new_tuples:
                     new_tuples.add(new_t)
-                    state['t_order'][new_t] = copy.deepcopy(state['t_order'][t])
-                    state['t_order'][new_t].append(f)
-                    state['t_coverage_idx'][new_t] = (state['t_coverage_idx'][t].intersection(
-                        state['t_coverage_idx'][(f,)])
-                    )
-                    state['t_coverage'][new_t] = (float(len(state['t_coverage_idx'][new_t])) / coverage_data.shape[0])
-                    t_idx = np.array(list(state['t_idx'][t]))  # indices of samples where the len-1 result applies
-                    t_data = state['data'][t_idx]
-                    present = np.where(t_data[:, f] == 1)[0]
-                    state['t_idx'][new_t] = set(t_idx[present])  # indices of samples where the proposed result applies
-                    idx_list = list(state['t_idx'][new_t])
-                    state['t_nsamples'][new_t] = float(len(idx_list))
-                    state['t_positives'][new_t] = np.sum(state['labels'][idx_list])
+                    ext = extensions[t]
+                    state['t_order'][new_t] = state['t_order'][t] + (f,)
+                    state['t_coverage_idx'][new_t] = ext['coverage_idx'][f]
+                    state['t_coverage'][new_t] = float(ext['coverage'][f])
+                    # indices of samples where the proposed result applies
+                    state['t_idx'][new_t] = self._rows_index(ext['idx'][ext['present'][:, f]])
+                    state['t_nsamples'][new_t] = float(ext['nsamples'][f])
+                    state['t_positives'][new_t] = ext['positives'][f]
 
         return list(new_tuples)
 
@@ -453,27 +815,26 @@ class AnchorBaseBeam:
         data, coverage = samples
         n_samples = data.shape[0]
 
-        current_idx = self.state['current_idx']
-        idxs = range(current_idx, current_idx + n_samples)
-        self.state['t_idx'][anchor].update(idxs)
+        self.state['n_samples'] += n_samples
         self.state['t_nsamples'][anchor] += n_samples
         self.state['t_positives'][anchor] += labels.sum()
         if coverage > -1:
             self.state['t_coverage'][anchor] = coverage
         self.state['t_covered_true'][anchor] = covered_true
         self.state['t_covered_false'][anchor] = covered_false
-        self.state['data'][idxs] = data
-        self.state['labels'][idxs] = labels
-        self.state['current_idx'] += n_samples
-
-        if self.state['current_idx'] >= self.state['data'].shape[0] - max(self.margin, n_samples):
-            prealloc_size = self.state['prealloc_size']
-            self.state['data'] = np.vstack(
-                (self.state['data'], np.zeros((prealloc_size, data.shape[1]), data.dtype))
-            )
-            self.state['labels'] = np.hstack(
-                (self.state['labels'], np.zeros(prealloc_size, labels.dtype))
-            )
+
+        # if the cache is full, evict samples not needed for the current beam. The samples are not
+        # cached if this does not free enough space.
+        cache = self.state['cache']
+        if not cache.has_room(n_samples):
+            self._evict_samples()
+        if cache.has_room(n_samples):
+            start, stop = cache.append(data, labels)
+            self._index_extend(anchor, start, stop)
+        elif not self.state['cache_full']:
+            self.state['cache_full'] = True
+            logger.warning('The samples cache reached its maximum size of %d bytes. New samples will not be '
+                           'cached so the anchor search might draw more samples.', cache.max_bytes)
 
         return labels.sum(), data.shape[0]
 
@@ -508,6 +869,55 @@ class AnchorBaseBeam:
 
         return stats
 
+    @property
+    def stats(self) -> dict:
+        """
+        Statistics of the last anchor search, reported in the explanation metadata.
+        """
+
+        cache = self.state['cache']
+        stats = {
+            'cache_peak_bytes': cache.peak_nbytes,
+            'cache_evicted_samples': cache.n_evicted,
+            'predictor_calls': self.state['n_predictor_calls'],
+            'converged': self.state['stopped_by'] is None,
+            'stopped_by': self.state['stopped_by'],
+        }
+        if self.profiler is not None:
+            stats['profile'] = self.profiler.summary()
+
+        return stats
+
+    def _budget_exhausted(self) -> bool:
+        """
+        Checks whether the search time or predictor call budget (see anchor_beam) is exhausted. Once a budget
+        is exhausted, the search stops drawing samples at the end of the current sampling round.
+        """
+
+        state = self.state
+        if state['stopped_by'] is None:
+            if self.max_predictor_calls is not None and state['n_predictor_calls'] >= self.max_predictor_calls:
+                state['stopped_by'] = 'max_predictor_calls'
+            elif self.deadline is not None and time.perf_counter() >= self.deadline:
+                state['stopped_by'] = 'time_budget_s'
+
+        return state['stopped_by'] is not None
+
+    def _precision_bounds(self, anchor: tuple, delta: float, beam_size: int) -> Tuple[float, float]:
+        """
+        Returns the KL lower and upper confidence bounds of the precision of an anchor given the samples drawn
+        so far, computed as in the beam search.
+        """
+
+        n_samples = self.state['t_nsamples'][anchor]
+        if n_samples == 0:
+            return 0., 1.
+        mean = np.array([self.state['t_positives'][anchor] / n_samples])
+        beta = np.log(1. / (delta / (1 + (beam_size - 1) * self.state['n_features'])))
+        kl_constraint = np.array([beta / n_samples])
+
+        return float(self.dlow_bernoulli(mean, kl_constraint)[0]), float(self.dup_bernoulli(mean, kl_constraint)[0])
+
     def get_anchor_metadata(self, features: tuple, success, batch_size: int = 100) -> dict:
         """
         Given the features contained in a result, it retrieves metadata such as the precision and
@@ -533,7 +943,7 @@ class AnchorBaseBeam:
 
         state = self.state
         anchor = {'feature': [], 'mean': [], 'precision': [], 'coverage': [], 'examples': [],
-                  'all_precision': 0, 'num_preds': state['data'].shape[0], 'success': success}  # type: dict
+                  'all_precision': 0, 'num_preds': state['n_samples'], 'success': success}  # type: dict
         current_t = tuple()  # type: tuple
         # draw pos and negative example where partial result applies if not sampled during search
         to_resample, to_resample_idx = [], []
@@ -557,7 +967,7 @@ class AnchorBaseBeam:
             else:
                 to_resample.append(current_t)
                 # sampling process relies on ordering
-                state['t_order'][current_t] = list(current_t)
+                state['t_order'][current_t] = current_t
                 to_resample_idx.append(len(anchor['examples']))
                 anchor['examples'].append('placeholder')
                 # if the anchor was not sampled, the coverage is not estimated
@@ -613,7 +1023,7 @@ class AnchorBaseBeam:
                     beam_size: int = 1, epsilon_stop: float = 0.05, min_samples_start: int = 100,
                     max_anchor_size: int = None, stop_on_first: bool = False, batch_size: int = 100,
                     coverage_samples: int = 10000,  verbose: bool = False, verbose_every: int = 1,
-                    **kwargs) -> dict:
+                    time_budget_s: float = None, max_predictor_calls: int = None, **kwargs) -> dict:
 
         """
         Uses the KL-LUCB algorithm (Kaufmann and Kalyanakrishnan, 2013) together with additional sampling to search
@@ -650,18 +1060,31 @@ class AnchorBaseBeam:
             Whether to print intermediate LUCB & anchor selection output.
         verbose_every
             Print intermediate output every verbose_every steps.
+        time_budget_s
+            If set, the search stops after this number of seconds and returns the best anchor found so far.
+            The search stops at the end of a sampling round, so the budget can be exceeded by the time needed
+            to draw and label a batch of samples (and to draw examples for the returned anchor).
+        max_predictor_calls
+            If set, the search stops once the predictor has been called this number of times to label samples
+            and returns the best anchor found so far.
 
         Returns
         -------
             Explanation dictionary containing anchors with metadata like coverage and precision
-            and examples.
+            and examples. The 'converged' entry is False if the search was stopped by a budget, in which
+            case the precision constraint is not guaranteed. The 'precision_lb' and 'precision_ub' entries
+            are the precision confidence bounds of the returned anchor.
         """
 
+        self.deadline = None if time_budget_s is None else time.perf_counter() + time_budget_s
+        self.max_predictor_calls = max_predictor_calls
+
         # Select coverage set and initialise object state
-        coverage_data = self._get_coverage_samples(
-            coverage_samples,
-            samplers=self.samplers,
-        )
+        with profile_phase(self.profiler, 'coverage', rows=coverage_samples):
+            coverage_data = self._get_coverage_samples(
+                coverage_samples,
+                samplers=self.samplers,
+            )
         self._init_state(batch_size, coverage_data)
 
         # sample by default 1 or min_samples_start more random value(s)
@@ -676,7 +1099,7 @@ class AnchorBaseBeam:
 
         # if lower precision bound below tau with margin eps, keep sampling data until lb is high enough ...
         # or mean falls below precision threshold
-        while mean > desired_confidence and lb < desired_confidence - epsilon:
+        while mean > desired_confidence and lb < desired_confidence - epsilon and not self._budget_exhausted():
             (n_pos,), (n_total,) = self.draw_samples([()], batch_size)
             pos += n_pos
             total += n_total
@@ -694,6 +1117,9 @@ class AnchorBaseBeam:
                 'examples': [],
                 'all_precision': mean,
                 'success': True,
+                'converged': True,
+                'precision_lb': float(lb[0]),
+                'precision_ub': float(self.dup_bernoulli(mean, np.array([beta / total]))[0]),
             }
 
         current_size, best_coverage = 1, -1
@@ -704,10 +1130,11 @@ class AnchorBaseBeam:
             max_anchor_size = self.state['n_features']
 
         # find best result using beam search
-        while current_size <= max_anchor_size:
+        while current_size <= max_anchor_size and not self._budget_exhausted():
 
             # create new candidate anchors by adding features to current best anchors
-            anchors = self.propose_anchors(best_of_size[current_size - 1])
+            with profile_phase(self.profiler, 'propose_anchors'):
+                anchors = self.propose_anchors(best_of_size[current_size - 1])
             # goal is to max coverage given precision constraint P(prec(A) > tau) > 1 - delta (eq.4)
             # so keep tuples with higher coverage than current best coverage
             anchors = [anchor for anchor in anchors if self.state['t_coverage'][anchor] > best_coverage]
@@ -715,23 +1142,27 @@ class AnchorBaseBeam:
             # if no better coverage found with added features -> break
             if len(anchors) == 0:
                 break
+            self.state['live_anchors'] = anchors
 
             # for each result, get initial nb of samples used and prec(A)
             stats = self.get_init_stats(anchors)
 
             # apply KL-LUCB and return result options (nb of options = beam width) in the form of indices
-            candidate_anchors = self.kllucb(
-                anchors,
-                stats,
-                epsilon,
-                delta,
-                batch_size,
-                min(beam_size, len(anchors)),
-                verbose=verbose,
-                verbose_every=verbose_every,
-            )
+            with profile_phase(self.profiler, 'kllucb'):
+                candidate_anchors = self.kllucb(
+                    anchors,
+                    stats,
+                    epsilon,
+                    delta,
+                    batch_size,
+                    min(beam_size, len(anchors)),
+                    verbose=verbose,
+                    verbose_every=verbose_every,
+                )
             # store best anchors for the given result size (nb of features in the result)
             best_of_size[current_size] = [anchors[index] for index in candidate_anchors]
+            # samples drawn for the anchors pruned from the beam can be evicted from the cache
+            self.state['live_anchors'] = best_of_size[current_size]
             # for each candidate result:
             #   update precision, lower and upper bounds until precision constraints are met
             #   update best result if coverage is larger than current best coverage
@@ -750,7 +1181,7 @@ class AnchorBaseBeam:
 
             # draw samples to ensure result meets precision criteria
             continue_sampling = self.to_sample(means, ubs, lbs, desired_confidence, epsilon_stop)
-            while continue_sampling.any():
+            while continue_sampling.any() and not self._budget_exhausted():
                 selected_anchors = [anchors[idx] for idx in candidate_anchors[continue_sampling]]
                 pos, total = self.draw_samples(selected_anchors, batch_size)
                 positives[continue_sampling] += pos
@@ -802,22 +1233,38 @@ class AnchorBaseBeam:
                            'the best non-eligible result.'.format(desired_confidence))
             anchors = []
             for i in range(0, current_size):
-                anchors.extend(best_of_size[i])
-            stats = self.get_init_stats(anchors)
-            candidate_anchors = self.kllucb(
-                anchors,
-                stats,
-                epsilon,
-                delta,
-                batch_size,
-                1,  # beam size
-                verbose=verbose,
-            )
-            best_anchor = anchors[candidate_anchors[0]]
+                anchors.extend(best_of_size.get(i, []))
+            if self._budget_exhausted():
+                # no more samples are drawn, the anchor with the highest precision estimate is returned
+                if anchors:
+                    means = [self.state['t_positives'][anchor] / max(self.state['t_nsamples'][anchor], 1.)
+                             for anchor in anchors]
+                    best_anchor = anchors[int(np.argmax(means))]
+            else:
+                stats = self.get_init_stats(anchors)
+                with profile_phase(self.profiler, 'kllucb'):
+                    candidate_anchors = self.kllucb(
+                        anchors,
+                        stats,
+                        epsilon,
+                        delta,
+                        batch_size,
+                        1,  # beam size
+                        verbose=verbose,
+                    )
+                best_anchor = anchors[candidate_anchors[0]]
         else:
             success = True
 
-        return self.get_anchor_metadata(best_anchor, success, batch_size=batch_size)
+        if self.state['stopped_by'] is not None:
+            logger.warning('The anchor search was stopped by the {} budget before converging. Returning the best '
+                           'anchor found so far.'.format(self.state['stopped_by']))
+        with profile_phase(self.profiler, 'anchor_metadata'):
+            result = self.get_anchor_metadata(best_anchor, success, batch_size=batch_size)
+        result['converged'] = self.state['stopped_by'] is None
+        result['precision_lb'], result['precision_ub'] = self._precision_bounds(best_anchor, delta, beam_size)
+
+        return result
 
 
 class DistributedAnchorBaseBeam(AnchorBaseBeam):
@@ -828,16 +1275,22 @@ class DistributedAnchorBaseBeam(AnchorBaseBeam):
 
     def __init__(self, samplers: List[Callable], **kwargs) -> None:
 
-        super().__init__(samplers)
+        super().__init__(samplers, **kwargs)
         if 'chunksize' in kwargs:
             self.chunksize = kwargs['chunksize']
         else:
             self.chunksize = 1
+        # used to submit sampling tasks and retrieve their results: ray or a MultiprocessingBackend
+        self.backend = kwargs.get('backend', None)
+        if self.backend is None:
+            self.backend = DistributedAnchorBaseBeam.ray
         self.sample_fcn = lambda actor, anchor, n_samples, compute_labels=True:\
             actor.__call__.remote(anchor,
                                   n_samples,
-                                  compute_labels=compute_labels)
-        self.pool = ActorPool(samplers)
+                                  compute_labels=compute_labels,
+                                  fuse_predictions=self.fuse_predictions,
+                                  max_predict_batch=self.max_predict_batch)
+        self.pool = ActorPool(samplers, backend=self.backend)
         self.samplers = samplers
 
     def _get_coverage_samples(self, coverage_samples: int, samplers: List[Callable] = None) -> np.ndarray:
@@ -853,7 +1306,7 @@ class DistributedAnchorBaseBeam(AnchorBaseBeam):
             See superclass implementation.
         """
 
-        [coverage_data] = DistributedAnchorBaseBeam.ray.get(
+        [coverage_data] = self.backend.get(
             self.sample_fcn(samplers[0], (0, ()), coverage_samples, compute_labels=False)
             )
 
@@ -875,26 +1328,37 @@ class DistributedAnchorBaseBeam(AnchorBaseBeam):
         # partial anchors not generated by propose_anchors are not in the order dictionary
         for anchor in anchors:
             if anchor not in self.state['t_order']:
-                self.state['t_order'][anchor] = list(anchor)
+                self.state['t_order'][anchor] = anchor
 
         pos, total = np.zeros((len(anchors),)), np.zeros((len(anchors),))
-        order_map = [(i, tuple(self.state['t_order'][anchor])) for i, anchor in enumerate(anchors)]
+        order_map = [(i, self.state['t_order'][anchor]) for i, anchor in enumerate(anchors)]
         samples_iter = self.pool.map_unordered(
             partial(self.sample_fcn, n_samples=batch_size),
             order_map,
             self.chunksize,
         )
-        for samples_batch in samples_iter:
-            for samples in samples_batch:
-                covered_true, covered_false, labels, *additionals, anchor_idx = samples
-                positives, n_samples = self.update_state(
-                    covered_true,
-                    covered_false,
-                    labels,
-                    additionals,
-                    anchors[anchor_idx],
-                )
-                # return statistics in the same order as the requests
-                pos[anchor_idx], total[anchor_idx] = positives, n_samples
+        # the samples are received while other processes are still sampling, so 'update_state' is nested in
+        # the 'sample' phase
+        n_calls = 0
+        with profile_phase(self.profiler, 'sample', rows=len(anchors) * batch_size):
+            for samples_batch in samples_iter:
+                if self.fuse_predictions:
+                    n_calls += n_predict_batches(len(samples_batch) * batch_size, self.max_predict_batch)
+                else:
+                    n_calls += len(samples_batch)
+                with profile_phase(self.profiler, 'update_state'):
+                    for samples in samples_batch:
+                        covered_true, covered_false, labels, *additionals, anchor_idx = samples
+                        positives, n_samples = self.update_state(
+                            covered_true,
+                            covered_false,
+                            labels,
+                            additionals,
+                            anchors[anchor_idx],
+                        )
+                        # return statistics in the same order as the requests
+                        pos[anchor_idx], total[anchor_idx] = positives, n_samples
+        self._record_predictor_calls(n_calls)
+        self._record_cache()
 
         return pos, total
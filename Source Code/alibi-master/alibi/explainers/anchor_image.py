@@ -3,10 +3,12 @@ import logging
 
 import numpy as np
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Any, Callable, List, Tuple, Union
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union, cast
 
-from alibi.utils.wrappers import ArgmaxTransformer
+from alibi.utils.cache import ArrayCache, array_key
+from alibi.utils.wrappers import ArgmaxTransformer, instrument
 from alibi.api.interfaces import Explainer, Explanation
 from alibi.api.defaults import DEFAULT_META_ANCHOR, DEFAULT_DATA_ANCHOR_IMG
 from .anchor_base import AnchorBaseBeam
@@ -26,7 +28,7 @@ class AnchorImage(Explainer):
 
     def __init__(self, predictor: Callable, image_shape: tuple, segmentation_fn: Any = 'slic',
                  segmentation_kwargs: dict = None, images_background: np.ndarray = None,
-                 seed: int = None) -> None:
+                 seed: int = None, segmentation_cache: Union[int, ArrayCache] = 2 ** 26) -> None:
         """
         Initialize anchor image explainer.
 
@@ -46,6 +48,12 @@ class AnchorImage(Explainer):
             Images to overlay superpixels on.
         seed
             If set, ensures different runs with the same input will yield same explanation.
+        segmentation_cache
+            Size in bytes of the cache storing the superpixels of the explained images and their fudged images
+            (where each superpixel takes its average value), keyed by the contents of the images. An
+            `alibi.utils.cache.ArrayCache` can be passed instead, e.g. to share the cache between explainers of
+            different models. If None, nothing is cached. The superpixels generated by custom segmentation
+            functions are not cached, since their parameters are unknown.
         """
         super().__init__(meta=copy.deepcopy(DEFAULT_META_ANCHOR))
         np.random.seed(seed)
@@ -67,12 +75,14 @@ class AnchorImage(Explainer):
                 'the specified segmentation function will be used.'
             )
 
+        # records the predictor calls made by the explanations
+        self._instrumented = instrument(predictor)
         # check if predictor returns predicted class or prediction probabilities for each class
         # if needed adjust predictor so it returns the predicted class
-        if np.argmax(predictor(np.zeros((1,) + image_shape)).shape) == 0:
-            self.predictor = predictor
+        if np.argmax(self._instrumented(np.zeros((1,) + image_shape)).shape) == 0:
+            self.predictor = self._instrumented  # type: Callable
         else:
-            self.predictor = ArgmaxTransformer(predictor)
+            self.predictor = ArgmaxTransformer(self._instrumented)
 
         # segmentation function is either a user-defined function or one of the values in
         fn_options = {'felzenszwalb': felzenszwalb, 'slic': slic, 'quickshift': quickshift}
@@ -83,6 +93,13 @@ class AnchorImage(Explainer):
             self.custom_segmentation = False
             self.segmentation_fn = partial(fn_options[segmentation_fn], **segmentation_kwargs)
 
+        if isinstance(segmentation_cache, int):
+            segmentation_cache = ArrayCache(max_bytes=segmentation_cache)
+        self.segmentation_cache = segmentation_cache  # type: Optional[ArrayCache]
+        # the superpixels are cached with the segmentation parameters
+        self._segmentation_params = None if self.custom_segmentation else \
+            dict(segmentation_fn=segmentation_fn, **segmentation_kwargs)  # type: Optional[dict]
+
         self.images_background = images_background
         self.image_shape = image_shape
         # [H, W] int array; each int is a superpixel labels
@@ -91,6 +108,14 @@ class AnchorImage(Explainer):
         self.image = None  # type: np.ndarray
         # a superpixel is perturbed with prob 1 - p_sample
         self.p_sample = 0.5  # type: float
+        # limit on the memory used by the perturbed images and whether they are generated in a separate thread
+        self.max_batch_bytes = None  # type: Optional[int]
+        self.prefetch = False
+        # average value of each superpixel of the image to be explained for each channel
+        self.segment_means = None  # type: np.ndarray
+        # lookups computed once per image and segments, see `_get_pixel_columns` and `_get_fudged_image`
+        self._pixel_columns_for = None  # type: Optional[tuple]
+        self._fudged_image_for = None  # type: Optional[tuple]
 
         # update metadata
         self.meta['params'].update(
@@ -123,6 +148,25 @@ class AnchorImage(Explainer):
 
         return self.segmentation_fn(image_preproc)
 
+    def _get_superpixels(self, image: np.ndarray) -> np.ndarray:
+        """
+        Generates the superpixels of an image (see `generate_superpixels`), unless the superpixels of an image
+        with the same contents were cached.
+        """
+
+        if self.segmentation_cache is None or self._segmentation_params is None:
+            return self.generate_superpixels(image)
+
+        key = ('segments', array_key(image, **self._segmentation_params))
+        cached = self.segmentation_cache.get(key)
+        if cached is not None:
+            # the cached arrays are read-only, the callers get a copy they can modify
+            return cast(np.ndarray, cached).copy()
+        segments = self.generate_superpixels(image)
+        self.segmentation_cache.put(key, segments.copy())
+
+        return segments
+
     def _preprocess_img(self, image: np.ndarray) -> np.ndarray:
         """
         Applies necessary transformations to the image prior to segmentation.
@@ -170,8 +214,9 @@ class AnchorImage(Explainer):
 
         return data
 
-    def sampler(self, anchor: Tuple[int, tuple], num_samples: int, compute_labels: bool = True) -> \
-            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray]]:
+    def sampler(self, anchor: Union[Tuple[int, tuple], List[Tuple[int, tuple]]], num_samples: int,
+                compute_labels: bool = True, max_predict_batch: int = None) -> \
+            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray], List]:
         """
         Sample images from a perturbation distribution by masking randomly chosen superpixels
         from the original image and replacing them with pixel values from superimposed images
@@ -188,6 +233,9 @@ class AnchorImage(Explainer):
         compute_labels
             If True, an array of comparisons between predictions on perturbed samples and
             instance to be explained is returned.
+        max_predict_batch
+            If a list of anchors is passed, the maximum number of samples passed to the
+            predictor in one call.
 
         Returns
         -------
@@ -202,19 +250,17 @@ class AnchorImage(Explainer):
                     remain unchanged (1) or will be perturbed (0), for each sample
                 - 1.0: indicates exact coverage is not computed for this algorithm
                 - anchor[0]: position of anchor in the batch request
-            Otherwise, a list containing the data matrix only is returned.
+            Otherwise, a list containing the data matrix only is returned. If a list of anchors
+            is passed, a list with the above for each anchor is returned.
         """
 
-        if compute_labels:
-            raw_data, data = self.perturbation(anchor[1], num_samples)
-            labels = self.compare_labels(raw_data)
-            covered_true = raw_data[labels][:self.n_covered_ex]
-            covered_true = [self._scale(img) for img in covered_true]
-            covered_false = raw_data[np.logical_not(labels)][:self.n_covered_ex]
-            covered_false = [self._scale(img) for img in covered_false]
-            # coverage set to -1.0 as we can't compute 'true'coverage for this model
+        if isinstance(anchor, list):
+            if not compute_labels:
+                return [self.sampler(single_anchor, num_samples, compute_labels=False) for single_anchor in anchor]
+            return self._sample_and_label(anchor, num_samples, max_predict_batch=max_predict_batch)
 
-            return [covered_true, covered_false, labels.astype(int), data, -1.0, anchor[0]]
+        if compute_labels:
+            return self._sample_and_label([anchor], num_samples)[0]
 
         else:
             data = self._choose_superpixels(num_samples)
@@ -222,6 +268,73 @@ class AnchorImage(Explainer):
 
             return [data]
 
+    def _sample_and_label(self, anchors: List[Tuple[int, tuple]], num_samples: int,
+                          max_predict_batch: int = None) -> List[List]:
+        """
+        Draws num_samples perturbed images for each anchor and labels them. The images are generated and
+        predicted in chunks (see `perturbation_chunks`) and only the labels and the examples returned by
+        the sampler are kept, so the images of all the samples are never in memory at once.
+
+        Parameters
+        ----------
+        anchors
+            Anchors with their position in the batch request.
+        num_samples
+            Number of samples drawn for each anchor.
+        max_predict_batch
+            Maximum number of images passed to the predictor in one call.
+
+        Returns
+        -------
+            The sampler result for each anchor, see `sampler`.
+        """
+
+        masks = [self._choose_perturbed(anchor[1], num_samples) for anchor in anchors]
+        segments_mask = np.concatenate([mask for mask, _ in masks])
+        backgrounds = None if masks[0][1] is None else np.concatenate([bg for _, bg in masks])
+
+        labels = np.zeros(segments_mask.shape[0], dtype=bool)
+        covered = [([], []) for _ in anchors]  # type: List[Tuple[List, List]]
+        start = 0
+        chunk_size = self._max_chunk_size(max_predict_batch) or segments_mask.shape[0]
+        for imgs in self.perturbation_chunks(segments_mask, backgrounds, chunk_size):
+            end = start + imgs.shape[0]
+            labels[start:end] = self.compare_labels(imgs)
+            # keep the first n_covered_ex examples of each anchor for which the prediction is (not) the same
+            for i in range(start // num_samples, (end - 1) // num_samples + 1):
+                rows = slice(max(start, i * num_samples), min(end, (i + 1) * num_samples))
+                for examples, same_label in zip(covered[i], (True, False)):
+                    n_missing = self.n_covered_ex - len(examples)
+                    if n_missing > 0:
+                        idx = np.nonzero(labels[rows] == same_label)[0][:n_missing] + rows.start - start
+                        examples.extend(self._scale(img) for img in imgs[idx])
+            start = end
+            del imgs  # the chunk is freed before the next one is generated
+
+        result = []
+        for i, (anchor, (mask, background)) in enumerate(zip(anchors, masks)):
+            data = mask if background is None else np.hstack((mask, background.reshape(-1, 1)))
+            anchor_labels = labels[i * num_samples:(i + 1) * num_samples]
+            # coverage set to -1.0 as we can't compute 'true'coverage for this model
+            result.append([covered[i][0], covered[i][1], anchor_labels.astype(int), data, -1.0, anchor[0]])
+
+        return result
+
+    def _max_chunk_size(self, max_predict_batch: int = None) -> Optional[int]:
+        """
+        Returns the maximum number of images generated and predicted at once: max_predict_batch, further
+        limited so that the images and pixel masks of the chunks in memory fit in max_batch_bytes. None if
+        there is no limit.
+        """
+
+        if self.max_batch_bytes is None:
+            return max_predict_batch
+        n_chunks = 2 if self.prefetch else 1
+        row_bytes = self.image.nbytes + self.segments.size
+        chunk_size = max(1, self.max_batch_bytes // (n_chunks * row_bytes))
+
+        return chunk_size if max_predict_batch is None else min(chunk_size, max_predict_batch)
+
     def perturbation(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
         """
         Perturbs an image by altering the values of selected superpixels. If a dataset of image
@@ -246,47 +359,222 @@ class AnchorImage(Explainer):
             perturbed.
         """
 
-        image = self.image
-        segments = self.segments
+        segments_mask, backgrounds = self._choose_perturbed(anchor, num_samples)
+        pert_imgs = self._perturb_images(segments_mask, backgrounds)
+        if backgrounds is not None:
+            segments_mask = np.hstack((segments_mask, backgrounds.reshape(-1, 1)))
+
+        return pert_imgs, segments_mask
+
+    def _choose_perturbed(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Chooses the superpixels perturbed in each sample and, if background images are provided, the
+        background image of each sample.
+
+        Returns
+        -------
+        segments_mask
+            A [num_samples, M] binary mask, see `perturbation`.
+        backgrounds
+            The index of the background image of each sample, or None if there are no background images.
+        """
 
-        # choose superpixels to be perturbed
         segments_mask = self._choose_superpixels(num_samples, p_sample=self.p_sample)
         segments_mask[:, anchor] = 1
 
         # for each sample, need to sample one of the background images if provided
-        if self.images_background:
+        backgrounds = None
+        if self.images_background is not None and len(self.images_background) > 0:
             backgrounds = np.random.choice(
                 range(len(self.images_background)),
                 segments_mask.shape[0],
                 replace=True,
             )
-            segments_mask = np.hstack((segments_mask, backgrounds.reshape(-1, 1)))
+
+        return segments_mask, backgrounds
+
+    def _perturb_images(self, segments_mask: np.ndarray, backgrounds: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Generates the perturbed images for the superpixels and backgrounds chosen by `_choose_perturbed`.
+
+        Returns
+        -------
+            A [N, H, W, C] array of perturbed images, with the dtype of the image to be explained.
+        """
+
+        image = self.image
+        n_samples, n_features = segments_mask.shape
+
+        # the images are initialised with the replacement values of the perturbed superpixels: the background
+        # images, if provided, or the average value of each superpixel
+        if backgrounds is None:
+            pert_imgs = np.empty((n_samples,) + image.shape, dtype=image.dtype)
+            pert_imgs[:] = self._get_fudged_image()
         else:
-            backgrounds = [None] * segments_mask.shape[0]
-            # create fudged image where the pixel value in each superpixel is set to the
-            # average over the superpixel for each channel
-            fudged_image = image.copy()
-            n_channels = image.shape[-1]
-            for x in np.unique(segments):
-                fudged_image[segments == x] = [np.mean(image[segments == x][:, i]) for i in range(n_channels)]
-
-        pert_imgs = []
-        for mask, background_idx in zip(segments_mask, backgrounds):
-            temp = copy.deepcopy(image)
-            to_perturb = np.where(mask == 0)[0]
-            # create mask for each superpixel not present in the sample
-            mask = np.zeros(segments.shape).astype(bool)
-            for superpixel in to_perturb:
-                mask[segments == superpixel] = True
-            if background_idx:
-                # replace values with those of background image
-                temp[mask] = self.images_background[background_idx][mask]
-            else:
-                # ... or with the averaged superpixel value
-                temp[mask] = fudged_image[mask]
-            pert_imgs.append(temp)
-
-        return np.array(pert_imgs), segments_mask
+            pert_imgs = np.array([self.images_background[idx] for idx in backgrounds], dtype=image.dtype)
+
+        # the mask of the pixels that are not perturbed is gathered from the superpixels mask, the pixels
+        # of superpixels that are not in the mask (see `_pixel_columns`) being kept
+        keep = np.ones((n_samples, n_features + 1), dtype=bool)
+        keep[:, :n_features] = segments_mask != 0
+        keep = keep[:, self._get_pixel_columns(n_features)]
+        np.copyto(pert_imgs, image, where=keep[..., np.newaxis])
+
+        return pert_imgs
+
+    def perturbation_chunks(self, segments_mask: np.ndarray, backgrounds: Optional[np.ndarray],
+                            chunk_size: int) -> Iterator[np.ndarray]:
+        """
+        Generates the perturbed images for the superpixels and backgrounds chosen by `_choose_perturbed` in
+        chunks of chunk_size images. If `prefetch` is True, the next chunk is generated in a separate thread
+        while the current chunk is used (e.g. predicted), so at most two chunks are in memory if the caller
+        releases each chunk before requesting the next one.
+
+        Parameters
+        ----------
+        segments_mask
+            A [N, M] binary mask, see `perturbation`.
+        backgrounds
+            The index of the background image of each sample, or None.
+        chunk_size
+            Number of images in a chunk.
+
+        Returns
+        -------
+            An iterator over [chunk_size, H, W, C] arrays of perturbed images (the last chunk can be smaller).
+        """
+
+        def perturb_chunk(start: int) -> np.ndarray:
+            chunk_backgrounds = None if backgrounds is None else backgrounds[start:start + chunk_size]
+            return self._perturb_images(segments_mask[start:start + chunk_size], chunk_backgrounds)
+
+        starts = range(0, segments_mask.shape[0], chunk_size)
+        if not self.prefetch:
+            for start in starts:
+                yield perturb_chunk(start)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_chunk = executor.submit(perturb_chunk, starts[0]) if starts else None
+            for i in range(len(starts)):
+                chunk = next_chunk.result()
+                if i + 1 < len(starts):
+                    next_chunk = executor.submit(perturb_chunk, starts[i + 1])
+                yield chunk
+                del chunk
+
+    @staticmethod
+    def _segment_ids(segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Maps the superpixel labels to consecutive ids.
+
+        Parameters
+        ----------
+        segments
+            A [H, W] array of superpixel labels.
+
+        Returns
+        -------
+        labels
+            The sorted unique labels.
+        ids
+            A [H, W] array with the index in labels of the label of each pixel.
+        """
+
+        labels, ids = np.unique(segments, return_inverse=True)
+
+        return labels, ids.reshape(segments.shape)
+
+    def _pixel_columns(self, segments: np.ndarray, n_features: int) -> np.ndarray:
+        """
+        Computes the column of the superpixels mask (see `_choose_superpixels`) of each pixel. The column of a
+        superpixel is its label, so the pixels whose label is not a column index are mapped to an extra column
+        n_features, which is never perturbed.
+
+        Parameters
+        ----------
+        segments
+            A [H, W] array of superpixel labels.
+        n_features
+            Number of columns of the superpixels mask.
+
+        Returns
+        -------
+            A [H, W] array of column indices.
+        """
+
+        labels, ids = self._segment_ids(segments)
+        columns = np.where((labels >= 0) & (labels < n_features), labels, n_features)
+
+        return columns[ids]
+
+    def _get_pixel_columns(self, n_features: int) -> np.ndarray:
+        """
+        Returns the column of the superpixels mask of each pixel of the image to be explained (see
+        `_pixel_columns`), computed once for the current segments.
+        """
+
+        memo = self._pixel_columns_for
+        if memo is None or memo[0] is not self.segments or memo[1] != n_features:
+            memo = self._pixel_columns_for = (self.segments, n_features, self._pixel_columns(self.segments, n_features))
+
+        return memo[2]
+
+    def _get_fudged_image(self) -> np.ndarray:
+        """
+        Returns the fudged image of the image to be explained (see `_fudged_image`), computed once for the
+        current image and segments. The fudged image and the superpixel means are cached, keyed by the contents
+        of the image and segments.
+        """
+
+        memo = self._fudged_image_for
+        if memo is not None and memo[0] is self.image and memo[1] is self.segments:
+            return memo[2]
+
+        key, cached = None, None
+        if self.segmentation_cache is not None:
+            key = ('fudged_image', array_key(self.image, self.segments))
+            cached = self.segmentation_cache.get(key)
+        if cached is None:
+            cached = self._fudged_image(self.image, self.segments)
+            if key is not None:
+                self.segmentation_cache.put(key, cached)
+        segment_means, fudged_image = cached
+        self.segment_means = segment_means.copy()
+        self._fudged_image_for = (self.image, self.segments, fudged_image)
+
+        return fudged_image
+
+    def _fudged_image(self, image: np.ndarray, segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Creates the fudged image, where the value of each pixel is set to the average value of its
+        superpixel for each channel.
+
+        Parameters
+        ----------
+        image
+            A [H, W, C] image.
+        segments
+            A [H, W] array of superpixel labels.
+
+        Returns
+        -------
+        means
+            A [M, C] array with the average value of each superpixel (ordered by label) for each channel.
+        fudged_image
+            The fudged image, with the dtype of the image.
+        """
+
+        labels, ids = self._segment_ids(segments)
+        ids = ids.ravel()
+        counts = np.bincount(ids, minlength=labels.shape[0])
+        channels = image.reshape(ids.shape[0], -1)
+        means = np.stack(
+            [np.bincount(ids, weights=channels[:, i], minlength=labels.shape[0]) for i in range(channels.shape[1])],
+            axis=1,
+        ) / counts[:, np.newaxis]
+
+        return means, means[ids].reshape(image.shape).astype(image.dtype)
 
     def compare_labels(self, samples: np.ndarray) -> np.ndarray:
         """
@@ -320,6 +608,12 @@ class AnchorImage(Explainer):
                 n_covered_ex: int = 10,
                 binary_cache_size: int = 10000,
                 cache_margin: int = 1000,
+                cache_max_bytes: int = None,
+                max_predict_batch: int = None,
+                max_batch_bytes: int = None,
+                prefetch: bool = False,
+                time_budget_s: float = None,
+                max_predictor_calls: int = None,
                 verbose: bool = False,
                 verbose_every: int = 1,
                 **kwargs: Any) -> Explanation:
@@ -356,11 +650,31 @@ class AnchorImage(Explainer):
             How many examples where anchors apply to store for each anchor sampled during search
             (both examples where prediction on samples agrees/disagrees with desired_label are stored).
         binary_cache_size
-            The result search pre-allocates binary_cache_size batches for storing the binary arrays
-            returned during sampling.
+            The result search stores the binary arrays returned during sampling in a cache that grows in blocks
+            of binary_cache_size batches.
         cache_margin
-            When only max(cache_margin, batch_size) positions in the binary cache remain empty, a new cache
-            of the same size is pre-allocated to continue buffering samples.
+            Has no effect since the binary cache grows by appending blocks, kept for backwards compatibility.
+        cache_max_bytes
+            If set, limits the size of the binary cache. When the cache is full, the samples drawn for anchors
+            pruned from the beam are evicted.
+        max_predict_batch
+            The samples drawn for all the anchors in a sampling round are labelled with a single predictor
+            call. If set, the samples are instead passed to the predictor in chunks of at most
+            max_predict_batch samples.
+        max_batch_bytes
+            If set, the perturbed images are generated and predicted in chunks whose images (and pixel masks)
+            take at most max_batch_bytes bytes, including the chunk generated in advance if prefetch is True.
+            This bounds the memory used by the samples regardless of batch_size and the image resolution.
+        prefetch
+            If True, the next chunk of perturbed images is generated in a separate thread while the predictor
+            is called on the current chunk.
+        time_budget_s
+            If set, the anchor search stops after this number of seconds and returns the best anchor found
+            so far (see `AnchorBaseBeam.anchor_beam`).
+        max_predictor_calls
+            If set, the anchor search stops once the predictor has been called this number of times to label
+            samples and returns the best anchor found so far. Whether the search converged is reported in the
+            explanation metadata.
         verbose
             Display updates during the anchor search iterations.
         verbose_every
@@ -380,15 +694,23 @@ class AnchorImage(Explainer):
         self.image = image
         self.n_covered_ex = n_covered_ex
         self.p_sample = p_sample
-        self.segments = self.generate_superpixels(image)
+        if self.segmentation_cache is not None:
+            self.segmentation_cache.reset_stats()
+        self._instrumented.reset()
+        self.segments = self._get_superpixels(image)
         self.segment_labels = list(np.unique(self.segments))
         self.instance_label = self.predictor(image[np.newaxis, ...])[0]
+        self.max_batch_bytes = max_batch_bytes
+        self.prefetch = prefetch
 
         # get anchors and add metadata
         mab = AnchorBaseBeam(
             samplers=[self.sampler],
             sample_cache_size=binary_cache_size,
             cache_margin=cache_margin,
+            cache_max_bytes=cache_max_bytes,
+            max_predict_batch=max_predict_batch,
+            predictor_calls=self._get_predictor_calls,
             **kwargs)
         result = mab.anchor_beam(
             desired_confidence=threshold,
@@ -402,12 +724,21 @@ class AnchorImage(Explainer):
             min_samples_start=min_samples_start,
             verbose=verbose,
             verbose_every=verbose_every,
+            time_budget_s=time_budget_s,
+            max_predictor_calls=max_predictor_calls,
             **kwargs,
         )  # type: Any
         self.mab = mab
 
         return self.build_explanation(image, result, self.instance_label, params)
 
+    def _get_predictor_calls(self) -> int:
+        """
+        Returns the number of predictor calls made by the explanation so far.
+        """
+
+        return self._instrumented.calls
+
     def build_explanation(self, image: np.ndarray, result: dict, predicted_label: int, params: dict) -> Explanation:
         """
         Uses the metadata returned by the anchor search algorithm together with
@@ -447,6 +778,13 @@ class AnchorImage(Explainer):
 
         # params passed to explain
         explanation.meta['params'].update(params)
+        # anchor search statistics
+        explanation.meta['stats'].update(self.mab.stats)
+        if self.segmentation_cache is not None:
+            explanation.meta['stats'].update(
+                {'segmentation_cache_{}'.format(key): value for key, value in self.segmentation_cache.stats.items()}
+            )
+        explanation.meta['stats']['predictor'] = self._instrumented.summary()
         return explanation
 
     @staticmethod
@@ -495,9 +833,7 @@ class AnchorImage(Explainer):
             Image overlaid with mask.
         """
 
-        mask = np.zeros(segments.shape)
-        for f in mask_features:
-            mask[segments == f] = 1
+        mask = np.isin(segments, mask_features).astype(float)
         image = self._scale(image, scale=scale)
         masked_image = (image * np.expand_dims(mask, 2)).astype(int)
 
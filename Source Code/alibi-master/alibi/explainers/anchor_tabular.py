@@ -1,17 +1,20 @@
 import copy
 import logging
+import os
 import numpy as np
 from collections import OrderedDict, defaultdict
-from itertools import accumulate
-from typing import Any, Callable, DefaultDict, Dict, List, Set, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, DefaultDict, Dict, List, Optional, Set, Tuple, Union
 
 from alibi.api.interfaces import Explainer, Explanation, FitMixin
 from alibi.api.defaults import DEFAULT_META_ANCHOR, DEFAULT_DATA_ANCHOR
-from .anchor_base import AnchorBaseBeam, DistributedAnchorBaseBeam
+from .anchor_base import AnchorBaseBeam, DistributedAnchorBaseBeam, batch_compare_labels
 from .anchor_explanation import AnchorExplanation
-from alibi.utils.wrappers import ArgmaxTransformer
+from alibi.utils.cache import PredictionCache, merge_cache_stats
+from alibi.utils.wrappers import ArgmaxTransformer, InstrumentedPredictor, instrument
 from alibi.utils.discretizer import Discretizer
-from alibi.utils.distributed import RAY_INSTALLED
+from alibi.utils.distributed import ArrayStore, MemmapArray, MultiprocessingBackend, RAY_INSTALLED, attach_array
+from alibi.utils.profiling import Profiler, profile_phase
 
 
 class TabularSampler:
@@ -56,11 +59,25 @@ class TabularSampler:
         self.feature_values = feature_values
 
         self.val2idx = {}  # type: Dict[int, DefaultDict[int, Any]]
+        self.bin_index = {}  # type: Dict[int, Tuple[np.ndarray, np.ndarray]]
         self.cat_lookup = {}  # type: Dict[int, int]
         self.ord_lookup = {}  # type: Dict[int, set]
         self.enc2feat_idx = {}  # type: Dict[int, int]
-
-    def deferred_init(self, train_data: Union[np.ndarray, Any], d_train_data: Union[np.array, Any]) -> Any:
+        # feature column and range of discretized values of each encoded feature, used to binarize samples
+        self.enc_feats = np.zeros(0, dtype=int)  # type: np.ndarray
+        self.enc_lower = np.zeros(0)  # type: np.ndarray
+        self.enc_upper = np.zeros(0)  # type: np.ndarray
+        self.coverage_rows = None  # type: np.ndarray
+        # discretized coverage rows, kept if the shared coverage set is stored in memory
+        self.coverage_d_data = None  # type: np.ndarray
+        self.disc = None  # type: Discretizer
+        # reused to store the training data rows from which features are replaced in replace_features
+        self._rows_buffer = np.zeros(0, dtype=np.intp)  # type: np.ndarray
+        self.prediction_cache = None  # type: PredictionCache
+        self.profiler = None  # type: Profiler
+
+    def deferred_init(self, train_data: Union[np.ndarray, Any], d_train_data: Union[np.ndarray, Any],
+                      data_index: Tuple[np.ndarray, Dict[int, np.ndarray]] = None) -> Any:
         """
         Initialise the Tabular sampler object with data, discretizer, feature statistics and
         build an index from feature values and bins to database rows for each feature.
@@ -71,6 +88,9 @@ class TabularSampler:
             Data from which samples are drawn. Can be a numpy array or a ray future.
         d_train_data:
             Discretized version for training data. Can be a numpy array or a ray future.
+        data_index
+            A packed index returned by `pack_data_index`. If passed, the index is not built by the sampler
+            and the index rows are views into the packed array, so samplers in different processes can share it.
 
         Returns
         -------
@@ -79,13 +99,18 @@ class TabularSampler:
         """
 
         self._set_data(train_data, d_train_data)
-        self._set_discretizer(self.disc_perc)
+        if self.disc is None:
+            self._set_discretizer(self.disc_perc)
         self._set_numerical_feats_stats()
-        self.val2idx = self._get_data_index()
+        if data_index is None:
+            self.bin_index = self._get_bin_index()
+        else:
+            self.bin_index = self.unpack_data_index(*data_index)
+        self.val2idx = self._bin_index_to_val2idx(self.bin_index)
 
         return self
 
-    def _set_data(self, train_data: Union[np.ndarray, Any], d_train_data: Union[np.array, Any]) -> None:
+    def _set_data(self, train_data: Union[np.ndarray, Any], d_train_data: Union[np.ndarray, Any]) -> None:
         """
         Initialise sampler training set and discretized training set, set number of records.
         """
@@ -96,7 +121,8 @@ class TabularSampler:
 
     def _set_discretizer(self, disc_perc: Tuple[Union[int, float], ...]) -> None:
         """
-        Fit a discretizer to training data. Used to discretize returned samples.
+        Fit a discretizer to training data. Used to discretize returned samples. Not called if the
+        discretizer used to discretize the training data was set before `deferred_init`.
         """
 
         self.disc = Discretizer(
@@ -113,8 +139,17 @@ class TabularSampler:
         """
 
         self.min, self.max = np.full(self.train_data.shape[1], np.nan), np.full(self.train_data.shape[1], np.nan)
-        self.min[self.numerical_features] = np.min(self.train_data[:, self.numerical_features], axis=0)
-        self.max[self.numerical_features] = np.max(self.train_data[:, self.numerical_features], axis=0)
+        if not self.numerical_features or not self.n_records:
+            return
+        # computed on chunks of rows so that memory-mapped data is read once without being copied
+        chunk_size = 65536
+        mins, maxs = [], []
+        for start in range(0, self.n_records, chunk_size):
+            chunk = self.train_data[start:start + chunk_size, self.numerical_features]
+            mins.append(np.min(chunk, axis=0))
+            maxs.append(np.max(chunk, axis=0))
+        self.min[self.numerical_features] = np.min(mins, axis=0)
+        self.max[self.numerical_features] = np.max(maxs, axis=0)
 
     def set_instance_label(self, X: np.ndarray) -> None:
         """
@@ -143,6 +178,151 @@ class TabularSampler:
 
         self.n_covered_ex = n_covered
 
+    def set_shared_coverage(self, coverage_samples: int = None, store_data: bool = False) -> None:
+        """
+        Draws a set of training data rows that is used as the coverage set for all subsequent explanations,
+        instead of drawing a new coverage set for each instance. The rows are binarised for each instance
+        to be explained.
+
+        Parameters
+        ----------
+        coverage_samples
+            Number of rows in the shared coverage set. If None, a new coverage set is drawn for each instance.
+        store_data
+            If True, the discretized rows of the coverage set are copied in memory. Otherwise only their
+            indices are stored and the rows are read from the discretized training data for each instance,
+            which uses less memory but is slower if the training data is memory-mapped.
+        """
+
+        if coverage_samples is None:
+            self.coverage_rows, self.coverage_d_data = None, None
+        else:
+            self.coverage_rows = np.random.choice(range(self.n_records), coverage_samples, replace=True)
+            self.coverage_d_data = np.asarray(self.d_train_data[self.coverage_rows]) if store_data else None
+
+    def set_prediction_cache(self, max_size: int = None, keep: bool = False) -> None:
+        """
+        Caches the predictions on the perturbed samples so that the predictor is not called again on samples
+        that are drawn repeatedly (see `alibi.utils.cache.PredictionCache`).
+
+        Parameters
+        ----------
+        max_size
+            Maximum number of cached predictions. If None, the predictions are not cached.
+        keep
+            If True and the predictions are already cached, the cached predictions are kept (so they are
+            reused across explanations) and only the cache statistics are reset.
+        """
+
+        if max_size is None:
+            self.prediction_cache = None
+        elif keep and self.prediction_cache is not None:
+            self.prediction_cache.max_size = max_size
+            self.prediction_cache.reset_stats()
+        else:
+            self.prediction_cache = PredictionCache(self.predictor, max_size=max_size)
+
+    def get_prediction_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the prediction cache statistics since the last `set_prediction_cache` call, or an empty
+        dictionary if the predictions are not cached.
+        """
+
+        return {} if self.prediction_cache is None else self.prediction_cache.stats
+
+    def set_profiler(self, profiler: Profiler = None) -> None:
+        """
+        Sets a profiler that records the time spent drawing ('perturbation'), binarising ('binarize')
+        and predicting ('predict') samples. If None, the sampler is not profiled.
+        """
+
+        self.profiler = profiler
+
+    def _get_bin_index(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Sorts the training data rows by the value of each categorical feature and by the bin of each
+        discretized numerical feature. The sort is stable, so the rows with the same value are in increasing order.
+
+        Returns
+        -------
+        bin_index
+            Maps feature col. IDs to a tuple `(rows, starts)` such that the rows where the feature has value
+            (or is in bin) `v` are `rows[starts[v]:starts[v + 1]]`. The rows in a range of bins are therefore
+            a slice of `rows`. Values that are not in `feature_values` are not indexed.
+        """
+
+        bin_index = {}  # type: Dict[int, Tuple[np.ndarray, np.ndarray]]
+        for feat in self.numerical_features + self.categorical_features:
+            rows, starts = self._sort_feature_rows(feat)
+            bin_index[feat] = (rows[:starts[-1]], starts)
+
+        return bin_index
+
+    def _sort_feature_rows(self, feat: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorts the training data rows by the value or bin of a feature (see `_get_bin_index`). The rows
+        where the value is not indexed are returned at the end, after `starts[-1]`.
+        """
+
+        dtype = np.int32 if self.n_records <= np.iinfo(np.int32).max else np.int64
+        n_values = len(self.feature_values[feat])
+        values = self.d_train_data[:, feat]
+        with np.errstate(invalid='ignore'):
+            codes = values.astype(np.int64)
+        codes[(codes != values) | (codes < 0) | (codes >= n_values)] = n_values
+        # numpy sorts small integer types with a stable radix sort
+        key_type = np.uint8 if n_values < np.iinfo(np.uint8).max else np.int64
+        rows = np.argsort(codes.astype(key_type), kind='stable').astype(dtype)
+        starts = np.zeros(n_values + 1, dtype=np.int64)
+        starts[1:] = np.cumsum(np.bincount(codes, minlength=n_values + 1)[:n_values])
+
+        return rows, starts
+
+    def write_data_index(self, path: str) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        """
+        Builds the index from feature values and bins to training data rows (see `_get_bin_index`) one
+        feature at a time and writes it to a .npy file, so that the index does not need to fit in memory.
+
+        Parameters
+        ----------
+        path
+            Path of the .npy file. The file is overwritten if it exists.
+
+        Returns
+        -------
+            The index in the format returned by `pack_data_index`, where the rows are memory-mapped
+            from the file.
+        """
+
+        features = self.numerical_features + self.categorical_features
+        dtype = np.int32 if self.n_records <= np.iinfo(np.int32).max else np.int64
+        index_rows = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(len(features) * self.n_records,))
+        offsets = {}  # type: Dict[int, np.ndarray]
+        for i, feat in enumerate(features):
+            # each feature takes n_records rows, the rows whose value is not indexed are at the end
+            rows, starts = self._sort_feature_rows(feat)
+            index_rows[i * self.n_records:(i + 1) * self.n_records] = rows
+            offsets[feat] = starts + i * self.n_records
+        index_rows.flush()
+        del index_rows
+
+        return np.load(path, mmap_mode='r'), offsets
+
+    @staticmethod
+    def _bin_index_to_val2idx(bin_index: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> \
+            Dict[int, DefaultDict[int, np.ndarray]]:
+        """
+        Converts an index returned by `_get_bin_index` to the mapping returned by `_get_data_index`. The row
+        arrays are views into the index.
+        """
+
+        val2idx = {}  # type: Dict[int, DefaultDict[int, np.ndarray]]
+        for feat, (rows, starts) in bin_index.items():
+            val2idx[feat] = defaultdict(None, {value: rows[starts[value]:starts[value + 1]]
+                                               for value in range(starts.shape[0] - 1)})
+
+        return val2idx
+
     def _get_data_index(self) -> Dict[int, DefaultDict[int, np.ndarray]]:
         """
         Create a mapping where key is feat. col ID. and value is a dict where each int represents a bin value
@@ -155,16 +335,67 @@ class TabularSampler:
             Mapping as described above.
         """
 
-        all_features = self.numerical_features + self.categorical_features
-        val2idx = {f_id: defaultdict(None) for f_id in all_features}  # type: Dict[int, DefaultDict[int, np.ndarray]]
-        for feat in val2idx:
-            for value in range(len(self.feature_values[feat])):
-                val2idx[feat][value] = (self.d_train_data[:, feat] == value).nonzero()[0]
+        return self._bin_index_to_val2idx(self._get_bin_index())
 
-        return val2idx
+    def _get_bin_rows(self, feat: int, bins: Set[int]) -> np.ndarray:
+        """
+        Returns the training data rows where a discretized numerical feature is in a set of bins. The sets
+        of bins sampled during the anchor search are ranges, whose rows are a slice of the bin index.
+        """
 
-    def __call__(self, anchor: Tuple[int, tuple], num_samples: int, compute_labels=True) -> \
-            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray]]:
+        rows, starts = self.bin_index[feat]
+        if not bins:
+            return rows[:0]
+        low, high = min(bins), max(bins)
+        if len(bins) == high - low + 1:
+            return rows[starts[low]:starts[high + 1]]
+
+        return np.concatenate([rows[starts[bin_id]:starts[bin_id + 1]] for bin_id in sorted(bins)])
+
+    @staticmethod
+    def pack_data_index(bin_index: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> \
+            Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        """
+        Concatenates the training data rows of an index returned by `_get_bin_index` into a single array,
+        so that the index can be stored once and shared by samplers running in different processes.
+
+        Parameters
+        ----------
+        bin_index
+            Maps features to the training data rows sorted by feature value or bin and the positions where
+            each value starts.
+
+        Returns
+        -------
+        rows
+            The rows of all the features.
+        offsets
+            Maps features to the positions in `rows` where each of their values starts.
+        """
+
+        offsets = {}  # type: Dict[int, np.ndarray]
+        arrays, start = [], 0
+        for feat, (rows, starts) in bin_index.items():
+            offsets[feat] = starts + start
+            start += rows.shape[0]
+            arrays.append(rows)
+        if not arrays:
+            return np.zeros(0, dtype=np.int32), offsets
+
+        return np.concatenate(arrays), offsets
+
+    @staticmethod
+    def unpack_data_index(rows: np.ndarray, offsets: Dict[int, np.ndarray]) -> \
+            Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Inverse of `pack_data_index`. The rows of each feature are views into `rows`.
+        """
+
+        return {feat: (rows[starts[0]:starts[-1]], starts - starts[0]) for feat, starts in offsets.items()}
+
+    def __call__(self, anchor: Union[Tuple[int, tuple], List[Tuple[int, tuple]]], num_samples: int,
+                 compute_labels=True, max_predict_batch: int = None) -> \
+            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray], List]:
         """
         Obtain perturbed records by drawing samples from training data that contain the categorical labels and
         discretized numerical features and replacing the remainder of the record with arbitrary values.
@@ -173,12 +404,15 @@ class TabularSampler:
         ----------
         anchor
             The integer represents the order of the result in a request array. The tuple contains
-            encoded feature indices.
+            encoded feature indices. If a list of anchors is passed, samples are drawn for each anchor and
+            the predictor is called on the samples drawn for all anchors at once.
         num_samples
             Number of samples used when sampling from training set.
         compute_labels
             If True, an array of comparisons between predictions on perturbed samples and instance to be
             explained is returned.
+        max_predict_batch
+            If a list of anchors is passed, the maximum number of samples passed to the predictor in one call.
 
         Returns
         -------
@@ -192,31 +426,108 @@ class TabularSampler:
              - data: Sampled data where ordinal features are binned (1 if in bin, 0 otherwise)
              - coverage: the coverage of the anchor
              - anchor[0]: position of anchor in the batch request
-            Otherwise, a list containing the data matrix only is returned.
+            Otherwise, a list containing the data matrix only is returned. If a list of anchors is passed,
+            a list with the above for each anchor is returned.
         """
 
-        raw_data, d_raw_data, coverage = self.perturbation(anchor[1], num_samples)
-
-        # use the sampled, discretized raw data to construct a data matrix with the categorical ...
-        # ... and binned ordinal data (1 if in bin, 0 otherwise)
-        data = np.zeros((num_samples, len(self.enc2feat_idx)), int)
-        for i in self.enc2feat_idx:
-            if i in self.cat_lookup:
-                data[:, i] = (d_raw_data[:, self.enc2feat_idx[i]] == self.cat_lookup[i])
-            else:
-                d_records_sampled = d_raw_data[:, self.enc2feat_idx[i]]
-                lower_bin, upper_bin = min(list(self.ord_lookup[i])), max(list(self.ord_lookup[i]))
-                idxs = np.where((lower_bin <= d_records_sampled) & (d_records_sampled <= upper_bin))
-                data[idxs, i] = 1
-
+        if isinstance(anchor, list):
+            if not compute_labels:
+                return [self(single_anchor, num_samples, compute_labels=False) for single_anchor in anchor]
+            samples = [self.sample(single_anchor[1], num_samples) for single_anchor in anchor]
+            labels_batch = batch_compare_labels(self.compare_labels, [s[0] for s in samples], max_predict_batch)
+            return [self.build_samples_result(single_anchor, raw_data, labels, data, coverage)
+                    for single_anchor, (raw_data, data, coverage), labels in zip(anchor, samples, labels_batch)]
+
+        if not compute_labels and self.coverage_rows is not None:
+            # the shared coverage set is binarised for the instance to be explained
+            d_coverage = self.coverage_d_data
+            if d_coverage is None:
+                d_coverage = self.d_train_data[self.coverage_rows]
+            with profile_phase(self.profiler, 'binarize', rows=d_coverage.shape[0]):
+                return [self.binarize(d_coverage)]
+
+        raw_data, data, coverage = self.sample(anchor[1], num_samples)
         if compute_labels:
             labels = self.compare_labels(raw_data)
-            covered_true = raw_data[labels, :][:self.n_covered_ex]
-            covered_false = raw_data[np.logical_not(labels), :][:self.n_covered_ex]
-            return [covered_true, covered_false, labels.astype(int), data, coverage, anchor[0]]
+            return self.build_samples_result(anchor, raw_data, labels, data, coverage)
         else:
             return [data]  # only binarised data is used for coverage computation
 
+    def sample(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Draws perturbed records (see __call__) and binarises them.
+
+        Parameters
+        ----------
+        anchor
+            Encoded feature indices of the anchor.
+        num_samples
+            Number of samples used when sampling from training set.
+
+        Returns
+        -------
+        raw_data
+            Sampled records.
+        data
+            Sampled data where ordinal features are binned (1 if in bin, 0 otherwise).
+        coverage
+            The coverage of the anchor.
+        """
+
+        with profile_phase(self.profiler, 'perturbation', rows=num_samples):
+            raw_data, d_raw_data, coverage = self.perturbation(anchor, num_samples)
+        with profile_phase(self.profiler, 'binarize', rows=num_samples):
+            data = self.binarize(d_raw_data)
+
+        return raw_data, data, coverage
+
+    def binarize(self, d_samples: np.ndarray) -> np.ndarray:
+        """
+        Uses the discretized samples to construct a data matrix with the categorical and binned ordinal
+        data (1 if in bin, 0 otherwise) for the instance to be explained.
+
+        Parameters
+        ----------
+        d_samples
+            Discretized samples.
+
+        Returns
+        -------
+            Binarised samples.
+        """
+
+        d_records_sampled = d_samples[:, self.enc_feats]
+
+        return ((self.enc_lower <= d_records_sampled) & (d_records_sampled <= self.enc_upper)).astype(int)
+
+    def _set_binarize_lookups(self) -> None:
+        """
+        Stores the feature column and the lowest and highest discretized value of each encoded feature
+        in arrays, so that `binarize` compares all the encoded features at once. The range of a
+        categorical variable contains only the value of the instance to be explained.
+        """
+
+        n_enc = len(self.enc2feat_idx)
+        self.enc_feats = np.array([self.enc2feat_idx[i] for i in range(n_enc)], dtype=int)
+        self.enc_lower, self.enc_upper = np.zeros(n_enc), np.zeros(n_enc)
+        for i in range(n_enc):
+            if i in self.cat_lookup:
+                self.enc_lower[i] = self.enc_upper[i] = self.cat_lookup[i]
+            else:
+                self.enc_lower[i], self.enc_upper[i] = min(self.ord_lookup[i]), max(self.ord_lookup[i])
+
+    def build_samples_result(self, anchor: Tuple[int, tuple], raw_data: np.ndarray, labels: np.ndarray,
+                             data: np.ndarray, coverage: float) -> List:
+        """
+        Builds the list returned by __call__ when compute_labels=True from the samples drawn for an anchor
+        and the comparisons between the predictions on the samples and the instance label.
+        """
+
+        covered_true = raw_data[labels, :][:self.n_covered_ex]
+        covered_false = raw_data[np.logical_not(labels), :][:self.n_covered_ex]
+
+        return [covered_true, covered_false, labels.astype(int), data, coverage, anchor[0]]
+
     def compare_labels(self, samples: np.ndarray) -> np.ndarray:
         """
         Compute the agreement between a classifier prediction on an instance to be explained and the
@@ -232,7 +543,11 @@ class TabularSampler:
             An array of integers indicating whether the prediction was the same as the instance label.
         """
 
-        return self.predictor(samples) == self.instance_label
+        predictor = self.predictor if self.prediction_cache is None else self.prediction_cache
+        with profile_phase(self.profiler, 'predict', rows=samples.shape[0]):
+            labels = predictor(samples)
+
+        return labels == self.instance_label
 
     def perturbation(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, np.ndarray, float]:
         """
@@ -257,7 +572,7 @@ class TabularSampler:
         """
 
         # initialise samples randomly
-        init_sample_idx = np.random.choice(range(self.train_data.shape[0]), num_samples, replace=True)
+        init_sample_idx = np.random.randint(0, self.train_data.shape[0], num_samples)
         samples = self.train_data[init_sample_idx]
         d_samples = self.d_train_data[init_sample_idx]
 
@@ -272,10 +587,15 @@ class TabularSampler:
         #  count number of samples available and find the indices for each partial anchor & the full anchor
         uniq_feat_ids = list(OrderedDict.fromkeys([self.enc2feat_idx[enc_idx] for enc_idx in anchor]))
         uniq_feat_ids = [feat for feat in uniq_feat_ids if feat not in [f for f, _, _ in unk_feat_vals]]
-        partial_anchor_rows = list(accumulate(
-            [allowed_rows[feat] for feat in uniq_feat_ids],
-            np.intersect1d),
-        )
+        # the rows where a partial anchor applies are the rows of the previous partial anchor where the next
+        # feature has the anchor value or is in the anchor bins, so no sorted set intersections are needed
+        allowed_values = {self.enc2feat_idx[enc_id]: [self.cat_lookup[enc_id]] for enc_id in anchor
+                          if enc_id in self.cat_lookup}
+        allowed_values.update({feat: list(bins) for feat, bins in allowed_bins.items()})
+        partial_anchor_rows = [allowed_rows[uniq_feat_ids[0]]]
+        for feat in uniq_feat_ids[1:]:
+            rows = partial_anchor_rows[-1]
+            partial_anchor_rows.append(rows[np.isin(self.d_train_data[rows, feat], allowed_values[feat])])
         nb_partial_anchors = np.array([len(n_records) for n_records in reversed(partial_anchor_rows)])
         coverage = nb_partial_anchors[-1] / self.n_records
 
@@ -298,15 +618,17 @@ class TabularSampler:
             partial_anchor_rows,
             nb_partial_anchors,
             num_samples,
+            d_samples=d_samples,
         )
 
         if unk_feat_vals:
-            self.handle_unk_features(allowed_bins, num_samples, samples, unk_feat_vals)
+            self.handle_unk_features(allowed_bins, num_samples, samples, unk_feat_vals, d_samples=d_samples)
 
-        return samples, self.disc.discretize(samples), coverage
+        return samples, d_samples, coverage
 
     def handle_unk_features(self, allowed_bins: Dict[int, Set[int]], num_samples: int, samples: np.ndarray,
-                            unk_feature_values: List[Tuple[int, str, Union[Any, int]]]) -> None:
+                            unk_feature_values: List[Tuple[int, str, Union[Any, int]]],
+                            d_samples: np.ndarray = None) -> None:
         """
         Replaces unknown feature values with defaults. For categorical variables, the replacement value is
         the same as the value of the unknown feature. For continuous variables, a value is sampled uniformly
@@ -323,6 +645,8 @@ class TabularSampler:
         unk_feature_values:
             List of tuples where: [0] is original feature id, [1] feature type, [2] if var is categorical,
             replacement value, otherwise None
+        d_samples
+            If passed, the discretized samples, which are updated with the discretized replacement values.
         """
 
         for feat, var_type, val in unk_feature_values:
@@ -330,16 +654,20 @@ class TabularSampler:
                 fmt = "WARNING: No data records have {} feature with value {}. Setting all samples' values to {}!"
                 print(fmt.format(feat, val, val))
                 samples[:, feat] = val
+                if d_samples is not None:
+                    d_samples[:, feat] = val
             else:
                 fmt = "WARNING: For feature {}, no training data record had discretized values in bins {}." \
                       " Sampling uniformly at random from the feature range!"
                 print(fmt.format(feat, allowed_bins[feat]))
                 min_vals, max_vals = self.min[feat], self.max[feat]
                 samples[:, feat] = np.random.uniform(low=min_vals, high=max_vals, size=(num_samples,))
+                if d_samples is not None:
+                    d_samples[:, feat] = self.disc.lambdas[feat](samples[:, feat])
 
     def replace_features(self, samples: np.ndarray, allowed_rows: Dict[int, Any], uniq_feat_ids: List[int],
                          partial_anchor_rows: List[np.ndarray], nb_partial_anchors: np.ndarray,
-                         num_samples: int) -> None:
+                         num_samples: int, d_samples: np.ndarray = None) -> None:
         """
         The method creates perturbed samples by first replacing all partial anchors with partial anchors drawn
         from the training set. Then remainder of the features are then replaced with random values drawn from
@@ -362,6 +690,9 @@ class TabularSampler:
             The number of training records which contain each partial anchor.
         num_samples:
             Number of perturbed samples to be returned.
+        d_samples
+            If passed, the discretized samples, in which the same features are replaced with the discretized
+            values from the training set.
         """
 
         requested_samples = num_samples
@@ -386,22 +717,15 @@ class TabularSampler:
                         replace=True,
                     )
                 n_samp = num_samples
-            samples[start:start + n_samp, uniq_feat_ids[idx:]] = self.train_data[np.ix_(samp_idxs, uniq_feat_ids[idx:])]
+            self._replace_values(samples, d_samples, start, samp_idxs[np.newaxis, :], uniq_feat_ids[idx:])
 
             # deal with partial anchors; idx = 0 means that we actually sample the entire anchor
             if idx > 0:
 
                 # choose replacement values at random from training set
                 feats_to_replace = uniq_feat_ids[:idx]
-                samp_idxs = np.zeros((len(feats_to_replace), n_samp)).astype(int)  # =: P x Q
-                for i, feat_idx in enumerate(feats_to_replace):
-                    samp_idxs[i, :] = np.random.choice(allowed_rows[feat_idx], n_samp, replace=True)
-
-                # N x F ->  P X Q x F -> P X Q
-                # First slice takes the data rows indicated in rows of samp_idxs; each row corresponds to a diff. feat
-                # Second slice takes the column indicate in feats_to_replace from each of P Q x F sub-tensors
-                to_replace_vals = self.train_data[samp_idxs][np.arange(len(feats_to_replace)), :, feats_to_replace]
-                samples[start: start + n_samp, feats_to_replace] = to_replace_vals.transpose()
+                samp_idxs = self._sample_rows(allowed_rows, feats_to_replace, n_samp)  # =: P x Q
+                self._replace_values(samples, d_samples, start, samp_idxs, feats_to_replace)
             start += n_samp
 
         # possible that the dataset doesn't contain enough partial examples. Eg, in anchor is (10,) and have
@@ -411,12 +735,37 @@ class TabularSampler:
         if max_samples_available <= requested_samples:
             n_samp = samples.shape[0] - start
 
-            samp_idxs = np.zeros((len(uniq_feat_ids), n_samp)).astype(int)
-            for i, feat_idx in enumerate(uniq_feat_ids):
-                samp_idxs[i, :] = np.random.choice(allowed_rows[feat_idx], n_samp, replace=True)
+            samp_idxs = self._sample_rows(allowed_rows, uniq_feat_ids, n_samp)
+            self._replace_values(samples, d_samples, start, samp_idxs, uniq_feat_ids)
+
+    def _sample_rows(self, allowed_rows: Dict[int, Any], feats: List[int], n_samp: int) -> np.ndarray:
+        """
+        Draws, for each feature in feats, n_samp training set rows with replacement from the allowed rows of
+        the feature. Returns a len(feats) x n_samp view of a buffer that is reused by the next call.
+        """
+
+        size = len(feats) * n_samp
+        if self._rows_buffer.shape[0] < size:
+            self._rows_buffer = np.zeros(size, dtype=np.intp)
+        samp_idxs = self._rows_buffer[:size].reshape(len(feats), n_samp)
+        for i, feat in enumerate(feats):
+            samp_idxs[i] = allowed_rows[feat][np.random.randint(0, allowed_rows[feat].shape[0], n_samp)]
 
-            to_replace_vals = self.train_data[samp_idxs][np.arange(len(uniq_feat_ids)), :, uniq_feat_ids]
-            samples[start:, uniq_feat_ids] = to_replace_vals.transpose()
+        return samp_idxs
+
+    def _replace_values(self, samples: np.ndarray, d_samples: Optional[np.ndarray], start: int,
+                        samp_idxs: np.ndarray, feats: List[int]) -> None:
+        """
+        Sets feature feats[i] of sample start + j to its value in the training set row samp_idxs[i, j]
+        (samp_idxs can also have a single row, used for all the features). Only the required (row, feature)
+        pairs are read from the training set, which avoids gathering whole rows.
+        """
+
+        stop = start + samp_idxs.shape[1]
+        cols = np.array(feats)[:, np.newaxis]
+        samples[start:stop, feats] = self.train_data[samp_idxs, cols].T
+        if d_samples is not None:
+            d_samples[start:stop, feats] = self.d_train_data[samp_idxs, cols].T
 
     def get_features_index(self, anchor: tuple) -> \
             Tuple[Dict[int, Set[int]], Dict[int, Any], List[Tuple[int, str, Union[Any, int]]]]:
@@ -473,7 +822,7 @@ class TabularSampler:
         # dict where keys are feature col. ids and values are lists containing row indices in train data which contain
         # data coming from the same bin (or range of bins)
         for feat_id in allowed_bins:  # NB: should scale since we don't query the whole DB every time!
-            allowed_rows[feat_id] = np.concatenate([self.val2idx[feat_id][bin_id] for bin_id in allowed_bins[feat_id]])
+            allowed_rows[feat_id] = self._get_bin_rows(feat_id, allowed_bins[feat_id])
             if allowed_rows[feat_id].size == 0:  # no instances in training data are in the specified bins ...
                 unk_feat_values.append((feat_id, 'o', None))
 
@@ -509,6 +858,7 @@ class TabularSampler:
         if not self.numerical_features:  # data contains only categorical variables
             self.cat_lookup = dict(zip(self.categorical_features, X))
             self.enc2feat_idx = dict(zip(*[self.categorical_features] * 2))  # type: ignore
+            self._set_binarize_lookups()
             return [self.cat_lookup, self.ord_lookup, self.enc2feat_idx]
 
         first_numerical_idx = np.searchsorted(self.categorical_features, self.numerical_features[0]).item()
@@ -552,6 +902,7 @@ class TabularSampler:
                 self.cat_lookup[cat_enc_idx] = X[cat_feat_idx]
                 self.enc2feat_idx[cat_enc_idx] = cat_feat_idx
                 cat_enc_idx += 1
+        self._set_binarize_lookups()
 
         return [self.cat_lookup, self.ord_lookup, self.enc2feat_idx]
 
@@ -563,11 +914,15 @@ class RemoteSampler:
         ray = ray  # set module as class variable to used only in this context
 
     def __init__(self, *args):
-        self.train_id, self.d_train_id, self.sampler = args
-        self.sampler = self.sampler.deferred_init(self.train_id, self.d_train_id)
+        self.train_id, self.d_train_id, self.sampler, *data_index = args
+        train_data, d_train_data = attach_array(self.train_id), attach_array(self.d_train_id)
+        if data_index:
+            index_rows, index_offsets = data_index
+            data_index = (attach_array(index_rows), index_offsets)
+        self.sampler = self.sampler.deferred_init(train_data, d_train_data, data_index=data_index or None)
 
     def __call__(self, anchors_batch: Union[Tuple[int, tuple], List[Tuple[int, tuple]]], num_samples: int,
-                 compute_labels: bool = True) -> List:
+                 compute_labels: bool = True, fuse_predictions: bool = False, max_predict_batch: int = None) -> List:
         """
         Wrapper around TabularSampler.__call__. It allows sampling a batch of anchors in the same process,
         which can improve performance.
@@ -580,10 +935,21 @@ class RemoteSampler:
             See TabularSampler.__call__.
         compute_labels
             See TabularSampler.__call__.
+        fuse_predictions
+            If True, the predictor is called on the samples drawn for all anchors in the batch at once.
+        max_predict_batch
+            See TabularSampler.__call__.
         """
 
         if isinstance(anchors_batch, tuple):  # DistributedAnchorBaseBeam._get_samples_coverage call
             return self.sampler(anchors_batch, num_samples, compute_labels=compute_labels)
+        elif fuse_predictions:
+            return self.sampler(
+                anchors_batch,
+                num_samples,
+                compute_labels=compute_labels,
+                max_predict_batch=max_predict_batch,
+            )
         elif len(anchors_batch) == 1:  # batch size = 1
             return [self.sampler(*anchors_batch, num_samples, compute_labels=compute_labels)]
         else:  # batch size > 1
@@ -625,15 +991,78 @@ class RemoteSampler:
 
         self.sampler.set_n_covered(n_covered)
 
+    def set_shared_coverage(self, coverage_samples: int = None, store_data: bool = False) -> None:
+        """
+        Wrapper around TabularSampler.set_shared_coverage.
+
+        Parameters
+        ----------
+        coverage_samples, store_data
+            See TabularSampler.set_shared_coverage.
+        """
+
+        self.sampler.set_shared_coverage(coverage_samples, store_data=store_data)
+
+    def set_prediction_cache(self, max_size: int = None, keep: bool = False) -> None:
+        """
+        Wrapper around TabularSampler.set_prediction_cache.
+        """
+
+        self.sampler.set_prediction_cache(max_size, keep=keep)
+
+    def get_prediction_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Wrapper around TabularSampler.get_prediction_cache_stats.
+        """
+
+        return self.sampler.get_prediction_cache_stats()
+
+    def set_profiler(self, profiler: Profiler = None) -> None:
+        """
+        Wrapper around TabularSampler.set_profiler.
+        """
+
+        self.sampler.set_profiler(profiler)
+
+    def _get_instrumented_predictor(self) -> InstrumentedPredictor:
+        predictor = self.sampler.predictor
+        return predictor.predictor if isinstance(predictor, ArgmaxTransformer) else predictor
+
+    def reset_predictor_stats(self) -> None:
+        """
+        Resets the statistics of the predictor calls made by the sampler.
+        """
+
+        self._get_instrumented_predictor().reset()
+
+    def get_predictor_stats(self) -> Dict[str, Any]:
+        """
+        Returns the summary of the predictor calls made by the sampler (see InstrumentedPredictor.summary).
+        """
+
+        return self._get_instrumented_predictor().summary()
+
+    def get_profile(self) -> Optional[dict]:
+        """
+        Returns the summary of the sampler profiler, or None if the sampler is not profiled.
+        """
+
+        return None if self.sampler.profiler is None else self.sampler.profiler.summary()
+
     def _get_sampler(self) -> TabularSampler:
         """
-        A getter that returns the underlying tabular object.
+        A getter that returns the underlying tabular object, without the predictor and the prediction cache.
+        The predictor is not necessarily picklable, e.g. a lambda inherited by a forked process.
 
         Returns
         -------
-            The tabular sampler object that is used in the process.
+            A copy of the tabular sampler object that is used in the process.
         """
-        return self.sampler
+
+        sampler = copy.copy(self.sampler)
+        sampler.predictor, sampler.prediction_cache = None, None
+
+        return sampler
 
     def build_lookups(self, X):
         """
@@ -654,6 +1083,43 @@ class RemoteSampler:
         return [cat_lookup_id, ord_lookup_id, enc2feat_idx_id]
 
 
+# chunk size used to fit the discretizer on memory-mapped training data
+OUT_OF_CORE_CHUNK_SIZE = 65536
+
+# explainer used by the processes of the AnchorTabular.explain_batch pool
+_batch_explainer = None  # type: AnchorTabular
+
+
+def _init_batch_worker(explainer: "AnchorTabular") -> None:
+    """
+    Stores the explainer in the worker process so that it is transferred once per process instead of
+    once per task. Workers draw a different random number sequence unless the explainer is seeded,
+    in which case each chunk is explained with a seed determined by its position.
+    """
+
+    global _batch_explainer
+    _batch_explainer = explainer
+    np.random.seed(None)
+
+
+def _explain_batch_chunk(chunk: Tuple[int, np.ndarray, dict]) -> List[Explanation]:
+    """
+    Explains a chunk of the instances passed to AnchorTabular.explain_batch in a worker process.
+
+    Parameters
+    ----------
+    chunk
+        A tuple containing the chunk position, the instances to be explained and the kwargs passed
+        to explain.
+    """
+
+    chunk_idx, X, kwargs = chunk
+    if _batch_explainer.seed is not None:
+        np.random.seed(_batch_explainer.seed + chunk_idx)
+
+    return [_batch_explainer.explain(x, **kwargs) for x in X]
+
+
 class AnchorTabular(Explainer, FitMixin):
 
     def __init__(self, predictor: Callable, feature_names: list, categorical_names: dict = None,
@@ -673,12 +1139,14 @@ class AnchorTabular(Explainer, FitMixin):
         super().__init__(meta=copy.deepcopy(DEFAULT_META_ANCHOR))
 
         self.feature_names = feature_names
+        # records the predictor calls made by the explanations
+        self._instrumented = instrument(predictor)
         # check if predictor returns predicted class or prediction probabilities for each class
         # if needed adjust predictor so it returns the predicted class
-        if np.argmax(predictor(np.zeros([1, len(feature_names)])).shape) == 0:
-            self.predictor = predictor
+        if np.argmax(self._instrumented(np.zeros([1, len(feature_names)])).shape) == 0:
+            self.predictor = self._instrumented  # type: Callable
         else:
-            transformer = ArgmaxTransformer(predictor)
+            transformer = ArgmaxTransformer(self._instrumented)
             self.predictor = transformer
 
         # define column indices of categorical and numerical (aka continuous) features
@@ -695,12 +1163,14 @@ class AnchorTabular(Explainer, FitMixin):
         self.samplers = []  # type: list
         self.seed = seed
         self.instance_label = None
+        # mode and size of the coverage set shared by the explanations and number of explanations it was used for
+        self.coverage_cache = None  # type: Optional[dict]
 
         # update metadata
         self.meta['params'].update(seed=seed)
 
-    def fit(self, train_data: np.ndarray, disc_perc: Tuple[Union[int, float], ...] = (25, 50, 75),  # type:ignore
-            **kwargs) -> "AnchorTabular":
+    def fit(self, train_data: Union[np.ndarray, str],  # type:ignore
+            disc_perc: Tuple[Union[int, float], ...] = (25, 50, 75), **kwargs) -> "AnchorTabular":
         """
         Fit discretizer to train data to bin numerical features into ordered bins and compute statistics for
         numerical features. Create a mapping between the bin numbers of each discretised numerical feature and the
@@ -709,14 +1179,34 @@ class AnchorTabular(Explainer, FitMixin):
         Parameters
         ----------
         train_data
-            Representative sample from the training data.
+            Representative sample from the training data. Can also be the path of a .npy file or a `np.memmap`,
+            in which case the data is not loaded in memory (see `_load_train_data`): the discretized data and
+            the index are written to .npy files next to the training data file and samples are drawn by
+            reading the sampled rows from the files.
         disc_perc
             List with percentiles (int) used for discretization.
+        kwargs
+            Can contain:
+
+            - chunk_size: if passed, the percentiles are estimated with quantile sketches on chunks of
+              chunk_size rows and the data is discretized chunk by chunk, so no full copies of the feature
+              columns are made. See `_fit_discretizer`. Defaults to 65536 for memory-mapped training data
+            - sketch_size: size of the quantile sketches (see `alibi.utils.discretizer.QuantileSketch`)
+            - disc_path, index_path: paths of the .npy files where the discretized training data and the index
+              are written if the training data is memory-mapped. The files are overwritten if they exist
         """
 
+        train_data, out_of_core_paths = self._load_train_data(train_data, **kwargs)
+        disc_path, index_path = out_of_core_paths or (None, None)
+
         # discretization of continuous features
-        disc = Discretizer(train_data, self.numerical_features, self.feature_names, percentiles=disc_perc)
-        d_train_data = disc.discretize(train_data)
+        disc, d_train_data = self._fit_discretizer(
+            train_data,
+            disc_perc,
+            chunk_size=kwargs.get('chunk_size', OUT_OF_CORE_CHUNK_SIZE if out_of_core_paths else None),
+            sketch_size=kwargs.get('sketch_size', 2048),
+            disc_path=disc_path,
+        )
         self.feature_values.update(disc.feature_intervals)
 
         sampler = TabularSampler(
@@ -728,13 +1218,118 @@ class AnchorTabular(Explainer, FitMixin):
             self.feature_values,
             seed=self.seed,
         )
-        self.samplers = [sampler.deferred_init(train_data, d_train_data)]
+        sampler.disc = disc
+        data_index = None
+        if index_path is not None:
+            sampler._set_data(train_data, d_train_data)
+            data_index = sampler.write_data_index(index_path)
+        self.samplers = [sampler.deferred_init(train_data, d_train_data, data_index=data_index)]
+        self.coverage_cache = None
 
         # update metadata
         self.meta['params'].update(disc_perc=disc_perc)
 
         return self
 
+    @staticmethod
+    def _load_train_data(train_data: Union[np.ndarray, str], **kwargs) -> \
+            Tuple[np.ndarray, Optional[Tuple[str, str]]]:
+        """
+        Memory-maps the training data if a path to a .npy file is passed.
+
+        Parameters
+        ----------
+        train_data
+            Training data, path to a .npy file containing the training data or `np.memmap`.
+        kwargs
+            See `fit`.
+
+        Returns
+        -------
+        train_data
+            The training data.
+        out_of_core_paths
+            If the training data is memory-mapped, the paths where the discretized training data and the
+            index are written (by default, next to the training data file). Otherwise, None.
+        """
+
+        if isinstance(train_data, str):
+            data = np.load(train_data, mmap_mode='r')  # type: np.ndarray
+        else:
+            data = train_data
+        if not isinstance(data, np.memmap):
+            return data, None
+
+        stem = os.path.splitext(data.filename)[0]
+        disc_path = kwargs.get('disc_path', stem + '_disc.npy')
+        index_path = kwargs.get('index_path', stem + '_index.npy')
+
+        return data, (disc_path, index_path)
+
+    def _fit_discretizer(self, train_data: np.ndarray, disc_perc: Tuple[Union[int, float], ...],
+                         chunk_size: int = None, sketch_size: int = 2048,
+                         disc_path: str = None) -> Tuple[Discretizer, np.ndarray]:
+        """
+        Fits a discretizer to the numerical features of the training data and discretizes the data.
+
+        Parameters
+        ----------
+        train_data
+            Training data.
+        disc_perc
+            Percentiles used for discretization.
+        chunk_size
+            If passed, the discretizer is fitted on chunks of chunk_size rows. The percentiles are then
+            approximate, with a rank error bounded by `Discretizer.rank_error`.
+        sketch_size
+            Size of the quantile sketches used if chunk_size is passed.
+        disc_path
+            If passed (with chunk_size), the discretized data is written to a .npy file at this path with the
+            smallest unsigned integer type that holds the bins and categorical values (usually uint8) and is
+            returned memory-mapped. Requires the categorical features to be encoded as integers.
+
+        Returns
+        -------
+        disc
+            The fitted discretizer.
+        d_train_data
+            Discretized training data.
+        """
+
+        if chunk_size is None:
+            disc = Discretizer(train_data, self.numerical_features, self.feature_names, percentiles=disc_perc)
+            return disc, disc.discretize(train_data)
+
+        def chunks():
+            return (train_data[start:start + chunk_size] for start in range(0, train_data.shape[0], chunk_size))
+
+        disc = Discretizer(
+            chunks(),
+            self.numerical_features,
+            self.feature_names,
+            percentiles=disc_perc,
+            sketch_size=sketch_size,
+        )
+        d_memmap = None  # type: Optional[np.memmap]
+        if disc_path is None:
+            d_train_data = np.empty(train_data.shape, dtype=train_data.dtype)
+        else:
+            n_values = max([len(disc_perc) + 1] + [len(self.feature_values[f]) for f in self.categorical_features])
+            dtype = np.min_scalar_type(n_values - 1)
+            d_memmap = np.lib.format.open_memmap(disc_path, mode='w+', dtype=dtype, shape=train_data.shape)
+            d_train_data = d_memmap
+        for start, d_chunk in zip(range(0, train_data.shape[0], chunk_size), disc.discretize_chunks(chunks())):
+            if disc_path is not None and not (d_chunk == d_chunk.astype(d_train_data.dtype)).all():
+                raise ValueError("The discretized training data can only be memory-mapped if the categorical "
+                                 "features are encoded as integers between 0 and the number of categories - 1!")
+            d_train_data[start:start + chunk_size] = d_chunk
+        if d_memmap is not None:
+            d_memmap.flush()
+            del d_memmap
+            d_train_data = np.load(disc_path, mmap_mode='r')
+
+        return disc, d_train_data
+
     def _build_sampling_lookups(self, X: np.ndarray) -> None:
         """
         Build a series of lookup tables used to draw samples with feature subsets identical to
@@ -763,6 +1358,15 @@ class AnchorTabular(Explainer, FitMixin):
                 n_covered_ex: int = 10,
                 binary_cache_size: int = 10000,
                 cache_margin: int = 1000,
+                cache_max_bytes: int = None,
+                max_predict_batch: int = None,
+                time_budget_s: float = None,
+                max_predictor_calls: int = None,
+                prediction_cache_size: int = None,
+                keep_prediction_cache: bool = False,
+                coverage_cache: str = None,
+                coverage_refresh: int = None,
+                profile: bool = False,
                 verbose: bool = False,
                 verbose_every: int = 1,
                 **kwargs: Any) -> Explanation:
@@ -796,11 +1400,43 @@ class AnchorTabular(Explainer, FitMixin):
             How many examples where anchors apply to store for each anchor sampled during search
             (both examples where prediction on samples agrees/disagrees with desired_label are stored).
         binary_cache_size
-            The result search pre-allocates binary_cache_size batches for storing the binary arrays
-            returned during sampling.
+            The result search stores the binary arrays returned during sampling in a cache that grows in blocks
+            of binary_cache_size batches.
         cache_margin
-            When only max(cache_margin, batch_size) positions in the binary cache remain empty, a new cache
-            of the same size is pre-allocated to continue buffering samples.
+            Has no effect since the binary cache grows by appending blocks, kept for backwards compatibility.
+        cache_max_bytes
+            If set, limits the size of the binary cache. When the cache is full, the samples drawn for anchors
+            pruned from the beam are evicted.
+        max_predict_batch
+            The samples drawn for all the anchors in a sampling round are labelled with a single predictor
+            call. If set, the samples are instead passed to the predictor in chunks of at most
+            max_predict_batch samples.
+        time_budget_s
+            If set, the anchor search stops after this number of seconds and returns the best anchor found
+            so far (see `AnchorBaseBeam.anchor_beam`).
+        max_predictor_calls
+            If set, the anchor search stops once the predictor has been called this number of times to label
+            samples and returns the best anchor found so far. Whether the search converged is reported in the
+            explanation metadata.
+        prediction_cache_size
+            If set, the predictions on the perturbed samples are cached in an LRU cache of this size, so
+            that the samples drawn repeatedly (e.g. for anchors that apply to few training data records)
+            are only predicted once. The hit rate is reported in the explanation metadata.
+        keep_prediction_cache
+            If True, the cached predictions are reused across explanations.
+        coverage_cache
+            If set, the coverage set (coverage_samples rows drawn from the training data) is drawn once and
+            reused by the subsequent explanations, which only binarise it for their instance instead of drawing
+            a new coverage set. If 'rows', only the indices of the training data rows are stored. If 'data',
+            the discretized rows are also stored in memory (coverage_samples x n_features values), so they are
+            not read from the (possibly memory-mapped) training data for each explanation.
+        coverage_refresh
+            If set with coverage_cache, a new coverage set is drawn every coverage_refresh explanations.
+        profile
+            If True, the time spent in each phase of the explanation (sampling, binarising and predicting samples,
+            KL-LUCB, proposing anchors, etc.), the number of samples processed in each phase and the growth of the
+            samples cache are recorded and reported in explanation.meta['stats']['profile']
+            (see `alibi.utils.profiling.Profiler`).
         verbose
             Display updates during the anchor search iterations.
         verbose_every
@@ -818,10 +1454,15 @@ class AnchorTabular(Explainer, FitMixin):
         for key in remove:
             params.pop(key)
 
+        profiler = Profiler() if profile else None
+        self._instrumented.reset()
         for sampler in self.samplers:
             sampler.set_instance_label(X)
             sampler.set_n_covered(n_covered_ex)
+            sampler.set_prediction_cache(prediction_cache_size, keep=keep_prediction_cache)
+            sampler.set_profiler(profiler)
         self.instance_label = self.samplers[0].instance_label
+        self._update_coverage_cache(coverage_samples, coverage_cache, coverage_refresh)
 
         # build feature encoding and mappings from the instance values to database rows where
         # similar records are found get anchors and add metadata
@@ -832,6 +1473,10 @@ class AnchorTabular(Explainer, FitMixin):
             samplers=self.samplers,
             sample_cache_size=binary_cache_size,
             cache_margin=cache_margin,
+            cache_max_bytes=cache_max_bytes,
+            max_predict_batch=max_predict_batch,
+            predictor_calls=self._get_predictor_calls,
+            profiler=profiler,
             **kwargs)
         result = mab.anchor_beam(
             delta=delta, epsilon=tau,
@@ -843,11 +1488,92 @@ class AnchorTabular(Explainer, FitMixin):
             coverage_samples=coverage_samples,
             verbose=verbose,
             verbose_every=verbose_every,
+            time_budget_s=time_budget_s,
+            max_predictor_calls=max_predictor_calls,
         )  # type: Any
         self.mab = mab
 
         return self.build_explanation(X, result, self.instance_label, params)
 
+    def explain_batch(self, X: np.ndarray, n_jobs: int = 1, coverage_samples: int = 10000,
+                      **kwargs: Any) -> List[Explanation]:
+        """
+        Explain the predictions made by the classifier on a batch of instances. The discretizer and the
+        training data index built by fit are shared by all the explanations and a single coverage set, drawn
+        once from the training data, is binarised for each instance.
+
+        Parameters
+        ----------
+        X
+            Instances to be explained.
+        n_jobs
+            Number of processes the instances are distributed to. If -1, all the available cores are used.
+            The explainer (including the predictor) is copied to each process, so it has to be picklable
+            unless processes are started with the 'fork' method.
+        coverage_samples
+            Number of samples in the shared coverage set.
+        **kwargs
+            Other arguments passed to explain.
+
+        Returns
+        -------
+        explanations
+            A list with an explanation for each instance, in the same order as X.
+        """
+
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        kwargs.update(coverage_samples=coverage_samples)
+
+        # the batch coverage set replaces the coverage set cached by previous explanations, if any
+        self._set_shared_coverage(coverage_samples)
+        self.coverage_cache = None
+        try:
+            if n_jobs == 1:
+                return [self.explain(x, **kwargs) for x in X]
+
+            # small chunks balance the load since the time needed to explain an instance varies
+            chunks = np.array_split(np.arange(X.shape[0]), min(4 * n_jobs, X.shape[0]))
+            with ProcessPoolExecutor(n_jobs, initializer=_init_batch_worker, initargs=(self, )) as pool:
+                chunk_explanations = pool.map(
+                    _explain_batch_chunk,
+                    [(chunk_idx, X[chunk], kwargs) for chunk_idx, chunk in enumerate(chunks)],
+                )
+
+                return [explanation for explanations in chunk_explanations for explanation in explanations]
+        finally:
+            self._set_shared_coverage(None)
+
+    def _set_shared_coverage(self, coverage_samples: int = None, store_data: bool = False) -> None:
+        """
+        Sets the coverage set shared by the explanations (see TabularSampler.set_shared_coverage).
+        """
+
+        for sampler in self.samplers:
+            sampler.set_shared_coverage(coverage_samples, store_data=store_data)
+
+    def _update_coverage_cache(self, coverage_samples: int, mode: Optional[str], refresh: Optional[int]) -> None:
+        """
+        Draws the coverage set shared by the explanations if coverage sets are cached (see `explain`) and
+        the cached set was not drawn yet, was drawn with different settings or was used for refresh
+        explanations. Removes the cached set if coverage sets are not cached.
+        """
+
+        if mode is None:
+            if self.coverage_cache is not None:
+                self._set_shared_coverage(None)
+                self.coverage_cache = None
+            return
+        if mode not in ('rows', 'data'):
+            raise ValueError("coverage_cache should be None, 'rows' or 'data', got {}.".format(mode))
+
+        cache = self.coverage_cache
+        if cache is None or cache['mode'] != mode or cache['coverage_samples'] != coverage_samples or \
+                (refresh is not None and cache['n_explanations'] >= refresh):
+            self._set_shared_coverage(coverage_samples, store_data=mode == 'data')
+            cache = self.coverage_cache = {'mode': mode, 'coverage_samples': coverage_samples, 'n_explanations': 0}
+        cache['n_explanations'] += 1
+
     def build_explanation(self, X: np.ndarray, result: dict, predicted_label: int, params: dict) -> Explanation:
         """
         Preprocess search output and return an explanation object containing metdata
@@ -887,8 +1613,34 @@ class AnchorTabular(Explainer, FitMixin):
 
         # params passed to explain
         explanation.meta['params'].update(params)
+        # anchor search statistics
+        explanation.meta['stats'].update(self.mab.stats)
+        explanation.meta['stats'].update(self._get_prediction_cache_stats())
+        explanation.meta['stats']['predictor'] = self._get_predictor_stats()
         return explanation
 
+    def _get_predictor_stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics of the predictor calls made by the explanation (see InstrumentedPredictor.summary).
+        """
+
+        return self._instrumented.summary()
+
+    def _get_predictor_calls(self) -> int:
+        """
+        Returns the number of predictor calls made by the explanation so far. Calls served by the prediction
+        cache are not counted.
+        """
+
+        return self._get_predictor_stats()['calls']
+
+    def _get_prediction_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the prediction cache statistics summed over the samplers.
+        """
+
+        return merge_cache_stats([sampler.get_prediction_cache_stats() for sampler in self.samplers])
+
     def add_names_to_exp(self, explanation: dict) -> None:
         """
         Add feature names to explanation dictionary.
@@ -966,20 +1718,55 @@ class DistributedAnchorTabular(AnchorTabular):
         ray = ray  # set module as class variable to used only in this context
 
     def __init__(self, predictor: Callable, feature_names: list, categorical_names: dict = None,
-                 seed: int = None) -> None:
+                 seed: int = None, backend: str = 'ray') -> None:
+        """
+        Parameters
+        ----------
+        predictor, feature_names, categorical_names, seed
+            See superclass implementation.
+        backend
+            If 'ray', the samplers run as ray actors. If 'multiprocessing', the samplers run in local
+            processes started with the standard library and the training data is stored once in shared
+            memory, so ray is not required.
+        """
 
         super().__init__(predictor, feature_names, categorical_names, seed)
-        if not DistributedAnchorTabular.ray.is_initialized():
-            DistributedAnchorTabular.ray.init()
+        if backend == 'ray':
+            if not RAY_INSTALLED:
+                raise ImportError("ray is not installed. Use backend='multiprocessing' to sample in local "
+                                  "processes instead.")
+            self.backend = DistributedAnchorTabular.ray
+            if not self.backend.is_initialized():
+                self.backend.init()
+        elif backend == 'multiprocessing':
+            self.backend = MultiprocessingBackend()
+        else:
+            raise ValueError("Unknown backend {}. Accepted values are 'ray' and 'multiprocessing'.".format(backend))
+
+        self._store = None  # type: ArrayStore
+
+        # update metadata
+        self.meta['params'].update(backend=backend)
 
     def fit(self, train_data: np.ndarray, disc_perc: tuple = (25, 50, 75), **kwargs) -> "AnchorTabular":  # type: ignore
         """
         Creates a list of handles to parallel processes handles that are used for submitting sampling
-        tasks.
+        tasks. The training data, its discretized version and the index from feature values and bins to
+        training data rows are stored once and shared by the processes.
 
         Parameters
         ----------
-            See superclass implementation.
+            See superclass implementation. In addition, kwargs can contain:
+
+            - ncpu: number of sampling processes (default 2)
+            - storage: if 'shared_memory' or 'memmap', the data is stored in shared memory blocks or in
+              memory-mapped .npy files (see `alibi.utils.distributed.ArrayStore`), which the processes map
+              without copying it. This requires the processes to run on the same machine. By default, the
+              data is stored in the backend (ray object store or, for the 'multiprocessing' backend, shared
+              memory)
+            - storage_dir: the directory where the files are created for the 'memmap' storage
+            - chunk_size, sketch_size, disc_path, index_path: see superclass implementation. If the training data
+              is memory-mapped, the processes map the training data, discretized data and index files
         """
 
         try:
@@ -989,8 +1776,18 @@ class DistributedAnchorTabular(AnchorTabular):
                             'expected argument, ncpu. Defaulting to ncpu=2!')
             ncpu = 2
 
-        disc = Discretizer(train_data, self.numerical_features, self.feature_names, percentiles=disc_perc)
-        d_train_data = disc.discretize(train_data)
+        train_data, out_of_core_paths = self._load_train_data(train_data, **kwargs)
+        if out_of_core_paths is not None and not (train_data.flags.c_contiguous or train_data.flags.f_contiguous):
+            raise ValueError("Memory-mapped training data must be contiguous to be shared by the processes, e.g. "
+                             "a slice of rows of a memory-mapped array.")
+        disc_path, index_path = out_of_core_paths or (None, None)
+        disc, d_train_data = self._fit_discretizer(
+            train_data,
+            disc_perc,
+            chunk_size=kwargs.get('chunk_size', OUT_OF_CORE_CHUNK_SIZE if out_of_core_paths else None),
+            sketch_size=kwargs.get('sketch_size', 2048),
+            disc_path=disc_path,
+        )
 
         self.feature_values.update(disc.feature_intervals)
 
@@ -1002,17 +1799,43 @@ class DistributedAnchorTabular(AnchorTabular):
             self.feature_names,
             self.feature_values,
         )
-        train_data_id = DistributedAnchorTabular.ray.put(train_data)
-        d_train_data_id = DistributedAnchorTabular.ray.put(d_train_data)
+        if isinstance(self.backend, MultiprocessingBackend):
+            self.backend.shutdown()  # release the processes and data of a previous fit call
+        if self._store is not None:
+            self._store.release()
+            self._store = None
+        storage = kwargs.get('storage', None)
+        if out_of_core_paths is not None:
+            put = MemmapArray.from_memmap  # type: Callable[[np.ndarray], Any]
+        elif storage is None:
+            put = self.backend.put
+        else:
+            self._store = ArrayStore(storage, directory=kwargs.get('storage_dir', None))
+            put = self._store.put
+
+        # build the index from feature values to training data rows once, so that the samplers share it
+        index_sampler = TabularSampler(*sampler_args)  # type: ignore
+        index_sampler._set_data(train_data, d_train_data)
+        if index_path is None:
+            index_rows, index_offsets = TabularSampler.pack_data_index(index_sampler._get_bin_index())
+        else:
+            index_rows, index_offsets = index_sampler.write_data_index(index_path)
+        del index_sampler
+
+        train_data_id = put(train_data)
+        d_train_data_id = put(d_train_data)
+        index_rows_id = put(index_rows)
         samplers = [TabularSampler(*sampler_args, seed=self.seed) for _ in range(ncpu)]  # type: ignore
         d_samplers = []
         for sampler in samplers:
+            sampler.disc = disc
             d_samplers.append(
-                DistributedAnchorTabular.ray.remote(RemoteSampler).remote(
-                    *(train_data_id, d_train_data_id, sampler)
+                self.backend.remote(RemoteSampler).remote(
+                    *(train_data_id, d_train_data_id, sampler, index_rows_id, index_offsets)
                 )
             )
         self.samplers = d_samplers
+        self.coverage_cache = None
 
         # update metadata
         self.meta['params'].update(disc_perc=disc_perc)
@@ -1030,7 +1853,55 @@ class DistributedAnchorTabular(AnchorTabular):
         """
 
         lookups = [sampler.build_lookups.remote(X) for sampler in self.samplers][0]
-        self.cat_lookup, self.ord_lookup, self.enc2feat_idx = DistributedAnchorTabular.ray.get(lookups)
+        self.cat_lookup, self.ord_lookup, self.enc2feat_idx = self.backend.get(lookups)
+
+    def _set_shared_coverage(self, coverage_samples: int = None, store_data: bool = False) -> None:
+        """
+        See superclass documentation.
+        """
+
+        self.backend.get(
+            [sampler.set_shared_coverage.remote(coverage_samples, store_data=store_data) for sampler in self.samplers]
+        )
+
+    def _get_predictor_stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics of the predictor calls made by the samplers, summed over the processes.
+        """
+
+        stats = InstrumentedPredictor(None, record_shapes=self._instrumented.record_shapes)
+        for summary in self.backend.get([sampler.get_predictor_stats.remote() for sampler in self.samplers]):
+            stats.merge(summary)
+
+        return stats.summary()
+
+    def _get_prediction_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        See superclass documentation.
+        """
+
+        stats = self.backend.get([sampler.get_prediction_cache_stats.remote() for sampler in self.samplers])
+
+        return merge_cache_stats(stats)
+
+    def explain_batch(self, X: np.ndarray, n_jobs: int = 1, coverage_samples: int = 10000,
+                      **kwargs: Any) -> List[Explanation]:
+        """
+        Explains a batch of instances one at a time, sampling in parallel for each instance.
+
+        Parameters
+        ----------
+            See superclass implementation. Since sampling is already distributed, n_jobs is ignored.
+
+        Returns
+        -------
+            See superclass implementation.
+        """
+
+        if n_jobs != 1:
+            logging.warning('DistributedAnchorTabular samples in parallel for each instance, n_jobs is ignored.')
+
+        return super().explain_batch(X, n_jobs=1, coverage_samples=coverage_samples, **kwargs)
 
     def explain(self,
                 X: np.ndarray,
@@ -1046,6 +1917,15 @@ class DistributedAnchorTabular(AnchorTabular):
                 n_covered_ex: int = 10,
                 binary_cache_size: int = 10000,
                 cache_margin: int = 1000,
+                cache_max_bytes: int = None,
+                max_predict_batch: int = None,
+                time_budget_s: float = None,
+                max_predictor_calls: int = None,
+                prediction_cache_size: int = None,
+                keep_prediction_cache: bool = False,
+                coverage_cache: str = None,
+                coverage_refresh: int = None,
+                profile: bool = False,
                 verbose: bool = False,
                 verbose_every: int = 1,
                 **kwargs: Any) -> Explanation:
@@ -1067,11 +1947,17 @@ class DistributedAnchorTabular(AnchorTabular):
         for key in remove:
             params.pop(key)
 
+        profiler = Profiler() if profile else None
         for sampler in self.samplers:
+            sampler.reset_predictor_stats.remote()
             label = sampler.set_instance_label.remote(X)
             sampler.set_n_covered.remote(n_covered_ex)
+            sampler.set_prediction_cache.remote(prediction_cache_size, keep=keep_prediction_cache)
+            # each process profiles its sampler, the profiles are merged after the search
+            sampler.set_profiler.remote(Profiler() if profile else None)
 
-        self.instance_label = DistributedAnchorTabular.ray.get(label)
+        self.instance_label = self.backend.get(label)
+        self._update_coverage_cache(coverage_samples, coverage_cache, coverage_refresh)
 
         # build feature encoding and mappings from the instance values to database rows where similar records are found
         # get anchors and add metadata
@@ -1080,6 +1966,11 @@ class DistributedAnchorTabular(AnchorTabular):
             samplers=self.samplers,
             sample_cache_size=binary_cache_size,
             cache_margin=cache_margin,
+            cache_max_bytes=cache_max_bytes,
+            max_predict_batch=max_predict_batch,
+            predictor_calls=self._get_predictor_calls,
+            backend=self.backend,
+            profiler=profiler,
             **kwargs,
         )
         result = mab.anchor_beam(
@@ -1092,7 +1983,12 @@ class DistributedAnchorTabular(AnchorTabular):
             coverage_samples=coverage_samples,
             verbose=verbose,
             verbose_every=verbose_every,
+            time_budget_s=time_budget_s,
+            max_predictor_calls=max_predictor_calls,
         )  # type: Any
         self.mab = mab
+        if profiler is not None:
+            for summary in self.backend.get([sampler.get_profile.remote() for sampler in self.samplers]):
+                profiler.merge(summary)
 
         return self.build_explanation(X, result, self.instance_label, params)
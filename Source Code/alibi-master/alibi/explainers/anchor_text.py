@@ -1,13 +1,15 @@
 import copy
+import json
 import logging
 import numpy as np
 from typing import Any, Callable, Dict, List, Tuple, TYPE_CHECKING, Union
 
-from alibi.utils.wrappers import ArgmaxTransformer
+from alibi.utils.cache import PersistentCache
+from alibi.utils.wrappers import ArgmaxTransformer, instrument
 
 from alibi.api.interfaces import Explainer, Explanation
 from alibi.api.defaults import DEFAULT_META_ANCHOR, DEFAULT_DATA_ANCHOR
-from .anchor_base import AnchorBaseBeam
+from .anchor_base import AnchorBaseBeam, batch_compare_labels
 from .anchor_explanation import AnchorExplanation
 
 if TYPE_CHECKING:
@@ -18,7 +20,8 @@ logger = logging.getLogger(__name__)
 
 class Neighbors(object):
 
-    def __init__(self, nlp_obj: 'spacy.language.Language', n_similar: int = 500, w_prob: float = -15.) -> None:
+    def __init__(self, nlp_obj: 'spacy.language.Language', n_similar: int = 500, w_prob: float = -15.,
+                 cache: PersistentCache = None) -> None:
         """
         Initialize class identifying neighbouring words from the embedding for a given word.
 
@@ -30,14 +33,72 @@ class Neighbors(object):
             Number of similar words to return.
         w_prob
             Smoothed log probability estimate of token's type.
+        cache
+            Optional persistent cache storing the neighbours of the words that were queried, so that they are
+            reused across processes and runs. The entries are keyed by the spaCy model name and version and by
+            the neighbour search parameters.
         """
 
         self.nlp = nlp_obj
+        self.cache = cache
         self.w_prob = w_prob
         # list with spaCy lexemes in vocabulary
         self.to_check = [w for w in self.nlp.vocab if w.prob >= self.w_prob and w.has_vector]
         self.n_similar = n_similar
 
+        # normalised embeddings of the lexemes, so the cosine similarities of a word to all the lexemes
+        # are a single matrix-vector product
+        vectors = np.array([w.vector for w in self.to_check], dtype=np.float32)
+        if self.to_check:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+        self.vectors = vectors
+        self.is_lower = np.array([w.is_lower for w in self.to_check], dtype=bool)
+        # text and part of speech tag of each lexeme, computed the first time the lexeme is a candidate neighbour
+        self.texts = np.full(len(self.to_check), None, dtype=object)
+        self.tags = np.full(len(self.to_check), None, dtype=object)
+
+        meta = getattr(self.nlp, 'meta', None) or {}
+        model = '{}_{}-{}'.format(meta.get('lang', ''), meta.get('name', ''), meta.get('version', ''))
+        self._cache_prefix = json.dumps([model, self.n_similar, self.w_prob, len(self.to_check)])
+
+    def _set_tags(self, idx: np.ndarray) -> None:
+        """
+        Computes the text and tag of the lexemes with indices idx in `to_check` that have not been tagged yet.
+        """
+
+        missing = [i for i in idx if self.tags[i] is None]
+        for i, doc in zip(missing, self.nlp.pipe([self.to_check[i].orth_ for i in missing])):
+            self.texts[i], self.tags[i] = doc[0].text, doc[0].tag_
+
+    def _most_similar(self, word_vocab: 'spacy.lexeme.Lexeme') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the n_similar lexemes in `to_check` that are most similar to a word and have the same case.
+
+        Returns
+        -------
+        idx
+            Indices of the lexemes in `to_check`, by decreasing similarity.
+        similarities
+            Cosine similarities of the lexemes to the word.
+        """
+
+        candidates = np.nonzero(self.is_lower == word_vocab.is_lower)[0]
+        if candidates.size == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+        vector = np.asarray(word_vocab.vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            similarities = (self.vectors @ (vector / norm))[candidates]
+        else:
+            similarities = np.zeros(candidates.shape[0], dtype=np.float32)
+
+        n_similar = min(self.n_similar, candidates.shape[0])
+        top = np.argpartition(-similarities, n_similar - 1)[:n_similar]
+        # ties are ordered like the lexemes in to_check
+        top = top[np.lexsort((top, -similarities[top]))]
+
+        return candidates[top], similarities[top]
+
     def neighbors(self, word: str, tag: str, top_n: int) -> dict:
         """
         Find similar words for a certain word in the vocabulary.
@@ -58,27 +119,56 @@ class Neighbors(object):
         a numpy array with corresponding word similarities.
         """
 
+        if self.cache is None:
+            return self._find_neighbors(word, tag, top_n)
+
+        key = '{}|{}'.format(self._cache_prefix, json.dumps([word, tag, top_n]))
+        cached = self.cache.get(key)
+        if cached is not None:
+            value = json.loads(cached.decode())
+            return {
+                'words': np.array(value['words']),
+                'similarities': np.array(value['similarities'], dtype=np.float32 if value['words'] else None),
+            }
+
+        neighbors = self._find_neighbors(word, tag, top_n)
+        payload = json.dumps({
+            'words': neighbors['words'].tolist(),
+            'similarities': neighbors['similarities'].tolist(),
+        })
+        self.cache.put(key, payload.encode())
+
+        return neighbors
+
+    def _find_neighbors(self, word: str, tag: str, top_n: int) -> dict:
+        """
+        Searches the embedding for the neighbours of a word, see `neighbors`.
+        """
+
         # the word itself is excluded so we add one to return the expected number of words
         top_n += 1
 
         texts, similarities = [], []  # type: List, List
         if word in self.nlp.vocab:
             word_vocab = self.nlp.vocab[word]
-            queries = [w for w in self.to_check if w.is_lower == word_vocab.is_lower]
-            if word_vocab.prob < self.w_prob:
-                queries += [word_vocab]
-            by_similarity = sorted(queries, key=lambda w: word_vocab.similarity(w), reverse=True)[:self.n_similar]
+            by_similarity, lexeme_similarities = self._most_similar(word_vocab)
 
-            # Find similar words with the same part of speech
-            for lexeme in by_similarity:
+            # Find similar words with the same part of speech. The lexemes are tagged in blocks, in order of
+            # similarity, until enough words are found
+            block_size = max(2 * top_n, 32)
+            for start in range(0, by_similarity.shape[0], block_size):
                 # because we don't add the word itself anymore
                 if len(texts) == top_n - 1:
                     break
-                token = self.nlp(lexeme.orth_)[0]
-                if token.tag_ != tag or token.text == word:
-                    continue
-                texts.append(token.text)
-                similarities.append(word_vocab.similarity(lexeme))
+                block = by_similarity[start:start + block_size]
+                self._set_tags(block)
+                for i, similarity in zip(block, lexeme_similarities[start:start + block_size]):
+                    if len(texts) == top_n - 1:
+                        break
+                    if self.tags[i] != tag or self.texts[i] == word:
+                        continue
+                    texts.append(self.texts[i])
+                    similarities.append(similarity)
 
         return {
             'words': np.array(texts),
@@ -89,7 +179,9 @@ class Neighbors(object):
 class AnchorText(Explainer):
     UNK = 'UNK'
 
-    def __init__(self, nlp: 'spacy.language.Language', predictor: Callable, seed: int = None) -> None:
+    def __init__(self, nlp: 'spacy.language.Language', predictor: Callable, seed: int = None,
+                 neighbors_cache: Union[str, PersistentCache] = None,
+                 word_ids: Callable[[List[str]], np.ndarray] = None) -> None:
         """
         Initialize anchor text explainer.
 
@@ -101,25 +193,52 @@ class AnchorText(Explainer):
             A callable that takes a tensor of N data points as inputs and returns N outputs.
         seed
             If set, ensures identical random streams.
+        neighbors_cache
+            Path of a sqlite file or `alibi.utils.cache.PersistentCache` in which the similar words found for
+            the instances explained with `use_unk=False` are stored, so they are not searched again by later
+            explanations, other processes or later runs using the same spaCy model.
+        word_ids
+            If set, the predictor is called with token ids instead of text, so the perturbed sentences are
+            never built. word_ids maps a list of words to the ids expected by the predictor and is called once
+            per explanation on the vocabulary of the perturbed samples (the words of the instance, UNK and the
+            similar words). The predictor then receives an int32 array of shape (N, number of tokens).
         """
         super().__init__(meta=copy.deepcopy(DEFAULT_META_ANCHOR))
         np.random.seed(seed)
 
         self.nlp = nlp
+        self.word_ids = word_ids
 
         # check if predictor returns predicted class or prediction probabilities for each class
         # if needed adjust predictor so it returns the predicted class
-        if np.argmax(predictor(['Hello world']).shape) == 0:
-            self.predictor = predictor
+        # records the predictor calls made by the explanations
+        self._instrumented = instrument(predictor)
+        example = ['Hello world'] if word_ids is None else self._to_ids(['Hello', 'world'])[np.newaxis]
+        if np.argmax(self._instrumented(example).shape) == 0:
+            self.predictor = self._instrumented  # type: Callable
         else:
-            self.predictor = ArgmaxTransformer(predictor)
+            self.predictor = ArgmaxTransformer(self._instrumented)
 
-        self.neighbors = Neighbors(self.nlp)
+        if isinstance(neighbors_cache, str):
+            neighbors_cache = PersistentCache(neighbors_cache)
+        self.neighbors = Neighbors(self.nlp, cache=neighbors_cache)
         self.tokens, self.words, self.positions, self.punctuation = [], [], [], []  # type: List, List, List, List
         # dict containing an np.array of similar words with same part of speech and an np.array of similarities
         self.neighbours = {}  # type: Dict[str, Dict[str, np.ndarray]]
         # the method used to generate samples
         self.perturbation = None  # type: Callable
+        # the perturbed samples are int32 matrices of indices in the vocabulary table
+        self.vocab = np.array([], dtype=object)  # type: np.ndarray
+        self.vocab_ids = None  # type: np.ndarray
+        # indices in the vocabulary table of the similar words of each word
+        self.neighbour_ids = {}  # type: Dict[str, np.ndarray]
+
+    def _to_ids(self, words: List[str]) -> np.ndarray:
+        """
+        Maps words to the token ids expected by the predictor, see `word_ids`.
+        """
+
+        return np.asarray(self.word_ids(words), dtype=np.int32)
 
     def set_words_and_pos(self, text: str) -> None:
         """
@@ -138,8 +257,9 @@ class AnchorText(Explainer):
         self.punctuation = [x for x in processed if x.is_punct]
         self.tokens = processed
 
-    def sampler(self, anchor: Tuple[int, tuple], num_samples: int, compute_labels: bool = True) -> \
-            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray]]:
+    def sampler(self, anchor: Union[Tuple[int, tuple], List[Tuple[int, tuple]]], num_samples: int,
+                compute_labels: bool = True, max_predict_batch: int = None) -> \
+            Union[List[Union[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float, int]], List[np.ndarray], List]:
         """
         Generate perturbed samples while maintaining features in positions specified in
         anchor unchanged.
@@ -149,11 +269,16 @@ class AnchorText(Explainer):
         anchor
             int: the position of the anchor in the input batch
             tuple: the anchor itself, a list of words to be kept unchanged
+            If a list of anchors is passed, samples are generated for each anchor and the
+            predictor is called on the samples generated for all anchors at once.
         num_samples
             Number of generated perturbed samples.
         compute_labels
             If True, an array of comparisons between predictions on perturbed samples and
             instance to be explained is returned.
+        max_predict_batch
+            If a list of anchors is passed, the maximum number of samples passed to the
+            predictor in one call.
 
         Returns
         -------
@@ -168,20 +293,42 @@ class AnchorText(Explainer):
                      perturbed for each sample
              - 1.0: indicates exact coverage is not computed for this algorithm
              - anchor[0]: position of anchor in the batch request
-            Otherwise, a list containing the data matrix only is returned.
+            Otherwise, a list containing the data matrix only is returned. If a list of anchors
+            is passed, a list with the above for each anchor is returned.
         """
 
+        if isinstance(anchor, list):
+            if not compute_labels:
+                return [self.sampler(single_anchor, num_samples, compute_labels=False) for single_anchor in anchor]
+            samples = [self.perturbation(single_anchor[1], num_samples) for single_anchor in anchor]
+            labels_batch = batch_compare_labels(self.compare_token_ids, [s[0] for s in samples], max_predict_batch)
+            return [self._build_samples_result(single_anchor, raw_data, labels, data)
+                    for single_anchor, (raw_data, data), labels in zip(anchor, samples, labels_batch)]
+
         raw_data, data = self.perturbation(anchor[1], num_samples)
         # create labels using model predictions as true labels
         if compute_labels:
-            labels = self.compare_labels(raw_data)
-            covered_true = raw_data[labels][:self.n_covered_ex]
-            covered_false = raw_data[np.logical_not(labels)][:self.n_covered_ex]
-            # coverage set to -1.0 as we can't compute 'true'coverage for this model
-            return [covered_true, covered_false, labels.astype(int), data, -1.0, anchor[0]]
+            labels = self.compare_token_ids(raw_data)
+            return self._build_samples_result(anchor, raw_data, labels, data)
         else:
             return [data]
 
+    def _build_samples_result(self, anchor: Tuple[int, tuple], raw_data: np.ndarray, labels: np.ndarray,
+                              data: np.ndarray) -> List:
+        """
+        Builds the list returned by the sampler when compute_labels=True from the samples generated
+        for an anchor and the comparisons between the predictions on the samples and the instance label.
+        Only the sentences of the returned examples are built from the token ids.
+        """
+
+        covered_true = np.array(self.join_token_ids(raw_data[labels][:self.n_covered_ex]), dtype=self.dtype)
+        covered_false = np.array(
+            self.join_token_ids(raw_data[np.logical_not(labels)][:self.n_covered_ex]), dtype=self.dtype
+        )
+        # coverage set to -1.0 as we can't compute 'true'coverage for this model
+
+        return [covered_true, covered_false, labels.astype(int), data, -1.0, anchor[0]]
+
     def compare_labels(self, samples: np.ndarray) -> np.ndarray:
         """
         Compute the agreement between a classifier prediction on an instance to be explained
@@ -200,6 +347,70 @@ class AnchorText(Explainer):
 
         return self.predictor(samples.tolist()) == self.instance_label
 
+    def compare_token_ids(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Same as `compare_labels` for samples represented by the indices of their tokens in the vocabulary
+        table. The sentences are only built if the predictor does not take token ids, see `word_ids`.
+
+        Parameters
+        ----------
+        samples
+            An int32 array of shape (N, number of tokens) with the indices in `vocab` of the tokens of the
+            samples.
+
+        Returns
+        -------
+            A boolean array indicating whether the prediction was the same as the instance label.
+        """
+
+        if self.word_ids is not None:
+            return self.predictor(self.vocab_ids[samples]) == self.instance_label
+
+        return self.predictor(self.join_token_ids(samples)) == self.instance_label
+
+    def join_token_ids(self, samples: np.ndarray) -> List[str]:
+        """
+        Builds the sentences of samples represented by the indices of their tokens in the vocabulary table.
+
+        Parameters
+        ----------
+        samples
+            An int32 array of shape (N, number of tokens).
+
+        Returns
+        -------
+            A list with the N sentences.
+        """
+
+        return [' '.join(row) for row in self.vocab[samples].tolist()]
+
+    def set_vocab(self, use_unk: bool) -> None:
+        """
+        Builds the vocabulary table of the perturbed samples: the tokens of the instance to be explained,
+        followed by UNK if use_unk is True or by the similar words of each word otherwise.
+
+        Parameters
+        ----------
+        use_unk
+            See explain method.
+        """
+
+        vocab = list(self.words)
+        self.neighbour_ids = {}
+        if use_unk:
+            vocab.append(self.UNK)
+        else:
+            for word in self.words:
+                if word in self.neighbour_ids:
+                    continue
+                similar_words = self.neighbours[word]['words'].tolist()
+                self.neighbour_ids[word] = np.arange(len(vocab), len(vocab) + len(similar_words), dtype=np.int32)
+                vocab.extend(similar_words)
+        self.vocab = np.empty(len(vocab), dtype=object)
+        self.vocab[:] = vocab
+        if self.word_ids is not None:
+            self.vocab_ids = self._to_ids(vocab)
+
     def set_sampler_perturbation(self, use_unk: bool, perturb_opts: dict) -> None:
         """
         Initialises the explainer by setting the perturbation function and
@@ -229,11 +440,14 @@ class AnchorText(Explainer):
         self.perturb_opts = perturb_opts
         self.sample_proba = perturb_opts['sample_proba']
 
+        if self.neighbors.cache is not None:
+            self.neighbors.cache.reset_stats()
         if use_unk:
             self.perturbation = self._unk
         else:
             self.find_similar_words()
             self.perturbation = self._similarity
+        self.set_vocab(use_unk)
 
     def _unk(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -250,17 +464,18 @@ class AnchorText(Explainer):
         Returns
         -------
         raw
-            Array containing num_samples elements. Each element is a perturbed sentence.
+            A (num_samples, m)-dimensional int32 array, where m is the number of tokens in the
+            instance to be explained, with the indices in `vocab` of the tokens of each perturbed
+            sentence.
         data
-            A (num_samples, m)-dimensional boolean array, where m is the number of tokens
-            in the instance to be explained.
+            A (num_samples, m)-dimensional boolean array, indicating whether each token was kept.
         """
 
         words = self.words
         data = np.ones((num_samples, len(words)))
-        raw = np.zeros((num_samples, len(words)), self.dtype)
-        # fill each row of the raw data matrix with the text instance to be explained
-        raw[:] = words
+        # fill each row with the token ids of the text instance to be explained
+        raw = np.tile(np.arange(len(words), dtype=np.int32), (num_samples, 1))
+        unk = len(words)  # UNK follows the words of the instance in the vocabulary table
 
         for i, t in enumerate(words):
 
@@ -270,11 +485,9 @@ class AnchorText(Explainer):
             # sample the words in the text outside of the anchor that are replaced with UNKs
             n_changed = np.random.binomial(num_samples, self.sample_proba)
             changed = np.random.choice(num_samples, n_changed, replace=False)
-            raw[changed, i] = AnchorText.UNK
+            raw[changed, i] = unk
             data[changed, i] = 0
 
-        raw = np.apply_along_axis(self._joiner, axis=1, arr=raw, dtype=self.dtype)
-
         return raw, data
 
     def _similarity(self, anchor: tuple, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
@@ -294,7 +507,7 @@ class AnchorText(Explainer):
         -------
             see _unk method
         """
-        return self.perturb_sentence(
+        return self.perturb_sentence_ids(
             anchor,
             num_samples,
             **self.perturb_opts,
@@ -328,7 +541,33 @@ class AnchorText(Explainer):
                          pos: frozenset = frozenset(['NOUN', 'VERB', 'ADJ', 'ADV', 'ADP', 'DET']),
                          use_similarity_proba: bool = True, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Perturb the text instance to be explained.
+        Perturb the text instance to be explained. See `perturb_sentence_ids` for the parameters.
+
+        Returns
+        -------
+        raw_data
+            Array of perturbed text instances.
+        data
+            Matrix with 1s and 0s indicating whether a word in the text
+            has not been perturbed for each sample.
+        """
+
+        raw, data = self.perturb_sentence_ids(
+            present, n, sample_proba=sample_proba, forbidden=forbidden, forbidden_tags=forbidden_tags,
+            forbidden_words=forbidden_words, temperature=temperature, pos=pos,
+            use_similarity_proba=use_similarity_proba, **kwargs
+        )
+
+        return np.array(self.join_token_ids(raw), dtype=self.dtype), data
+
+    def perturb_sentence_ids(self, present: tuple, n: int, sample_proba: float = 0.5,
+                             forbidden: frozenset = frozenset(), forbidden_tags: frozenset = frozenset(['PRP$']),
+                             forbidden_words: frozenset = frozenset(['be']), temperature: float = 1.,
+                             pos: frozenset = frozenset(['NOUN', 'VERB', 'ADJ', 'ADV', 'ADP', 'DET']),
+                             use_similarity_proba: bool = True, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Perturb the text instance to be explained. The perturbed sentences are represented by the indices
+        of their tokens in the vocabulary table `vocab`.
 
         Parameters
         ----------
@@ -355,16 +594,15 @@ class AnchorText(Explainer):
         Returns
         -------
         raw_data
-            Array of perturbed text instances.
+            An int32 array of shape (n, number of tokens) with the indices in `vocab` of the tokens of
+            the perturbed text instances.
         data
             Matrix with 1s and 0s indicating whether a word in the text
             has not been perturbed for each sample.
         """
 
-        raw = np.zeros((n, len(self.tokens)), self.dtype)
+        raw = np.tile(np.arange(len(self.tokens), dtype=np.int32), (n, 1))
         data = np.ones((n, len(self.tokens)))
-        # fill each row of the raw data matrix with the text to be explained
-        raw[:] = [x.text for x in self.tokens]
 
         for i, t in enumerate(self.tokens):  # apply sampling to each token
 
@@ -375,7 +613,7 @@ class AnchorText(Explainer):
             if (t.text not in forbidden_words and t.pos_ in pos and
                     t.lemma_ not in forbidden and t.tag_ not in forbidden_tags):
 
-                t_neighbors = self.neighbours[t.text]['words']
+                t_neighbors = self.neighbour_ids[t.text]
                 # no neighbours with the same tag or word not in spaCy vocabulary
                 if t_neighbors.size == 0:
                     continue
@@ -393,7 +631,6 @@ class AnchorText(Explainer):
 
                 raw[changed, i] = np.random.choice(t_neighbors, n_changed, p=weights, replace=True)
                 data[changed, i] = 0
-        raw = np.apply_along_axis(self._joiner, axis=1, arr=raw, dtype=self.dtype)
 
         return raw, data
 
@@ -411,6 +648,8 @@ class AnchorText(Explainer):
                                                                  token.tag_,
                                                                  self.perturb_opts['top_n'],
                                                                  )
+        if self.neighbors.cache is not None:
+            self.neighbors.cache.flush()
 
     def set_data_type(self, use_unk: bool) -> None:
         """
@@ -437,7 +676,8 @@ class AnchorText(Explainer):
                 max_len = max(max_len, int(similar_words.dtype.itemsize /
                                            np.dtype(similar_words.dtype.char + '1').itemsize))
                 max_sent_len += max_len
-        self.dtype = '<U' + str(max_sent_len)
+        # the words are separated by spaces
+        self.dtype = '<U' + str(max_sent_len + len(self.words))
 
     def explain(self,  # type: ignore
                 text: str,
@@ -458,6 +698,10 @@ class AnchorText(Explainer):
                 n_covered_ex: int = 10,
                 binary_cache_size: int = 10000,
                 cache_margin: int = 1000,
+                cache_max_bytes: int = None,
+                max_predict_batch: int = None,
+                time_budget_s: float = None,
+                max_predictor_calls: int = None,
                 verbose: bool = False,
                 verbose_every: int = 1,
                 **kwargs: Any) -> Explanation:
@@ -503,11 +747,24 @@ class AnchorText(Explainer):
             How many examples where anchors apply to store for each anchor sampled during search
             (both examples where prediction on samples agrees/disagrees with predicted label are stored).
         binary_cache_size
-            The anchor search pre-allocates binary_cache_size batches for storing the boolean arrays
-            returned during sampling.
+            The anchor search stores the boolean arrays returned during sampling in a cache that grows in blocks
+            of binary_cache_size batches.
         cache_margin
-            When only max(cache_margin, batch_size) positions in the binary cache remain empty, a new cache
-            of the same size is pre-allocated to continue buffering samples.
+            Has no effect since the binary cache grows by appending blocks, kept for backwards compatibility.
+        cache_max_bytes
+            If set, limits the size of the binary cache. When the cache is full, the samples drawn for anchors
+            pruned from the beam are evicted.
+        max_predict_batch
+            The samples drawn for all the anchors in a sampling round are labelled with a single predictor
+            call. If set, the samples are instead passed to the predictor in chunks of at most
+            max_predict_batch samples.
+        time_budget_s
+            If set, the anchor search stops after this number of seconds and returns the best anchor found
+            so far (see `AnchorBaseBeam.anchor_beam`).
+        max_predictor_calls
+            If set, the anchor search stops once the predictor has been called this number of times to label
+            samples and returns the best anchor found so far. Whether the search converged is reported in the
+            explanation metadata.
         kwargs
             Other keyword arguments passed to the anchor beam search and the text sampling and perturbation functions.
         verbose
@@ -528,9 +785,13 @@ class AnchorText(Explainer):
 
         # store n_covered_ex positive/negative examples for each anchor
         self.n_covered_ex = n_covered_ex
-        self.instance_label = self.predictor([text])[0]
+        self._instrumented.reset()
         # find words and their positions in the text instance
         self.set_words_and_pos(text)
+        if self.word_ids is None:
+            self.instance_label = self.predictor([text])[0]
+        else:
+            self.instance_label = self.predictor(self._to_ids(self.words)[np.newaxis])[0]
 
         # set the sampling function and type for samples' arrays
         perturb_opts = {
@@ -548,6 +809,9 @@ class AnchorText(Explainer):
             samplers=[self.sampler],
             sample_cache_size=binary_cache_size,
             cache_margin=cache_margin,
+            cache_max_bytes=cache_max_bytes,
+            max_predict_batch=max_predict_batch,
+            predictor_calls=self._get_predictor_calls,
             **kwargs)
         result = mab.anchor_beam(
             delta=delta,
@@ -561,6 +825,8 @@ class AnchorText(Explainer):
             stop_on_first=stop_on_first,
             verbose=verbose,
             verbose_every=verbose_every,
+            time_budget_s=time_budget_s,
+            max_predictor_calls=max_predictor_calls,
             **kwargs,
         )  # type: Any
         result['names'] = [self.words[x] for x in result['feature']]
@@ -569,6 +835,13 @@ class AnchorText(Explainer):
 
         return self.build_explanation(text, result, self.instance_label, params)
 
+    def _get_predictor_calls(self) -> int:
+        """
+        Returns the number of predictor calls made by the explanation so far.
+        """
+
+        return self._instrumented.calls
+
     def build_explanation(self, text: str, result: dict, predicted_label: int, params: dict) -> Explanation:
         """ Uses the metadata returned by the anchor search algorithm together with
         the instance to be explained to build an explanation object.
@@ -601,4 +874,11 @@ class AnchorText(Explainer):
 
         # params passed to explain
         explanation.meta['params'].update(params)
+        # anchor search statistics
+        explanation.meta['stats'].update(self.mab.stats)
+        if self.neighbors.cache is not None:
+            explanation.meta['stats'].update(
+                {'neighbors_cache_{}'.format(key): value for key, value in self.neighbors.cache.stats.items()}
+            )
+        explanation.meta['stats']['predictor'] = self._instrumented.summary()
         return explanation
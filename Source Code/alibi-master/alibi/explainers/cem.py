@@ -8,6 +8,7 @@ import sys
 import tensorflow as tf
 from typing import Callable, Tuple, Union, TYPE_CHECKING
 from alibi.utils.tf import _check_keras_or_tf
+from alibi.utils.wrappers import instrument
 
 if TYPE_CHECKING:  # pragma: no cover
     import keras
@@ -91,10 +92,12 @@ class CEM(Explainer, FitMixin):
         for key in remove:
             params.pop(key)
         self.meta['params'].update(params)
-        self.predict = predict
 
         # check whether the model and the auto-encoder are Keras or TF models and get session
         is_model, is_model_keras, model_sess = _check_keras_or_tf(predict)
+        self.predict = predict
+        # the calls to black-box predictors are recorded, models are evaluated in the TensorFlow graph
+        self._instrumented = None if is_model else instrument(predict)
         is_ae, is_ae_keras, ae_sess = _check_keras_or_tf(ae_model)
         # TODO: check ae and model are compatible
         self.meta['params'].update(is_model=is_model, is_model_keras=is_model_keras, is_ae=is_ae,
@@ -111,7 +114,7 @@ class CEM(Explainer, FitMixin):
             classes = self.sess.run(self.predict(tf.convert_to_tensor(np.zeros(shape), dtype=tf.float32))).shape[1]
         else:
             self.model = False
-            classes = self.predict(np.zeros(shape)).shape[1]
+            classes = self._predict_black_box(np.zeros(shape)).shape[1]
 
         self.mode = mode
         self.shape = shape
@@ -392,6 +395,14 @@ class CEM(Explainer, FitMixin):
         X_pert_neg = np.reshape(X_pert_neg, shape)  # (N*F)x(shape of X[0])
         return X_pert_pos, X_pert_neg
 
+    def _predict_black_box(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts with the black-box predictor, through its instrumented wrapper so that the calls are
+        recorded in the explanation metadata.
+        """
+
+        return self.predict(X) if self._instrumented is None else self._instrumented(X)
+
     def get_gradients(self, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
         """
         Compute numerical gradients of the attack loss term:
@@ -410,7 +421,7 @@ class CEM(Explainer, FitMixin):
         """
         # N = gradient batch size; F = nb of features; P = nb of prediction classes; B = instance batch size
         # dL/dP -> BxP
-        preds = self.predict(X)  # NxP
+        preds = self._predict_black_box(X)  # NxP
         preds_pert_pos, preds_pert_neg = self.perturb(preds, self.eps[0], proba=True)  # (N*P)xP
 
         def f(preds_pert):
@@ -432,7 +443,7 @@ class CEM(Explainer, FitMixin):
         # dP/dx -> PxF
         X_pert_pos, X_pert_neg = self.perturb(X, self.eps[1], proba=False)  # (N*F)x(shape of X[0])
         X_pert = np.concatenate([X_pert_pos, X_pert_neg], axis=0)
-        preds_concat = self.predict(X_pert)
+        preds_concat = self._predict_black_box(X_pert)
         n_pert = X_pert_pos.shape[0]
         dp_dx = preds_concat[:n_pert] - preds_concat[n_pert:]  # (N*F)*P
         dp_dx = np.reshape(np.reshape(dp_dx, (X.shape[0], -1)),
@@ -585,7 +596,7 @@ class CEM(Explainer, FitMixin):
                         X_der = self.delta.eval(session=self.sess)
                     elif self.mode == "PN":
                         X_der = self.adv.eval(session=self.sess)
-                    pred_proba = self.predict(X_der)
+                    pred_proba = self._predict_black_box(X_der)
 
                     # compute attack, total and L1+L2 losses as well as new perturbed instance
                     loss_attack = self.loss_fn(pred_proba, Y)
@@ -679,12 +690,14 @@ class CEM(Explainer, FitMixin):
         if X.shape[0] != 1:
             logger.warning('Currently only single instance explanations supported (first dim = 1), '
                            'but first dim = %s', X.shape[0])
+        if self._instrumented is not None:
+            self._instrumented.reset()
 
         if Y is None:
             if self.model:
                 Y = self.sess.run(self.predict(tf.convert_to_tensor(X, dtype=tf.float32)))
             else:
-                Y = self.predict(X)
+                Y = self._predict_black_box(X)
             Y_ohe = np.zeros(Y.shape)
             Y_ohe[np.arange(Y.shape[0]), np.argmax(Y, axis=1)] = 1
             Y = Y_ohe.copy()
@@ -703,17 +716,21 @@ class CEM(Explainer, FitMixin):
 
             # create explanation object
             explanation = Explanation(meta=copy.deepcopy(self.meta), data=data)
+            if self._instrumented is not None:
+                explanation.meta['stats']['predictor'] = self._instrumented.summary()
             return explanation
 
         data[self.mode] = best_attack
         if self.model:
             Y_pert = self.sess.run(self.predict(tf.convert_to_tensor(best_attack, dtype=tf.float32)))
         else:
-            Y_pert = self.predict(best_attack)
+            Y_pert = self._predict_black_box(best_attack)
         data[self.mode + '_pred'] = np.argmax(Y_pert, axis=1)[0]
         data['grads_graph'], data['grads_num'] = grads[0], grads[1]
 
         # create explanation object
         explanation = Explanation(meta=copy.deepcopy(self.meta), data=data)
+        if self._instrumented is not None:
+            explanation.meta['stats']['predictor'] = self._instrumented.summary()
 
         return explanation
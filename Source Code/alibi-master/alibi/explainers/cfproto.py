@@ -15,6 +15,7 @@ from alibi.utils.distance import abdm, mvdm, multidim_scaling
 from alibi.utils.gradients import perturb
 from alibi.utils.mapping import ohe_to_ord_shape, ord_to_num, num_to_ord, ohe_to_ord, ord_to_ohe
 from alibi.utils.tf import _check_keras_or_tf, argmax_grad, argmin_grad, one_hot_grad, round_grad
+from alibi.utils.wrappers import instrument
 
 if TYPE_CHECKING:  # pragma: no cover
     import keras
@@ -108,10 +109,11 @@ class CounterFactualProto(Explainer, FitMixin):
             params.pop(key)
         self.meta['params'].update(params)
 
-        self.predict = predict
-
         # check whether the model, encoder and auto-encoder are Keras or TF models and get session
         is_model, is_model_keras, model_sess = _check_keras_or_tf(predict)
+        self.predict = predict
+        # the calls to black-box predictors are recorded, models are evaluated in the TensorFlow graph
+        self._instrumented = None if is_model else instrument(predict)
         is_ae, is_ae_keras, ae_sess = _check_keras_or_tf(ae_model)
         is_enc, is_enc_keras, enc_sess = _check_keras_or_tf(enc_model)
         self.meta['params'].update(is_model=is_model, is_model_keras=is_model_keras)
@@ -131,7 +133,7 @@ class CounterFactualProto(Explainer, FitMixin):
             self.classes = self.predict.predict(np.zeros(shape)).shape[1]  # type: ignore
         else:  # black-box model
             self.model = False
-            self.classes = self.predict(np.zeros(shape)).shape[1]
+            self.classes = self._predict_black_box(np.zeros(shape)).shape[1]
 
         if is_enc:
             self.enc_model = True
@@ -695,7 +697,7 @@ class CounterFactualProto(Explainer, FitMixin):
         if self.model:
             preds = np.argmax(self.predict.predict(train_data), axis=1)  # type: ignore
         else:
-            preds = np.argmax(self.predict(train_data), axis=1)
+            preds = np.argmax(self._predict_black_box(train_data), axis=1)
 
         self.cat_vars_ord = None
         if self.is_cat:  # compute distance metrics for categorical variables
@@ -821,6 +823,14 @@ class CounterFactualProto(Explainer, FitMixin):
         loss_attack = np.sum(self.const.eval(session=self.sess) * loss)
         return loss_attack
 
+    def _predict_black_box(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts with the black-box predictor, through its instrumented wrapper so that the calls are
+        recorded in the explanation metadata.
+        """
+
+        return self.predict(X) if self._instrumented is None else self._instrumented(X)
+
     def get_gradients(self, X: np.ndarray, Y: np.ndarray, grads_shape: tuple,
                       cat_vars_ord: dict = None) -> np.ndarray:
         """
@@ -853,7 +863,7 @@ class CounterFactualProto(Explainer, FitMixin):
 
         # N = gradient batch size; F = nb of features; P = nb of prediction classes; B = instance batch size
         # dL/dP -> BxP
-        preds = self.predict(X_pred)  # NxP
+        preds = self._predict_black_box(X_pred)  # NxP
         preds_pert_pos, preds_pert_neg = perturb(preds, self.eps[0], proba=True)  # (N*P)xP
 
         def f(preds_pert):
@@ -879,7 +889,7 @@ class CounterFactualProto(Explainer, FitMixin):
             X_pert = num_to_ord(X_pert, self.d_abs)
         if self.ohe:
             X_pert = ord_to_ohe(X_pert, cat_vars_ord)[0]
-        preds_concat = self.predict(X_pert)
+        preds_concat = self._predict_black_box(X_pert)
         n_pert = X_pert_pos.shape[0]
         dp_dx = preds_concat[:n_pert] - preds_concat[n_pert:]  # (N*F)*P
         dp_dx = np.reshape(np.reshape(dp_dx, (X.shape[0], -1)),
@@ -1138,7 +1148,7 @@ class CounterFactualProto(Explainer, FitMixin):
                         X_der = num_to_ord(X_der, self.d_abs)
                     if self.ohe:
                         X_der = ord_to_ohe(X_der, self.cat_vars_ord)[0]
-                    pred_proba = self.predict(X_der)
+                    pred_proba = self._predict_black_box(X_der)
 
                     # compute attack, total and L1+L2 losses as well as new perturbed instance
                     loss_attack = self.loss_fn(pred_proba, Y)
@@ -1300,6 +1310,8 @@ class CounterFactualProto(Explainer, FitMixin):
         if X.shape[0] != 1:
             logger.warning('Currently only single instance explanations supported (first dim = 1), '
                            'but first dim = %s', X.shape[0])
+        if self._instrumented is not None:
+            self._instrumented.reset()
 
         # output explanation dictionary
         data = copy.deepcopy(DEFAULT_DATA_CFP)
@@ -1308,7 +1320,7 @@ class CounterFactualProto(Explainer, FitMixin):
             if self.model:
                 Y_proba = self.predict.predict(X)  # type: ignore
             else:
-                Y_proba = self.predict(X)
+                Y_proba = self._predict_black_box(X)
             Y_ohe = np.zeros(Y_proba.shape)
             Y_class = np.argmax(Y_proba, axis=1)
             Y_ohe[np.arange(Y_proba.shape[0]), Y_class] = 1
@@ -1333,6 +1345,8 @@ class CounterFactualProto(Explainer, FitMixin):
 
             # create explanation object
             explanation = Explanation(meta=copy.deepcopy(self.meta), data=data)
+            if self._instrumented is not None:
+                explanation.meta['stats']['predictor'] = self._instrumented.summary()
             return explanation
 
         data['all'] = self.cf_global
@@ -1341,12 +1355,14 @@ class CounterFactualProto(Explainer, FitMixin):
         if self.model:
             Y_pert = self.predict.predict(best_attack)  # type: ignore
         else:
-            Y_pert = self.predict(best_attack)
+            Y_pert = self._predict_black_box(best_attack)
         data['cf']['class'] = np.argmax(Y_pert, axis=1)[0]
         data['cf']['proba'] = Y_pert
         data['cf']['grads_graph'], data['cf']['grads_num'] = grads[0], grads[1]
 
         # create explanation object
         explanation = Explanation(meta=copy.deepcopy(self.meta), data=data)
+        if self._instrumented is not None:
+            explanation.meta['stats']['predictor'] = self._instrumented.summary()
 
         return explanation
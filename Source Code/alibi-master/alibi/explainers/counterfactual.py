@@ -8,6 +8,7 @@ from alibi.api.interfaces import Explainer, Explanation
 from alibi.api.defaults import DEFAULT_META_CF, DEFAULT_DATA_CF
 from alibi.utils.gradients import num_grad_batch
 from alibi.utils.tf import _check_keras_or_tf
+from alibi.utils.wrappers import instrument
 
 if TYPE_CHECKING:  # pragma: no cover
     import keras  # noqa
@@ -176,7 +177,10 @@ class CounterFactual(Explainer):
             self.predict_tn = None
             self.model = False
 
-        self.n_classes = self.predict_fn(np.zeros(shape)).shape[1]
+        # the calls to black-box predictors are recorded, models are not (as in CEM and CounterFactualProto)
+        self._instrumented = None if is_model else instrument(predict_fn)
+
+        self.n_classes = self._predict_array(np.zeros(shape)).shape[1]
 
         # flag to keep track if explainer is fit or not
         self.fitted = False
@@ -277,6 +281,10 @@ class CounterFactual(Explainer):
         self.return_dict = copy.deepcopy(DEFAULT_DATA_CF)
         self.return_dict['all'] = {i: [] for i in range(self.max_lam_steps)}
 
+    def _predict_array(self, X: np.ndarray) -> np.ndarray:
+        # black-box predictions go through the instrumented wrapper so that the calls are recorded
+        return self.predict_fn(X) if self._instrumented is None else self._instrumented(X)
+
     def _initialize(self, X: np.ndarray) -> np.ndarray:
         # TODO initialization strategies ("same", "random", "from_train")
 
@@ -321,7 +329,9 @@ class CounterFactual(Explainer):
                            'but first dim = %s', X.shape[0])
 
         # make a prediction
-        Y = self.predict_fn(X)
+        if self._instrumented is not None:
+            self._instrumented.reset()
+        Y = self._predict_array(X)
 
         pred_class = Y.argmax(axis=1).item()
         pred_prob = Y.max(axis=1).item()
@@ -331,7 +341,7 @@ class CounterFactual(Explainer):
         logger.debug('Initial prediction: %s with p=%s', pred_class, pred_prob)
 
         # define the class-specific prediction function
-        self.predict_class_fn, t_class = _define_func(self.predict_fn, pred_class, self.target_class)
+        self.predict_class_fn, t_class = _define_func(self._predict_array, pred_class, self.target_class)
 
         # initialize with an instance
         X_init = self._initialize(X)
@@ -346,6 +356,8 @@ class CounterFactual(Explainer):
 
         # create explanation object
         explanation = Explanation(meta=copy.deepcopy(self.meta), data=return_dict)
+        if self._instrumented is not None:
+            explanation.meta['stats']['predictor'] = self._instrumented.summary()
 
         return explanation
 
@@ -362,7 +374,7 @@ class CounterFactual(Explainer):
         self.instance_dict['lambda'] = lam[0]
         self.instance_dict['index'] = l_step * self.max_iter + i
 
-        preds = self.predict_fn(X_current)
+        preds = self._predict_array(X_current)
         pred_class = preds.argmax()
         proba = preds.max()
         self.instance_dict['class'] = pred_class
@@ -1,5 +1,6 @@
 import copy
 import logging
+import os
 import shap
 
 import numpy as np
@@ -7,10 +8,11 @@ import pandas as pd
 
 from alibi.api.defaults import DEFAULT_META_SHAP, DEFAULT_DATA_SHAP
 from alibi.api.interfaces import Explanation, Explainer, FitMixin
+from concurrent.futures import ProcessPoolExecutor
 from scipy import sparse
 from shap.common import DenseData, DenseDataWithIndex
-from typing import Callable, Dict, List, Optional, Sequence, Union, Tuple
-from alibi.utils.wrappers import methdispatch
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union, Tuple
+from alibi.utils.wrappers import instrument, methdispatch
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,90 @@ SHAP_PARAMS = [
 BACKGROUND_WARNING_THRESHOLD = 300
 
 
+# explainer used by the processes of the KernelShap.explain pool
+_pool_explainer = None  # type: KernelShap
+
+
+def _init_explain_worker(explainer: "KernelShap") -> None:
+    """
+    Stores the fitted explainer, including the background data, in the worker process so that it is transferred
+    once per process instead of once per chunk. Workers draw a different random number sequence unless the
+    explainer is seeded, in which case each chunk is explained with a seed determined by its position.
+    """
+
+    global _pool_explainer
+    _pool_explainer = explainer
+    np.random.seed(None)
+
+
+def _seeded_shap_values(explainer: "KernelShap", chunk: Tuple[int, Any, dict]) \
+        -> Union[np.ndarray, List[np.ndarray]]:
+    """
+    Estimates the shap values of a chunk of the instances passed to KernelShap.explain. If the explainer is
+    seeded, the chunk is explained with a seed determined by its position, so that the shap values do not
+    depend on whether the chunks are explained sequentially or in a process pool.
+
+    Parameters
+    ----------
+    explainer
+        The fitted explainer.
+    chunk
+        A tuple containing the chunk position, the instances to be explained and the kwargs passed to
+        shap.KernelExplainer.shap_values.
+
+    Returns
+    -------
+        The shap values of the instances.
+    """
+
+    chunk_idx, X, kwargs = chunk
+    if explainer.seed is not None:
+        np.random.seed(explainer.seed + chunk_idx)
+
+    return explainer._explainer.shap_values(X, **kwargs)
+
+
+def _shap_values_chunk(chunk: Tuple[int, Any, dict]) -> Tuple[Union[np.ndarray, List[np.ndarray]], dict]:
+    """
+    Estimates the shap values of a chunk of the instances passed to KernelShap.explain in a worker process
+    (see `_seeded_shap_values`).
+
+    Returns
+    -------
+        The shap values of the instances and the statistics of the predictor calls made to estimate them.
+    """
+
+    _pool_explainer._instrumented.reset()
+    shap_values = _seeded_shap_values(_pool_explainer, chunk)
+
+    return shap_values, _pool_explainer._instrumented.summary()
+
+
+def _take_rows(X: Union[np.ndarray, pd.DataFrame, sparse.spmatrix], start: int, stop: int) \
+        -> Union[np.ndarray, pd.DataFrame, sparse.spmatrix]:
+    """
+    Returns the rows start to stop of an array, data frame or sparse matrix in CSR format.
+    """
+
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[start:stop]
+
+    return X[start:stop]
+
+
+def _concatenate_shap_values(chunks_values: List[Union[np.ndarray, List[np.ndarray]]]) \
+        -> Union[np.ndarray, List[np.ndarray]]:
+    """
+    Concatenates the shap values estimated for chunks of instances. The values of each chunk are either an
+    array (scalar model output) or a list with an array for each model output.
+    """
+
+    if isinstance(chunks_values[0], np.ndarray):
+        return np.concatenate(chunks_values)
+
+    return [np.concatenate(output_values) for output_values in zip(*chunks_values)]
+
+
 class KernelShap(Explainer, FitMixin):
 
     def __init__(self,
@@ -70,6 +156,8 @@ class KernelShap(Explainer, FitMixin):
 
         self.link = link
         self.predictor = predictor
+        # records the predictor calls made by the explanations
+        self._instrumented = instrument(predictor)
         self.feature_names = feature_names if feature_names else []
         self.categorical_names = categorical_names if categorical_names else {}
         self.seed = seed
@@ -493,7 +581,7 @@ class KernelShap(Explainer, FitMixin):
         # perform grouping if requested by the user
         self.background_data = self._get_data(background_data, group_names, groups, weights, **kwargs)
         self._explainer = shap.KernelExplainer(
-            self.predictor,
+            self._instrumented,
             self.background_data,
             link=self.link,
         )  # type: shap.KernelExplainer
@@ -523,6 +611,8 @@ class KernelShap(Explainer, FitMixin):
                 summarise_result: bool = False,
                 cat_vars_start_idx: List[int] = None,
                 cat_vars_enc_dim: List[int] = None,
+                n_jobs: int = 1,
+                chunk_size: int = None,
                 **kwargs) -> Explanation:
         """
         Explains the instances in the array X.
@@ -543,6 +633,16 @@ class KernelShap(Explainer, FitMixin):
         cat_vars_enc_dim
             A sequence containing the length of the encoding dimension for each
             categorical variable.
+        n_jobs
+            Number of processes the instances are distributed to. If -1, all the available cores are used.
+            The fitted explainer (including the predictor and the background data) is copied once to each
+            process, so it has to be picklable unless processes are started with the 'fork' method.
+        chunk_size
+            Number of instances sent to a process at once. If None, the instances are split in 4 * n_jobs
+            chunks, which balances the load since the time needed to explain an instance varies. The shap
+            values of the chunks are concatenated in the order of the instances. If the explainer is seeded,
+            each chunk is explained with a seed determined by its position, so the results depend on
+            chunk_size but not on n_jobs.
         kwargs
             Keyword arguments specifying explain behaviour. Valid arguments are:
                 *nsamples: controls the number of predictor calls and therefore runtime.
@@ -565,7 +665,8 @@ class KernelShap(Explainer, FitMixin):
         if self.use_groups and isinstance(X, sparse.spmatrix):
             X = X.toarray()
 
-        shap_values = self._explainer.shap_values(X, **kwargs)
+        self._instrumented.reset()
+        shap_values = self._shap_values(X, n_jobs=n_jobs, chunk_size=chunk_size, **kwargs)
         # for scalar model outputs a single numpy array is returned
         if isinstance(shap_values, np.ndarray):
             shap_values = [shap_values]
@@ -595,6 +696,47 @@ class KernelShap(Explainer, FitMixin):
 
         return self.build_explanation(X, shap_values, self.expected_value)
 
+    def _shap_values(self,
+                     X: Union[np.ndarray, pd.DataFrame, sparse.spmatrix],
+                     n_jobs: int = 1,
+                     chunk_size: int = None,
+                     **kwargs) -> Union[np.ndarray, List[np.ndarray]]:
+        """
+        Estimates the shap values of the instances in X. If n_jobs > 1 or chunk_size is set, X is split in
+        chunks of chunk_size instances that are explained by a pool of n_jobs processes (see `explain`).
+
+        Returns
+        -------
+            The shap values returned by shap.KernelExplainer.shap_values for X.
+        """
+
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        # single instances are explained at once
+        n_instances = X.shape[0] if len(X.shape) == 2 else 1
+        if chunk_size is None:
+            chunk_size = int(np.ceil(n_instances / (4 * n_jobs))) if n_jobs > 1 else n_instances
+        if chunk_size >= n_instances:
+            return self._explainer.shap_values(X, **kwargs)
+
+        if isinstance(X, sparse.spmatrix):
+            X = X.tocsr()
+        chunks = [
+            (chunk_idx, _take_rows(X, start, start + chunk_size), kwargs)
+            for chunk_idx, start in enumerate(range(0, n_instances, chunk_size))
+        ]
+        if n_jobs == 1:
+            chunks_values = [_seeded_shap_values(self, chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(min(n_jobs, len(chunks)), initializer=_init_explain_worker,
+                                     initargs=(self, )) as pool:
+                chunks_values = []
+                for values, predictor_stats in pool.map(_shap_values_chunk, chunks):
+                    chunks_values.append(values)
+                    self._instrumented.merge(predictor_stats)
+
+        return _concatenate_shap_values(chunks_values)
+
     def build_explanation(self,
                           X: Union[np.ndarray, pd.DataFrame, sparse.spmatrix],
                           shap_values: List[np.ndarray],
@@ -622,7 +764,7 @@ class KernelShap(Explainer, FitMixin):
 
         # TODO: DEFINE COMPLETE SCHEMA FOR THE METADATA (ONGOING)
 
-        raw_predictions = self._explainer.linkfv(self.predictor(X))
+        raw_predictions = self._explainer.linkfv(self._instrumented(X))
         argmax_pred = np.argmax(np.atleast_2d(raw_predictions), axis=1)
         importances = self.rank_by_importance(shap_values)
 
@@ -647,7 +789,10 @@ class KernelShap(Explainer, FitMixin):
             importances=importances
         )
 
-        return Explanation(meta=copy.deepcopy(self.meta), data=data)
+        explanation = Explanation(meta=copy.deepcopy(self.meta), data=data)
+        explanation.meta['stats']['predictor'] = self._instrumented.summary()
+
+        return explanation
 
     def rank_by_importance(self, shap_values: List[np.ndarray]) -> Dict:
         """
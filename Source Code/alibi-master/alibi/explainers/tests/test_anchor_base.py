@@ -4,6 +4,8 @@ import numpy as np
 
 from copy import deepcopy
 
+from alibi.explainers.anchor_base import INDEX_TYPES, SampleCache, batch_compare_labels
+
 
 @pytest.mark.parametrize('rf_classifier',
                          [pytest.lazy_fixture('get_iris_dataset')],
@@ -63,3 +65,272 @@ def test_anchor_base_beam(rf_classifier, at_defaults, at_iris_explainer):
     # test coverage data sampling
     cov_data = anchor_beam._get_coverage_samples(coverage_samples)
     assert cov_data.shape[0] == coverage_samples
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+@pytest.mark.parametrize('index_type', INDEX_TYPES, ids='index_type={}'.format)
+def test_anchor_base_index(rf_classifier, at_defaults, at_iris_explainer, index_type):
+    """
+    Checks that the sample cache and coverage indices are consistent with the state statistics.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+    explainer.explain(X_test[0], threshold=threshold, index_type=index_type, **explain_defaults)
+    anchor_beam = explainer.mab
+    assert anchor_beam.index_type == index_type
+
+    state = anchor_beam.state
+    coverage_data = state['coverage_data']
+    len_1_anchors_set = anchor_beam.propose_anchors([])
+    len_2_anchors_set = anchor_beam.propose_anchors(len_1_anchors_set)
+    for anchor in len_1_anchors_set + len_2_anchors_set:
+        rows = anchor_beam._index_rows(state['t_idx'][anchor])
+        assert rows.size == state['t_nsamples'][anchor]
+        data, labels = state['cache'].gather(rows)
+        assert state['t_positives'][anchor] == labels.sum()
+        assert tuple(sorted(state['t_order'][anchor])) == anchor
+        assert (data[:, list(anchor)] == 1).all()
+        expected_coverage = (coverage_data[:, list(anchor)] == 1).all(axis=1).mean()
+        assert np.isclose(state['t_coverage'][anchor], expected_coverage)
+
+
+@pytest.mark.parametrize('block_size', (1, 7, 64))
+def test_sample_cache(block_size):
+    """
+    Checks that samples can be retrieved from the cache after it grows and after evicting samples.
+    """
+
+    n_samples, n_features = 100, 5
+    data = np.random.randint(0, 2, size=(n_samples, n_features), dtype=np.uint8)
+    labels = np.random.randint(0, 2, size=n_samples, dtype=np.uint8)
+    cache = SampleCache(n_features, block_size)
+    for start in range(0, n_samples, 30):
+        assert cache.append(data[start:start + 30], labels[start:start + 30]) == (start, min(start + 30, n_samples))
+    assert cache.n_rows == n_samples
+    assert cache.peak_nbytes == -(-n_samples // block_size) * block_size * (n_features + 1)
+
+    rows = np.random.permutation(n_samples)[:50]
+    cached_data, cached_labels = cache.gather(rows)
+    assert (cached_data == data[rows]).all()
+    assert (cached_labels == labels[rows]).all()
+
+    keep = np.sort(rows)
+    cache.compact(keep)
+    assert cache.n_rows == keep.shape[0]
+    assert cache.n_evicted == n_samples - keep.shape[0]
+    assert len(cache.data_blocks) == -(-keep.shape[0] // block_size)
+    cached_data, cached_labels = cache.gather(np.arange(keep.shape[0]))
+    assert (cached_data == data[keep]).all()
+    assert (cached_labels == labels[keep]).all()
+
+    cache_max = SampleCache(n_features, block_size, max_bytes=cache.block_nbytes)
+    assert cache_max.has_room(block_size)
+    assert not cache_max.has_room(block_size + 1)
+
+    # blocks larger than the cap are shrunk so that the cache can still store samples
+    cache_small = SampleCache(n_features, block_size, max_bytes=(n_features + 1) * -(-block_size // 2))
+    assert cache_small.block_size == -(-block_size // 2)
+    assert cache_small.has_room(cache_small.block_size)
+    assert not cache_small.has_room(cache_small.block_size + 1)
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+@pytest.mark.parametrize('binary_cache_size, cache_blocks', [(1, 4), (10000, 0.01)],
+                         ids='binary_cache_size, cache_blocks={}'.format)
+def test_anchor_base_cache_max_bytes(rf_classifier, at_defaults, at_iris_explainer, binary_cache_size, cache_blocks):
+    """
+    Checks that the sample cache does not exceed the specified size and that the anchor statistics
+    are consistent with the samples retained after eviction. The size can be smaller than a default block.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+    explainer.explain(X_test[0], threshold=threshold, binary_cache_size=binary_cache_size, **explain_defaults)
+    cache_max_bytes = int(cache_blocks * explainer.mab.state['cache'].block_nbytes)
+    explanation = explainer.explain(
+        X_test[0],
+        threshold=threshold,
+        binary_cache_size=binary_cache_size,
+        cache_max_bytes=cache_max_bytes,
+        **explain_defaults,
+    )
+    assert 0 < explanation.meta['stats']['cache_peak_bytes'] <= cache_max_bytes
+
+    anchor_beam = explainer.mab
+    state = anchor_beam.state
+    for anchor, index in state['t_idx'].items():
+        rows = anchor_beam._index_rows(index)
+        assert rows.size <= state['t_nsamples'][anchor]
+        assert (rows < state['cache'].n_rows).all()
+        data, _ = state['cache'].gather(rows)
+        assert (data[:, list(anchor)] == 1).all()
+
+
+@pytest.mark.parametrize('max_predict_batch', (None, 1, 4, 100))
+def test_batch_compare_labels(max_predict_batch):
+    """
+    Checks that fusing the predictor calls for samples drawn for several anchors returns the same labels
+    as labelling the samples for each anchor separately.
+    """
+
+    batch_sizes = []
+
+    def compare_labels(samples):
+        batch_sizes.append(samples.shape[0])
+        return samples.sum(axis=1) > 0
+
+    samples = [np.random.normal(size=(n_samples, 3)) for n_samples in (5, 1, 10)]
+    labels = batch_compare_labels(compare_labels, samples, max_predict_batch)
+    assert sum(batch_sizes) == 16
+    if max_predict_batch is None:
+        assert len(batch_sizes) == 1
+    else:
+        assert max(batch_sizes) <= max_predict_batch
+    for anchor_samples, anchor_labels in zip(samples, labels):
+        assert (anchor_labels == (anchor_samples.sum(axis=1) > 0)).all()
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+@pytest.mark.parametrize('fuse_predictions, max_predict_batch', [(False, None), (True, None), (True, 150)])
+def test_anchor_base_predictor_calls(rf_classifier, at_defaults, at_iris_explainer, fuse_predictions,
+                                     max_predict_batch):
+    """
+    Checks that the number of predictor calls reported in the explanation metadata is correct and that
+    the samples passed to the predictor in one call do not exceed max_predict_batch.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+    sampler = explainer.samplers[0]
+    predictor, batch_sizes = sampler.predictor, []
+
+    def counting_predictor(X):
+        batch_sizes.append(X.shape[0])
+        return predictor(X)
+
+    sampler.predictor = counting_predictor
+    try:
+        explanation = explainer.explain(
+            X_test[0],
+            threshold=threshold,
+            fuse_predictions=fuse_predictions,
+            max_predict_batch=max_predict_batch,
+            **explain_defaults,
+        )
+    finally:
+        sampler.predictor = predictor
+
+    # the predictor is also called once to label the instance to be explained
+    assert explanation.meta['stats']['predictor_calls'] == len(batch_sizes) - 1
+    if not fuse_predictions:
+        assert max(batch_sizes) == explain_defaults['batch_size']
+    elif max_predict_batch:
+        assert max(batch_sizes) <= max_predict_batch
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+def test_anchor_base_predictor_calls_cached(rf_classifier, at_defaults, at_iris_explainer):
+    """
+    Checks that the predictor calls served by the prediction cache are not counted by the search.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    explainer.explain(X_test[0], threshold=threshold, prediction_cache_size=100000, **explain_defaults)
+    explanation = explainer.explain(
+        X_test[0],
+        threshold=threshold,
+        prediction_cache_size=100000,
+        keep_prediction_cache=True,
+        **explain_defaults,
+    )
+    stats = explanation.meta['stats']
+    assert stats['prediction_cache_hits'] > 0
+    # the predictor is also called once to label the instance to be explained
+    assert stats['predictor_calls'] == stats['predictor']['calls'] - 1
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+@pytest.mark.parametrize('budget', [{'max_predictor_calls': 3}, {'time_budget_s': 0.}], ids=str)
+def test_anchor_base_budget(rf_classifier, at_defaults, at_iris_explainer, budget):
+    """
+    Checks that the search stops when a budget is exhausted and that the explanation is flagged as not
+    converged.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    explanation = explainer.explain(X_test[0], threshold=threshold, **budget, **explain_defaults)
+    stats, raw = explanation.meta['stats'], explanation.raw
+    assert not stats['converged']
+    assert stats['stopped_by'] == list(budget.keys())[0]
+    assert not raw['converged']
+    assert 0. <= raw['precision_lb'] <= raw['precision_ub'] <= 1.
+    if 'max_predictor_calls' in budget:
+        assert stats['predictor_calls'] <= budget['max_predictor_calls'] + 1
+
+    explanation = explainer.explain(X_test[0], threshold=threshold, **explain_defaults)
+    assert explanation.meta['stats']['converged']
+    assert explanation.raw['converged']
+
+
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+@pytest.mark.parametrize('at_defaults', (0.95, ), indirect=True)
+def test_anchor_base_profile(rf_classifier, at_defaults, at_iris_explainer):
+    """
+    Checks that the profile of the search phases is reported in the explanation metadata.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    explanation = explainer.explain(X_test[0], threshold=threshold, profile=True, **explain_defaults)
+    stats = explanation.meta['stats']
+    phases = stats['profile']['phases']
+    for phase in ['coverage', 'sample', 'update_state', 'perturbation', 'binarize', 'predict', 'anchor_metadata']:
+        assert phases[phase]['calls'] > 0
+    # the instance label is predicted before the search is profiled
+    assert phases['predict']['calls'] == stats['predictor_calls']
+    assert phases['coverage']['rows'] == explain_defaults['coverage_samples']
+    assert stats['profile']['cache_growth'][-1][1] == stats['cache_peak_bytes']
+
+    explanation = explainer.explain(X_test[0], threshold=threshold, **explain_defaults)
+    assert 'profile' not in explanation.meta['stats']
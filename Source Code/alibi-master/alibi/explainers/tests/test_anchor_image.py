@@ -5,6 +5,7 @@ import numpy as np
 from alibi.api.defaults import DEFAULT_META_ANCHOR, DEFAULT_DATA_ANCHOR_IMG
 from alibi.explainers import AnchorImage
 from alibi.explainers.tests.utils import fashion_mnist_dataset
+from alibi.utils.cache import ArrayCache
 
 
 # Data preparation
@@ -89,3 +90,97 @@ def test_anchor_image(conv_net):
     scaled_img = explainer._scale(fake_img, scale=(min_val, max_val))
     assert (scaled_img <= max_val).all()
     assert (scaled_img >= min_val).all()
+
+
+@pytest.mark.parametrize('use_background', [False, True], ids='use_background={}'.format)
+def test_anchor_image_perturbation(use_background):
+    image_shape = (28, 28, 1)
+    image = x_train[1]
+    images_background = x_train[2:5] if use_background else None
+    explainer = AnchorImage(lambda x: np.zeros(x.shape[0], dtype=int), image_shape,
+                            images_background=images_background)
+    explainer.image = image
+    explainer.segments = explainer.generate_superpixels(image)
+    explainer.segment_labels = list(np.unique(explainer.segments))
+    n_segments = len(explainer.segment_labels)
+
+    anchor = (0, 2)
+    imgs, segments_mask = explainer.perturbation(anchor, 20)
+    assert imgs.shape == (20,) + image_shape
+    assert imgs.dtype == image.dtype
+    assert (segments_mask[:, anchor] == 1).all()
+
+    # compare with the values of the perturbed superpixels computed one at a time
+    for img, mask in zip(imgs, segments_mask):
+        for segment in range(n_segments):
+            pixels = explainer.segments == segment
+            if mask[segment]:
+                expected = image[pixels]
+            elif use_background:
+                expected = images_background[mask[-1]][pixels]
+            else:
+                expected = np.full_like(image[pixels], image[pixels].mean())
+            assert np.allclose(img[pixels], expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('prefetch', [False, True], ids='prefetch={}'.format)
+def test_anchor_image_chunks(prefetch):
+    image_shape = (28, 28, 1)
+    image = x_train[1]
+    batch_sizes = []
+
+    def predictor(x):
+        batch_sizes.append(x.shape[0])
+        return (x.mean(axis=(1, 2, 3)) > image.mean()).astype(int)
+
+    explainer = AnchorImage(predictor, image_shape)
+    explainer.image = image
+    explainer.segments = explainer.generate_superpixels(image)
+    explainer.segment_labels = list(np.unique(explainer.segments))
+    explainer.n_covered_ex = 3
+    explainer.instance_label = 1
+    anchors = [(0, (0,)), (1, ()), (2, (1, 2))]
+
+    results = []
+    for max_batch_bytes in [None, 5 * image.nbytes]:
+        explainer.max_batch_bytes, explainer.prefetch = max_batch_bytes, prefetch
+        batch_sizes.clear()
+        np.random.seed(0)
+        results.append(explainer.sampler(anchors, 10))
+
+    # the images are predicted in chunks that fit in max_batch_bytes but the samples are the same
+    assert max(batch_sizes) == explainer._max_chunk_size() == (2 if prefetch else 4)
+    for anchor_result, chunked_result in zip(*results):
+        covered_true, covered_false, labels, data, coverage, idx = anchor_result
+        assert np.array_equal(labels, chunked_result[2])
+        assert np.array_equal(data, chunked_result[3])
+        assert len(covered_true) == len(chunked_result[0]) <= explainer.n_covered_ex
+        for img, chunked_img in zip(covered_true + covered_false, chunked_result[0] + chunked_result[1]):
+            assert np.array_equal(img, chunked_img)
+
+
+def test_anchor_image_segmentation_cache():
+    image_shape = (28, 28, 1)
+    image = x_train[1]
+    cache = ArrayCache()
+    predictor = lambda x: (x.mean(axis=(1, 2, 3)) > image.mean()).astype(int)
+
+    explanations = []
+    for segmentation_cache in [None, cache, cache]:
+        explainer = AnchorImage(predictor, image_shape, segmentation_cache=segmentation_cache, seed=0)
+        explanations.append(explainer.explain(image, threshold=0.9))
+
+    # the superpixels and fudged image are computed by the first explainer using the cache and reused
+    stats = [explanation.meta['stats'] for explanation in explanations]
+    assert 'segmentation_cache_hits' not in stats[0]
+    assert stats[1]['segmentation_cache_misses'] == 2
+    assert stats[2]['segmentation_cache_hits'] == 2
+    assert stats[2]['segmentation_cache_misses'] == 0
+    for explanation in explanations[1:]:
+        assert np.array_equal(explanation.segments, explanations[0].segments)
+        assert np.array_equal(explanation.anchor, explanations[0].anchor)
+        # the arrays stored in the cache are read-only, but the arrays returned to the user are not
+        assert explanation.segments.flags.writeable
+    assert explainer.segment_means.flags.writeable
+    assert np.allclose(explainer.segment_means[:, 0], [image[explainer.segments == label].mean()
+                                                      for label in np.unique(explainer.segments)])
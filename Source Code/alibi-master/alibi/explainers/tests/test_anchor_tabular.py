@@ -8,8 +8,10 @@ from collections import defaultdict
 from copy import deepcopy
 
 from alibi.api.defaults import DEFAULT_META_ANCHOR, DEFAULT_DATA_ANCHOR
-from alibi.explainers import DistributedAnchorTabular
+from alibi.explainers import AnchorTabular, DistributedAnchorTabular
+from alibi.explainers.anchor_tabular import TabularSampler
 from alibi.explainers.tests.utils import predict_fcn
+from alibi.utils.discretizer import Discretizer
 from alibi.utils.distributed import RAY_INSTALLED
 
 
@@ -85,6 +87,136 @@ def test_explainer(n_explainer_runs, at_defaults, rf_classifier, explainer, test
     assert sampler.n_covered_ex == n_covered_ex
 
 
+@pytest.mark.parametrize('n_jobs', [1, 2], ids='n_jobs={}'.format)
+@pytest.mark.parametrize('at_defaults', [0.95], ids='threshold={}'.format, indirect=True)
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+def test_explain_batch(n_jobs, at_defaults, rf_classifier, at_iris_explainer):
+    """
+    Checks that a batch of instances is explained in order and that the shared coverage set is released.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    n_instances = min(5, X_test.shape[0])
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    explanations = explainer.explain_batch(X_test[:n_instances], n_jobs=n_jobs, threshold=threshold,
+                                           **explain_defaults)
+    assert len(explanations) == n_instances
+    for instance, explanation in zip(X_test[:n_instances], explanations):
+        assert (explanation.raw['instance'] == instance).all()
+        assert explanation.meta.keys() == DEFAULT_META_ANCHOR.keys()
+        assert explanation.meta['params']['coverage_samples'] == explain_defaults['coverage_samples']
+    assert explainer.samplers[0].coverage_rows is None
+
+
+@pytest.mark.parametrize('at_defaults', [0.95], ids='threshold={}'.format, indirect=True)
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+def test_prediction_cache(at_defaults, rf_classifier, at_iris_explainer):
+    """
+    Checks that caching the predictions does not change the explanation and that the cache statistics
+    are reported.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    explanations = []
+    for prediction_cache_size in [None, 10000]:
+        np.random.seed(0)
+        explanations.append(explainer.explain(X_test[0], threshold=threshold,
+                                              prediction_cache_size=prediction_cache_size, **explain_defaults))
+    assert explanations[0].anchor == explanations[1].anchor
+    assert explanations[0].precision == explanations[1].precision
+    assert 'prediction_cache_hits' not in explanations[0].meta['stats']
+    stats = explanations[1].meta['stats']
+    assert stats['prediction_cache_hits'] + stats['prediction_cache_misses'] > 0
+    assert stats['prediction_cache_size'] == stats['prediction_cache_misses']
+
+    explanation = explainer.explain(X_test[0], threshold=threshold, prediction_cache_size=10000,
+                                    keep_prediction_cache=True, **explain_defaults)
+    assert explanation.meta['stats']['prediction_cache_hits'] > 0
+    assert explanation.meta['stats']['prediction_cache_size'] >= stats['prediction_cache_size']
+
+
+@pytest.mark.parametrize('at_defaults', [0.95], ids='threshold={}'.format, indirect=True)
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+def test_predictor_stats(at_defaults, rf_classifier, at_iris_explainer):
+    """
+    Checks that the predictor calls made by an explanation are reported in the explanation metadata.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+
+    for _ in range(2):
+        explanation = explainer.explain(X_test[0], threshold=threshold, **explain_defaults)
+        stats = explanation.meta['stats']
+        # the instance is predicted once before the samples are labelled
+        assert stats['predictor']['calls'] == stats['predictor_calls'] + 1
+        assert stats['predictor']['rows'] > stats['predictor']['calls']
+        assert stats['predictor']['input_bytes'] == stats['predictor']['rows'] * X_test.shape[1] * X_test.itemsize
+        assert sum(stats['predictor']['latency_histogram']['counts']) == stats['predictor']['calls']
+
+
+@pytest.mark.parametrize('at_defaults', [0.95], ids='threshold={}'.format, indirect=True)
+@pytest.mark.parametrize('rf_classifier',
+                         [pytest.lazy_fixture('get_iris_dataset')],
+                         indirect=True,
+                         ids='clf=rf_{}'.format,
+                         )
+def test_coverage_cache(at_defaults, rf_classifier, at_iris_explainer):
+    """
+    Checks that the cached coverage set is reused across explanations, redrawn every coverage_refresh
+    explanations and released when coverage sets are no longer cached.
+    """
+
+    X_test, explainer, predict_fn, predict_type = at_iris_explainer
+    explain_defaults = at_defaults
+    threshold = explain_defaults['desired_confidence']
+    sampler = explainer.samplers[0]
+
+    explainer.explain(X_test[0], threshold=threshold, coverage_cache='rows', coverage_refresh=2, **explain_defaults)
+    rows = sampler.coverage_rows
+    assert rows.shape[0] == explain_defaults['coverage_samples']
+    assert sampler.coverage_d_data is None
+    explanation = explainer.explain(X_test[1], threshold=threshold, coverage_cache='rows', coverage_refresh=2,
+                                    **explain_defaults)
+    assert sampler.coverage_rows is rows
+    assert explanation.meta['params']['coverage_cache'] == 'rows'
+    explainer.explain(X_test[1], threshold=threshold, coverage_cache='rows', coverage_refresh=2, **explain_defaults)
+    assert sampler.coverage_rows is not rows
+
+    # the coverage set stored in memory is binarised like the rows read from the training data
+    explainer.explain(X_test[0], threshold=threshold, coverage_cache='data', **explain_defaults)
+    rows, d_data = sampler.coverage_rows, sampler.coverage_d_data
+    assert (d_data == sampler.d_train_data[rows]).all()
+    coverage = sampler((0, ()), explain_defaults['coverage_samples'], compute_labels=False)[0]
+    sampler.coverage_d_data = None
+    assert (sampler((0, ()), explain_defaults['coverage_samples'], compute_labels=False)[0] == coverage).all()
+
+    explainer.explain(X_test[0], threshold=threshold, **explain_defaults)
+    assert sampler.coverage_rows is None
+    assert explainer.coverage_cache is None
+    with pytest.raises(ValueError):
+        explainer.explain(X_test[0], threshold=threshold, coverage_cache='disk', **explain_defaults)
+
+
+@pytest.mark.parametrize('backend', ['ray', 'multiprocessing'], ids='backend={}'.format)
 @pytest.mark.parametrize('ncpu', [2, 3], ids='ncpu={}'.format)
 @pytest.mark.parametrize('predict_type', ('proba', 'class'), ids='predict_type={}'.format)
 @pytest.mark.parametrize('at_defaults', [0.95], ids='threshold={}'.format, indirect=True)
@@ -94,7 +226,8 @@ def test_explainer(n_explainer_runs, at_defaults, rf_classifier, explainer, test
                          ids='clf=rf_{}'.format,
                          )
 @pytest.mark.parametrize('test_instance_idx', [0], ids='test_instance_idx={}'.format)
-def test_distributed_anchor_tabular(ncpu,
+def test_distributed_anchor_tabular(backend,
+                                    ncpu,
                                     predict_type,
                                     at_defaults,
                                     get_iris_dataset,
@@ -102,8 +235,7 @@ def test_distributed_anchor_tabular(ncpu,
                                     test_instance_idx,
                                     ):
 
-    if RAY_INSTALLED:
-        import ray
+    if RAY_INSTALLED or backend == 'multiprocessing':
 
         # inputs
         params = at_defaults
@@ -117,7 +249,7 @@ def test_distributed_anchor_tabular(ncpu,
         X_test, X_train, feature_names = data['X_test'], data['X_train'], data['metadata']['feature_names']
         clf, preprocessor = rf_classifier
         predictor = predict_fcn(predict_type, clf)
-        explainer = DistributedAnchorTabular(predictor, feature_names)
+        explainer = DistributedAnchorTabular(predictor, feature_names, backend=backend)
         explainer.fit(X_train, ncpu=ncpu)
 
         # select instance to be explained
@@ -132,13 +264,20 @@ def test_distributed_anchor_tabular(ncpu,
         assert len(explainer.samplers) == ncpu
         actors = explainer.samplers
         for actor in actors:
-            sampler = ray.get(actor._get_sampler.remote())
+            sampler = explainer.backend.get(actor._get_sampler.remote())
             ord_feats = sampler.ord_lookup.keys()
             cat_feats = sampler.cat_lookup.keys()
             enc_feats = sampler.enc2feat_idx.keys()
             assert (set(ord_feats | set(cat_feats))) == set(enc_feats)
             assert sampler.instance_label == instance_label
             assert sampler.n_covered_ex == n_covered_ex
+            # the index shared by the samplers is the same as the index built by a sampler
+            data_index = sampler._get_data_index()
+            assert sampler.val2idx.keys() == data_index.keys()
+            for feat in data_index:
+                assert sampler.val2idx[feat].keys() == data_index[feat].keys()
+                for value in data_index[feat]:
+                    assert (sampler.val2idx[feat][value] == data_index[feat][value]).all()
 
         # check explanation
         assert explainer.instance_label == instance_label
@@ -164,6 +303,9 @@ def test_distributed_anchor_tabular(ncpu,
             assert distrib_anchor_beam.state['t_nsamples'][anchor] == current_state['t_nsamples'][anchor] + t
             assert distrib_anchor_beam.state['t_positives'][anchor] == current_state['t_positives'][anchor] + p
 
+        if backend == 'multiprocessing':
+            explainer.backend.shutdown()
+
 
 def uncollect_if_test_sampler(**kwargs):
 
@@ -292,3 +434,138 @@ def test_sampler(test_instance_idx, anchors, nb_samples, dataset, rf_classifier,
         # check features sampled are in a sensible range for numerical features
         assert (train_data_mean + train_data_3std - raw_data_mean > 0).all()
         assert (train_data_mean - train_data_3std - raw_data_mean < 0).all()
+
+
+def test_sampler_bin_index():
+    np.random.seed(0)
+    train_data = np.hstack([np.random.normal(size=(200, 2)), np.random.randint(0, 3, size=(200, 1))])
+    feature_values = {0: ['a', 'b', 'c', 'd'], 1: ['a', 'b', 'c', 'd'], 2: ['x', 'y', 'z']}
+    sampler = TabularSampler(lambda x: np.zeros(x.shape[0]), (25, 50, 75), [0, 1], [2], ['f0', 'f1', 'f2'],
+                             feature_values)
+    d_train_data = Discretizer(train_data, [0, 1], ['f0', 'f1', 'f2'], (25, 50, 75)).discretize(train_data)
+    d_train_data[0, 0] = np.nan  # values that are not feature values are not indexed
+    sampler.deferred_init(train_data, d_train_data)
+
+    # the index rows are the training data rows where each feature has each value
+    for feat in range(3):
+        assert sampler.val2idx[feat].keys() == set(range(len(feature_values[feat])))
+        for value, rows in sampler.val2idx[feat].items():
+            assert (rows == np.nonzero(d_train_data[:, feat] == value)[0]).all()
+            assert rows.dtype == np.int32
+
+    # ranges of bins and sets of bins
+    for bins in [{1, 2, 3}, {0, 2}, set()]:
+        expected = np.nonzero(np.isin(d_train_data[:, 0], list(bins)))[0]
+        assert (np.sort(sampler._get_bin_rows(0, bins)) == expected).all()
+
+    # the packed index is equivalent to the index built by the sampler
+    rows, offsets = TabularSampler.pack_data_index(sampler.bin_index)
+    unpacked = TabularSampler.unpack_data_index(rows, offsets)
+    for feat, (feat_rows, starts) in sampler.bin_index.items():
+        assert (unpacked[feat][0] == feat_rows).all()
+        assert (unpacked[feat][1] == starts).all()
+
+    # the samples satisfy the anchor
+    sampler.build_lookups(d_train_data[1])
+    anchor = tuple(sampler.enc2feat_idx.keys())
+    allowed_bins, _, _ = sampler.get_features_index(anchor)
+    _, disc_data, _ = sampler.perturbation(anchor, 50)
+    for feat in range(3):
+        values = allowed_bins.get(feat, {d_train_data[1, feat]})
+        assert np.isin(disc_data[:, feat], list(values)).all()
+
+
+@pytest.mark.parametrize('categorical_features', [[2], [0, 2], [0, 1, 2]])
+def test_sampler_binarize(categorical_features):
+    np.random.seed(0)
+    train_data = np.random.normal(size=(100, 3))
+    train_data[:, categorical_features] = np.random.randint(0, 3, size=(100, len(categorical_features)))
+    numerical_features = [feat for feat in range(3) if feat not in categorical_features]
+    feature_values = {feat: ['x', 'y', 'z'] for feat in categorical_features}
+    disc = Discretizer(train_data, numerical_features, ['f0', 'f1', 'f2'], (25, 50, 75))
+    feature_values.update(disc.feature_intervals)
+    sampler = TabularSampler(lambda x: np.zeros(x.shape[0]), (25, 50, 75), numerical_features,
+                             categorical_features, ['f0', 'f1', 'f2'], feature_values)
+    sampler.deferred_init(train_data, disc.discretize(train_data))
+    sampler.build_lookups(train_data[0])
+
+    d_samples = sampler.d_train_data
+    data = sampler.binarize(d_samples)
+    assert data.shape == (100, len(sampler.enc2feat_idx))
+    for i, feat in sampler.enc2feat_idx.items():
+        if i in sampler.cat_lookup:
+            expected = d_samples[:, feat] == sampler.cat_lookup[i]
+        else:
+            expected = np.isin(d_samples[:, feat], list(sampler.ord_lookup[i]))
+        assert (data[:, i] == expected).all()
+
+
+def test_fit_chunks():
+    np.random.seed(0)
+    train_data = np.random.normal(size=(500, 4))
+    predictor = lambda x: (x[:, 0] > 0).astype(int)
+    explainer = AnchorTabular(predictor, ['a', 'b', 'c', 'd']).fit(train_data)
+    chunk_explainer = AnchorTabular(predictor, ['a', 'b', 'c', 'd']).fit(train_data, chunk_size=64)
+    sampler, chunk_sampler = explainer.samplers[0], chunk_explainer.samplers[0]
+    assert chunk_explainer.feature_values == explainer.feature_values
+    assert (chunk_sampler.d_train_data == sampler.d_train_data).all()
+    assert chunk_sampler.disc.rank_error == 0.
+    X = train_data[0]
+    assert (chunk_sampler.disc.discretize(X) == sampler.disc.discretize(X)).all()
+
+    # approximate percentiles
+    chunk_explainer = AnchorTabular(predictor, ['a', 'b', 'c', 'd']).fit(train_data, chunk_size=64, sketch_size=32)
+    chunk_sampler = chunk_explainer.samplers[0]
+    assert chunk_sampler.disc.rank_error > 0.
+    assert (chunk_sampler.d_train_data == chunk_sampler.disc.discretize(train_data)).all()
+
+
+def test_fit_memmap(tmp_path):
+    np.random.seed(0)
+    train_data = np.random.normal(size=(500, 4))
+    train_data[:, 3] = np.random.randint(0, 3, size=500)
+    path = str(tmp_path / 'train.npy')
+    np.save(path, train_data)
+    predictor = lambda x: (x[:, 0] > 0).astype(int)
+    feature_names, category_map = ['a', 'b', 'c', 'd'], {3: ['x', 'y', 'z']}
+
+    explainer = AnchorTabular(predictor, feature_names, categorical_names=category_map).fit(train_data)
+    memmap_explainer = AnchorTabular(predictor, feature_names, categorical_names=category_map).fit(path)
+    sampler, memmap_sampler = explainer.samplers[0], memmap_explainer.samplers[0]
+    assert isinstance(memmap_sampler.train_data, np.memmap)
+    assert isinstance(memmap_sampler.d_train_data, np.memmap)
+    assert memmap_sampler.d_train_data.dtype == np.uint8
+    assert (tmp_path / 'train_disc.npy').exists() and (tmp_path / 'train_index.npy').exists()
+    assert (memmap_sampler.d_train_data == sampler.d_train_data).all()
+    for feat in sampler.val2idx:
+        for value in sampler.val2idx[feat]:
+            assert (memmap_sampler.val2idx[feat][value] == sampler.val2idx[feat][value]).all()
+
+    explanation = memmap_explainer.explain(train_data[0])
+    assert explanation.anchor
+    assert explanation.precision >= 0.95
+
+    # categorical variables that are not integers cannot be stored in the discretized data file
+    train_data[0, 3] = 0.5
+    np.save(path, train_data)
+    with pytest.raises(ValueError):
+        AnchorTabular(predictor, feature_names, categorical_names=category_map).fit(path)
+
+
+def test_perturbation_discretized_samples():
+    np.random.seed(0)
+    train_data = np.random.normal(size=(300, 4))
+    train_data[:, 3] = np.random.randint(0, 3, size=300)
+    explainer = AnchorTabular(lambda x: (x[:, 0] > 0).astype(int), ['a', 'b', 'c', 'd'],
+                              categorical_names={3: ['x', 'y', 'z']})
+    explainer.fit(train_data, disc_perc=(10, 25, 50, 75, 90))
+    sampler = explainer.samplers[0]
+    sampler.build_lookups(train_data[0])
+
+    # the anchor applies to few training records, so most samples are built from partial anchors
+    anchor = tuple(sampler.enc2feat_idx.keys())
+    _, allowed_rows, _ = sampler.get_features_index(anchor)
+    samples, d_samples, _ = sampler.perturbation(anchor, 1000)
+    assert (d_samples == sampler.disc.discretize(samples)).all()
+    for feat, rows in allowed_rows.items():
+        assert np.isin(samples[:, feat], train_data[rows, feat]).all()
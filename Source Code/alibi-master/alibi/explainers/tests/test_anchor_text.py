@@ -10,6 +10,7 @@ from alibi.explainers import AnchorText
 from alibi.explainers.anchor_text import Neighbors
 from alibi.explainers.tests.utils import get_dataset
 from alibi.explainers.tests.utils import predict_fcn
+from alibi.utils.cache import PersistentCache
 from alibi.utils.download import spacy_model
 
 # load spaCy model
@@ -131,3 +132,59 @@ def test_neighbors():
     # similarity score list needs to be descending
     similarity_score = n['similarities']
     assert (np.sort(similarity_score[::-1]) - similarity_score).sum() == 0.0
+    # the similarities computed with the embedding matrix match the spaCy similarities
+    expected = [nlp.vocab['book'].similarity(nlp.vocab[w]) for w in n['words']]
+    assert np.allclose(similarity_score, expected, atol=1e-5)
+    # the words are the most similar words with the same case and tag
+    lexemes = [w for w in neighbor.to_check if w.is_lower and w.orth_ != 'book']
+    by_similarity = sorted(lexemes, key=lambda w: nlp.vocab['book'].similarity(w), reverse=True)
+    same_tag = [w.orth_ for w in by_similarity[:neighbor.n_similar] if nlp(w.orth_)[0].tag_ == tag]
+    assert list(n['words']) == same_tag[:top_n]
+
+
+def test_neighbors_cache(tmp_path):
+    path = str(tmp_path / 'neighbors.sqlite')
+    n = Neighbors(nlp).neighbors('book', 'NN', 10)
+    cached = Neighbors(nlp, cache=PersistentCache(path))
+    for _ in range(2):
+        m = cached.neighbors('book', 'NN', 10)
+        assert (m['words'] == n['words']).all()
+        assert (m['similarities'] == n['similarities']).all()
+    assert cached.cache.stats['hits'] == cached.cache.stats['misses'] == 1
+    cached.cache.close()
+
+    # the neighbours are reused by other explainers using the same file
+    explainer = AnchorText(nlp=nlp, predictor=lambda x: np.zeros(len(x), dtype=int), neighbors_cache=path)
+    m = explainer.neighbors.neighbors('book', 'NN', 10)
+    assert (m['words'] == n['words']).all()
+    assert explainer.neighbors.cache.stats['hits'] == 1
+
+
+@pytest.mark.parametrize('use_unk', [True, False], ids='use_unk={}'.format)
+def test_anchor_text_word_ids(use_unk):
+    text = 'This is a good book .'
+    predictor = lambda x: np.array(['good' in sentence.split() for sentence in x], dtype=int)
+
+    # the token id predictor maps the ids back to words through its own vocabulary
+    model_vocab = {}  # type: dict
+    word_ids = lambda words: [model_vocab.setdefault(w, len(model_vocab)) for w in words]
+    id_predictor = lambda ids: (ids == model_vocab.get('good', -1)).any(axis=1).astype(int)
+
+    perturb_opts = {'use_similarity_proba': False, 'sample_proba': 0.5, 'temperature': 1., 'top_n': 100}
+    samples = []
+    for explainer in [AnchorText(nlp, predictor), AnchorText(nlp, id_predictor, word_ids=word_ids)]:
+        explainer.n_covered_ex = 5
+        explainer.set_words_and_pos(text)
+        explainer.instance_label = 1
+        explainer.set_sampler_perturbation(use_unk, perturb_opts)
+        explainer.set_data_type(use_unk)
+        np.random.seed(0)
+        samples.append(explainer.sampler((0, ()), 100))
+
+    # the samples and their labels do not depend on the predictor input
+    for text_result, ids_result in zip(*samples):
+        assert np.array_equal(text_result, ids_result)
+    ids, data = explainer.perturbation((3,), 10)
+    assert ids.dtype == np.int32
+    assert (explainer.vocab[ids[:, 3]] == 'good').all()
+    assert (explainer.vocab[ids][data == 1] == np.array(explainer.words)[np.nonzero(data == 1)[1]]).all()
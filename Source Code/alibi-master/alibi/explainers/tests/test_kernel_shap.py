@@ -12,7 +12,7 @@ import pandas as pd
 import sklearn
 
 from alibi.api.defaults import DEFAULT_META_SHAP, DEFAULT_DATA_SHAP
-from alibi.explainers.kernel_shap import sum_categories, BACKGROUND_WARNING_THRESHOLD
+from alibi.explainers.kernel_shap import KernelShap, sum_categories, BACKGROUND_WARNING_THRESHOLD
 from alibi.explainers.tests.utils import get_random_matrix
 from alibi.tests.utils import assert_message_in_logs
 from copy import copy
@@ -979,3 +979,62 @@ def test_update_metadata(mock_ks_explainer):
     assert 'wrong_arg' not in metadata['params']
     assert metadata['params']['link'] == 'logit'
     assert metadata['random_arg'] == 0
+
+
+# weights of a linear model whose shap values are estimated exactly since all the coalitions are enumerated
+linear_weights = np.array([[1., -2.], [0.5, 0.], [-1., 3.], [2., 1.]])
+
+
+def linear_predictor(X):
+    return X @ linear_weights
+
+
+def nonlinear_predictor(X):
+    return np.tanh(X @ linear_weights) * X[:, :1]
+
+
+@pytest.mark.parametrize('data_type', ['array', 'sparse', 'frame'], ids='data_type={}'.format)
+@pytest.mark.parametrize('n_jobs, chunk_size', [(1, 3), (2, None), (2, 4)], ids='n_jobs, chunk_size={}'.format)
+def test_explain_chunks(data_type, n_jobs, chunk_size):
+    """
+    Test that explaining the instances in chunks, sequentially or in a process pool, gives the same
+    explanation as explaining them at once and that the predictor calls of the chunks are reported.
+    """
+
+    n_feats = linear_weights.shape[0]
+    background_data = get_data('array', n_rows=10, n_cols=n_feats, seed=0)
+    instances = get_data(data_type, n_rows=11, n_cols=n_feats, seed=1)
+
+    explanations = []
+    for kwargs in [{}, {'n_jobs': n_jobs, 'chunk_size': chunk_size}]:
+        explainer = KernelShap(linear_predictor, seed=0)
+        explainer.fit(background_data)
+        explanations.append(explainer.explain(instances, **kwargs))
+
+    expected, explanation = explanations
+    assert_allclose(explanation.expected_value, expected.expected_value)
+    for values, expected_values in zip(explanation.shap_values, expected.shap_values):
+        assert values.shape == (11, n_feats)
+        assert_allclose(values, expected_values)
+    assert_allclose(explanation.raw['raw_prediction'], expected.raw['raw_prediction'])
+    assert explanation.meta['stats']['predictor']['rows'] == expected.meta['stats']['predictor']['rows']
+
+
+def test_explain_chunks_seed():
+    """
+    Test that the shap values estimated from few samples of a seeded explainer do not depend on whether the
+    chunks are explained sequentially or in a process pool.
+    """
+
+    n_feats = linear_weights.shape[0]
+    background_data = get_data('array', n_rows=10, n_cols=n_feats, seed=0)
+    instances = get_data('array', n_rows=7, n_cols=n_feats, seed=1)
+
+    explanations = []
+    for n_jobs in [1, 2]:
+        explainer = KernelShap(nonlinear_predictor, seed=0)
+        explainer.fit(background_data)
+        explanations.append(explainer.explain(instances, nsamples=10, n_jobs=n_jobs, chunk_size=3))
+
+    for values, pool_values in zip(explanations[0].shap_values, explanations[1].shap_values):
+        assert_allclose(values, pool_values)
@@ -1,9 +1,12 @@
+import asyncio
+import threading
+
 import pytest
 
 import numpy as np
 
 from alibi.tests.utils import MockPredictor
-from alibi.utils.wrappers import ArgmaxTransformer
+from alibi.utils.wrappers import ArgmaxTransformer, BatchingPredictor, InstrumentedPredictor, instrument
 
 out_dim = [1, 5]      # number of classes
 out_type = ['proba']  # classifier returns probabilities
@@ -33,3 +36,119 @@ def test_argmax_transformer(monkeypatch, out_dim, out_type):
     result = transformer(X)
     # argmax transformer should do get rid of the feature dimension
     assert len(result.shape) == len(X.shape) - 1
+
+
+@pytest.mark.parametrize("record_shapes", [False, True], ids="record_shapes={}".format)
+def test_instrumented_predictor(record_shapes):
+    """
+    Test that the calls, rows, bytes and latencies of the predictor calls are recorded and merged.
+    """
+
+    predictor = InstrumentedPredictor(MockPredictor(5, out_type='proba'), record_shapes=record_shapes)
+    assert instrument(predictor) is predictor
+    for n_rows in [1, 10, 50]:
+        X = np.random.random(size=(n_rows, 14))
+        assert predictor(X).shape == (n_rows, 5)
+
+    summary = predictor.summary()
+    assert summary['calls'] == 3
+    assert summary['rows'] == 61
+    assert summary['input_bytes'] == 61 * 14 * 8
+    assert summary['output_bytes'] == 61 * 5 * 8
+    assert 0 < summary['max_latency_s'] <= summary['latency_s']
+    assert sum(summary['latency_histogram']['counts']) == 3
+    assert len(summary['latency_histogram']['counts']) == len(summary['latency_histogram']['bounds_s']) + 1
+    if record_shapes:
+        assert summary['shapes'] == [[[n_rows, 14], [n_rows, 5]] for n_rows in [1, 10, 50]]
+    else:
+        assert 'shapes' not in summary
+
+    predictor.merge(summary)
+    merged = predictor.summary()
+    assert merged['calls'] == 6
+    assert merged['rows'] == 122
+    assert sum(merged['latency_histogram']['counts']) == 6
+    predictor.reset()
+    assert predictor.summary()['calls'] == 0
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 16, 512], ids="max_batch_size={}".format)
+def test_batching_predictor(max_batch_size):
+    """
+    Test that concurrent calls are coalesced into batches of at most max_batch_size instances
+    and that each call gets the same output as a direct call.
+    """
+
+    batch_sizes = []
+
+    def predictor(X):
+        batch_sizes.append(X.shape[0])
+        return np.sin(X).sum(axis=1)
+
+    np.random.seed(0)
+    Xs = [np.random.random(size=(np.random.randint(1, 10), 14)) for _ in range(64)]
+    outputs = [None] * len(Xs)
+
+    def explain(start):
+        for i in range(start, len(Xs), 8):
+            outputs[i] = batching_predictor(Xs[i])
+
+    with BatchingPredictor(predictor, max_batch_size=max_batch_size, max_wait_s=0.01) as batching_predictor:
+        threads = [threading.Thread(target=explain, args=(start, )) for start in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for X, output in zip(Xs, outputs):
+            assert (output == predictor(X)).all()
+        stats = batching_predictor.stats
+        assert stats['calls'] == len(Xs)
+        assert stats['rows'] == sum(X.shape[0] for X in Xs)
+        assert stats['batches'] < len(Xs) or max_batch_size < 10
+        assert max(batch_sizes) <= max(max_batch_size, 9)
+
+        # calls from an event loop
+        async def explain_async():
+            return await asyncio.gather(*[batching_predictor.predict(X) for X in Xs[:8]])
+
+        loop = asyncio.new_event_loop()
+        try:
+            for X, output in zip(Xs, loop.run_until_complete(explain_async())):
+                assert (output == predictor(X)).all()
+        finally:
+            loop.close()
+
+
+def test_batching_predictor_lists():
+    """
+    Test that lists of instances, e.g. sentences, are passed to the predictor as lists.
+    """
+
+    input_types = []
+
+    def predictor(sentences):
+        input_types.append(type(sentences))
+        return np.array([len(sentence) for sentence in sentences])
+
+    sentences = [['a', 'bb'], ['a much longer sentence'], ['ccc']]
+    with BatchingPredictor(predictor, max_wait_s=0.05) as batching_predictor:
+        futures = [batching_predictor.submit(batch) for batch in sentences]
+        outputs = [future.result() for future in futures]
+
+    for batch, output in zip(sentences, outputs):
+        assert (output == predictor(batch)).all()
+    assert set(input_types) == {list}
+
+
+def test_batching_predictor_errors():
+    """
+    Test that the exceptions raised by the predictor are raised by the calls of the failed batch.
+    """
+
+    def predictor(X):
+        raise ValueError('Prediction failed.')
+
+    with BatchingPredictor(predictor) as batching_predictor:
+        with pytest.raises(ValueError):
+            batching_predictor(np.zeros((2, 3)))
@@ -0,0 +1,96 @@
+import numpy as np
+
+from typing import Union
+
+# number of set bits for each possible byte value
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    """
+    Packs a boolean mask into a bitmap. For 2D masks, each column is packed separately.
+
+    Parameters
+    ----------
+    mask
+        A 1D or 2D array. Non-zero entries are set in the bitmap.
+
+    Returns
+    -------
+        A `uint8` array of shape `(ceil(N / 8), )` or `(ceil(N / 8), K)` for an `N x K` mask.
+    """
+
+    return np.packbits(np.asarray(mask, dtype=bool), axis=0)
+
+
+def from_indices(idx: np.ndarray, size: int) -> np.ndarray:
+    """
+    Creates a bitmap of length `size` where the bits indicated by `idx` are set.
+
+    Parameters
+    ----------
+    idx
+        Integer positions of the set bits.
+    size
+        Number of bits represented by the bitmap.
+
+    Returns
+    -------
+        Packed bitmap.
+    """
+
+    mask = np.zeros(size, dtype=bool)
+    mask[idx] = True
+
+    return pack(mask)
+
+
+def to_indices(bitmap: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns the sorted positions of the set bits of a 1D bitmap.
+
+    Parameters
+    ----------
+    bitmap
+        Packed bitmap.
+    size
+        Number of bits represented by the bitmap (the padding is discarded).
+    """
+
+    return np.flatnonzero(np.unpackbits(bitmap)[:size])
+
+
+def intersect(bitmap: np.ndarray, *bitmaps: np.ndarray) -> np.ndarray:
+    """
+    Computes the bitwise AND of a number of bitmaps of the same shape.
+    """
+
+    result = bitmap.copy()
+    for other in bitmaps:
+        np.bitwise_and(result, other, out=result)
+
+    return result
+
+
+def popcount(bitmap: np.ndarray, axis: int = 0) -> Union[int, np.ndarray]:
+    """
+    Counts the set bits in a bitmap. For 2D bitmaps, the bits are counted
+    separately for each column by default.
+
+    Parameters
+    ----------
+    bitmap
+        Packed bitmap.
+    axis
+        Axis along which the counts are summed.
+
+    Returns
+    -------
+        Number of set bits.
+    """
+
+    counts = _POPCOUNT_TABLE[bitmap].sum(axis=axis, dtype=np.int64)
+    if np.ndim(counts) == 0:
+        return int(counts)
+
+    return counts
@@ -0,0 +1,506 @@
+import hashlib
+import importlib.util
+import numpy as np
+import os
+import sqlite3
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+
+def check_xxhash():
+    """
+    Checks if xxhash is installed
+
+    Returns:
+    -------
+        a bool indicating whether xxhash is installed or not
+    """
+
+    return importlib.util.find_spec('xxhash') is not None
+
+
+XXHASH_INSTALLED = check_xxhash()
+
+if XXHASH_INSTALLED:
+    import xxhash
+
+
+def row_keys(X: np.ndarray) -> List[Hashable]:
+    """
+    Computes a key for each row of an array such that equal rows have equal keys.
+
+    Parameters
+    ----------
+    X
+        Array whose rows are hashed.
+
+    Returns
+    -------
+        A list of keys. The keys are the 64-bit xxhash digests of the row bytes if xxhash is installed and
+        the row bytes otherwise. Rows of object arrays are converted to tuples.
+    """
+
+    if X.dtype == object:
+        return [tuple(row) for row in X.reshape(X.shape[0], -1)]
+    X = np.ascontiguousarray(X)
+    rows = X.reshape(X.shape[0], -1).view(np.uint8)
+    if XXHASH_INSTALLED:
+        return [xxhash.xxh3_64_intdigest(row) for row in rows]
+
+    return [row.tobytes() for row in rows]
+
+
+def array_key(*arrays: np.ndarray, **params: Any) -> str:
+    """
+    Computes a key from the contents of arrays and parameters, such that arrays with equal dtypes, shapes and
+    values and equal parameters have equal keys.
+
+    Parameters
+    ----------
+    arrays
+        Arrays whose contents are hashed.
+    params
+        Parameters whose representations are hashed.
+
+    Returns
+    -------
+        The hexadecimal 128-bit xxhash digest of the arrays and parameters if xxhash is installed and their
+        blake2b digest otherwise.
+    """
+
+    digest = xxhash.xxh3_128() if XXHASH_INSTALLED else hashlib.blake2b(digest_size=16)
+    for X in arrays:
+        X = np.ascontiguousarray(X)
+        digest.update(repr((X.dtype.str, X.shape)).encode())
+        digest.update(X.reshape(-1).view(np.uint8).data)
+    digest.update(repr(sorted(params.items())).encode())
+
+    return digest.hexdigest()
+
+
+class PredictionCache(object):
+
+    def __init__(self, predictor: Callable, max_size: int = 100000):
+        """
+        Wraps a predictor and caches its predictions in a bounded LRU cache keyed by a hash of the input rows,
+        so that the predictor is called at most once for rows that are predicted repeatedly. Rows repeated
+        within a batch are also only predicted once.
+
+        Parameters
+        ----------
+        predictor
+            A callable that takes a tensor of N data points as inputs and returns N outputs.
+        max_size
+            Maximum number of cached predictions. When the cache is full, the least recently used predictions
+            are evicted.
+        """
+
+        self.predictor = predictor
+        self.max_size = max_size
+        self._cache = OrderedDict()  # type: OrderedDict
+        self.reset_stats()
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts a batch of data points, calling the predictor only on the rows whose predictions are not
+        cached.
+
+        Parameters
+        ----------
+        X
+            Data points.
+
+        Returns
+        -------
+            The predictions, as returned by the predictor.
+        """
+
+        keys = row_keys(X)
+        preds = [None] * len(keys)  # type: List
+        missing = OrderedDict()  # type: OrderedDict
+        for i, key in enumerate(keys):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                preds[i] = self._cache[key]
+            elif key in missing:
+                missing[key].append(i)
+            else:
+                missing[key] = [i]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            new_preds = self.predictor(X[[idx[0] for idx in missing.values()]])
+            for (key, idx), pred in zip(missing.items(), new_preds):
+                pred = pred.copy() if isinstance(pred, np.ndarray) else pred
+                for i in idx:
+                    preds[i] = pred
+                self._cache[key] = pred
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.n_evicted += 1
+
+        return np.array(preds)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        """
+        Removes the cached predictions.
+        """
+
+        self._cache.clear()
+
+    def reset_stats(self) -> None:
+        """
+        Resets the hit and miss counters.
+        """
+
+        self.hits, self.misses, self.n_evicted = 0, 0, 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of the rows predicted since the counters were reset whose predictions were cached.
+        """
+
+        total = self.hits + self.misses
+
+        return self.hits / total if total else 0.
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Cache statistics since the counters were reset.
+        """
+
+        return {
+            'prediction_cache_hits': self.hits,
+            'prediction_cache_misses': self.misses,
+            'prediction_cache_hit_rate': self.hit_rate,
+            'prediction_cache_evicted': self.n_evicted,
+            'prediction_cache_size': len(self._cache),
+        }
+
+
+def merge_cache_stats(stats: List[Dict[str, Union[int, float]]]) -> Dict[str, Union[int, float]]:
+    """
+    Sums the statistics of several prediction caches (see `PredictionCache.stats`). Empty statistics, returned
+    when the predictions are not cached, are ignored.
+    """
+
+    merged = {}  # type: Dict[str, Union[int, float]]
+    stats = [s for s in stats if s]
+    if not stats:
+        return merged
+    for key in stats[0]:
+        merged[key] = sum(s[key] for s in stats)
+    total = merged['prediction_cache_hits'] + merged['prediction_cache_misses']
+    merged['prediction_cache_hit_rate'] = merged['prediction_cache_hits'] / total if total else 0.
+
+    return merged
+
+
+class ArrayCache(object):
+
+    def __init__(self, max_bytes: int = 2 ** 26):
+        """
+        In-memory LRU cache of arrays, or tuples of arrays, bounded by the total size of the arrays. The cached
+        arrays are made read-only, since they can be returned to several callers.
+
+        Parameters
+        ----------
+        max_bytes
+            Maximum total size of the cached arrays in bytes. When the cache is full, the least recently used
+            entries are evicted. Values larger than max_bytes are not cached.
+        """
+
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()  # type: OrderedDict
+        self._nbytes = 0
+        self.reset_stats()
+
+    @staticmethod
+    def _arrays(value: Union[np.ndarray, tuple]) -> tuple:
+        return value if isinstance(value, tuple) else (value,)
+
+    def get(self, key: Hashable) -> Optional[Union[np.ndarray, tuple]]:
+        """
+        Returns the value stored for a key, or None if the key is not cached.
+        """
+
+        if key not in self._cache:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+
+        return self._cache[key]
+
+    def put(self, key: Hashable, value: Union[np.ndarray, tuple]) -> None:
+        """
+        Stores an array or a tuple of arrays for a key and evicts the least recently used entries if the cache
+        exceeds max_bytes.
+        """
+
+        size = sum(array.nbytes for array in self._arrays(value))
+        if size > self.max_bytes:
+            return
+        for array in self._arrays(value):
+            array.flags.writeable = False
+        if key in self._cache:
+            self._nbytes -= sum(array.nbytes for array in self._arrays(self._cache.pop(key)))
+        self._cache[key] = value
+        self._nbytes += size
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._nbytes -= sum(array.nbytes for array in self._arrays(evicted))
+            self.n_evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Total size of the cached arrays in bytes.
+        """
+
+        return self._nbytes
+
+    def clear(self) -> None:
+        """
+        Removes the cached arrays.
+        """
+
+        self._cache.clear()
+        self._nbytes = 0
+
+    def reset_stats(self) -> None:
+        """
+        Resets the hit and miss counters.
+        """
+
+        self.hits, self.misses, self.n_evicted = 0, 0, 0
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Cache statistics since the counters were reset.
+        """
+
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.,
+            'evicted': self.n_evicted,
+            'nbytes': self._nbytes,
+        }
+
+
+class PersistentCache(object):
+
+    def __init__(self, path: str, max_entries: int = None, max_bytes: int = 2 ** 28, commit_every: int = 100):
+        """
+        Key-value cache stored in a sqlite file, so that values computed by a process can be reused by other
+        processes and later runs. The keys are strings and the values are bytes. When the cache exceeds its
+        size limits, the least recently used entries are evicted.
+
+        Writes are buffered in memory and committed in a single transaction, so the file is only locked
+        briefly and can be shared by several processes.
+
+        Parameters
+        ----------
+        path
+            Path of the sqlite file. Created if it does not exist.
+        max_entries
+            Maximum number of entries. Unlimited if None.
+        max_bytes
+            Maximum total size of the keys and values in bytes. Unlimited if None.
+        commit_every
+            Number of buffered writes (insertions and updates of the last access times) after which they are
+            committed to the file. The size limits are enforced when the writes are committed. Writes are
+            also committed by `flush` and `close`.
+        """
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self._connection = None  # type: sqlite3.Connection
+        self._pending = {}  # type: Dict[str, Tuple[bytes, float]]
+        self._accessed = {}  # type: Dict[str, float]
+        self.reset_stats()
+        self._connect()
+
+    def _connect(self) -> None:
+        """
+        Opens the sqlite file and creates the cache table if needed.
+        """
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=30.)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)'
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS cache_last_used ON cache (last_used)')
+        self._sync_size()
+
+    def _sync_size(self) -> None:
+        """
+        Reads the number of entries and their total size in bytes.
+        """
+
+        self._n_entries, self._nbytes = self._connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()
+
+    def __getstate__(self) -> dict:
+        self.flush()
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._connect()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the value stored for a key, or None if the key is not cached.
+        """
+
+        if key in self._pending:
+            self.hits += 1
+            self._pending[key] = (self._pending[key][0], time.time())
+            return self._pending[key][0]
+
+        row = self._connection.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._accessed[key] = time.time()
+        self._written()
+
+        return bytes(row[0])
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Stores a value for a key.
+        """
+
+        self._pending[key] = (bytes(value), time.time())
+        self._accessed.pop(key, None)
+        self._written()
+
+    def _written(self) -> None:
+        if len(self._pending) + len(self._accessed) >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Commits the buffered writes to the file and evicts the least recently used entries if the cache
+        exceeds its limits.
+        """
+
+        if self._connection is None:
+            return
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                [(key, sqlite3.Binary(value), len(key.encode()) + len(value), last_used)
+                 for key, (value, last_used) in self._pending.items()]
+            )
+            self._connection.executemany(
+                'UPDATE cache SET last_used = ? WHERE key = ?',
+                [(last_used, key) for key, last_used in self._accessed.items()]
+            )
+            self._sync_size()
+            if self._exceeds_limits():
+                self._evict()
+        self._pending.clear()
+        self._accessed.clear()
+
+    def _exceeds_limits(self) -> bool:
+        return (self.max_entries is not None and self._n_entries > self.max_entries) or \
+               (self.max_bytes is not None and self._nbytes > self.max_bytes)
+
+    def _evict(self) -> None:
+        """
+        Deletes the least recently used entries until the cache is within its limits.
+        """
+
+        evicted = []
+        # the rows are read lazily through the last_used index, so only the evicted rows are read
+        for key, size in self._connection.execute('SELECT key, size FROM cache ORDER BY last_used'):
+            if not self._exceeds_limits():
+                break
+            evicted.append((key,))
+            self._n_entries -= 1
+            self._nbytes -= size
+        self._connection.executemany('DELETE FROM cache WHERE key = ?', evicted)
+        self.n_evicted += len(evicted)
+
+    def close(self) -> None:
+        """
+        Commits the buffered writes and closes the file.
+        """
+
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+    def clear(self) -> None:
+        """
+        Removes all the entries.
+        """
+
+        self._pending.clear()
+        self._accessed.clear()
+        with self._connection:
+            self._connection.execute('DELETE FROM cache')
+        self._sync_size()
+
+    def __len__(self) -> int:
+        """
+        Number of entries in the file when the writes were last committed.
+        """
+
+        return self._n_entries
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Total size of the keys and values in bytes when the writes were last committed.
+        """
+
+        return self._nbytes
+
+    def reset_stats(self) -> None:
+        """
+        Resets the hit and miss counters.
+        """
+
+        self.hits, self.misses, self.n_evicted = 0, 0, 0
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Cache statistics since the counters were reset.
+        """
+
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.,
+            'evicted': self.n_evicted,
+        }
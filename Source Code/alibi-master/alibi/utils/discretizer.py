@@ -2,32 +2,161 @@ import numpy as np
 
 from alibi.tests.utils import issorted
 from functools import partial
-from typing import Dict, Callable, List, Sequence, Union
+from typing import Dict, Callable, Iterable, Iterator, List, Sequence, Union
+
+
+class QuantileSketch(object):
+
+    def __init__(self, k: int = 2048, seed: int = 0) -> None:
+        """
+        Mergeable quantile sketch in the style of KLL (Karnin, Lang and Liberty, 2016). Values are added
+        to level 0 of a hierarchy of buffers. When a buffer holds more than k values, it is sorted and
+        every second value, starting at a random offset, is moved to the next level, where each value
+        stands for twice as many values. The sketch therefore stores O(k log(n / k)) values.
+
+        Each such compaction at level h changes the rank of any value by at most 2 ** h, so the sketch
+        keeps track of a guaranteed bound on the rank error of the quantiles (see `rank_error`). The
+        expected error is much lower since the errors of different compactions tend to cancel out.
+        If at most k values are added, the quantiles are exact.
+
+        Parameters
+        ----------
+        k
+            Maximum number of values in a buffer. The rank error bound decreases as 1 / k.
+        seed
+            Seed of the random offsets, so that the same sequence of updates gives the same quantiles.
+        """
+
+        self.k = k
+        self.n = 0
+        self.max_rank_error = 0
+        self.levels = []  # type: List[np.ndarray]
+        self._rng = np.random.RandomState(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """
+        Bound on the rank error of the quantiles, as a fraction of the number of values added. For
+        instance, with a rank error of 0.001, the value returned for the 50th percentile lies between
+        the 49.9th and the 50.1th percentiles.
+        """
+
+        return self.max_rank_error / self.n if self.n else 0.
+
+    def update(self, x: np.ndarray) -> None:
+        """
+        Adds values to the sketch. NaN values are ignored.
+        """
+
+        x = np.asarray(x, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if not self.levels:
+            self.levels.append(np.zeros(0))
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self.n += x.shape[0]
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Adds the values summarized by another sketch, e.g. a sketch of a different chunk of data.
+        """
+
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.zeros(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.max_rank_error += other.max_rank_error
+        self._compress()
+
+    def _compress(self) -> None:
+        """
+        Compacts the buffers that hold more than k values.
+        """
+
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if items.shape[0] > self.k:
+                items = np.sort(items)
+                n_even = items.shape[0] - items.shape[0] % 2
+                promoted = items[self._rng.randint(2):n_even:2]
+                self.levels[h] = items[n_even:]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.max_rank_error += 2 ** h
+            h += 1
+
+    def percentiles(self, q: Union[float, Sequence[float]]) -> np.ndarray:
+        """
+        Computes percentiles of the values added to the sketch, interpolating linearly between values
+        like `np.percentile`, to which the result is equal if the sketch did not compact any values.
+
+        Parameters
+        ----------
+        q
+            Percentiles to compute, between 0 and 100.
+
+        Returns
+        -------
+            The percentiles.
+        """
+
+        if not self.n:
+            raise ValueError("Cannot compute percentiles of an empty sketch!")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.shape[0], 2 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cum_weights = items[order], np.cumsum(weights[order])
+        # positions in the sorted values, where a value of weight w is repeated w times
+        positions = np.asarray(q, dtype=np.float64) / 100 * (self.n - 1)
+        lower, upper = np.floor(positions), np.ceil(positions)
+        lower_values = items[np.searchsorted(cum_weights, lower, side='right')]
+        upper_values = items[np.searchsorted(cum_weights, upper, side='right')]
+
+        return lower_values + (upper_values - lower_values) * (positions - lower)
 
 
 class Discretizer(object):
 
-    def __init__(self, data: np.ndarray, numerical_features: List[int], feature_names: List[str],
-                 percentiles: Sequence[Union[int, float]] = (25, 50, 75)) -> None:
+    def __init__(self, data: Union[np.ndarray, Iterable[np.ndarray]], numerical_features: List[int],
+                 feature_names: List[str], percentiles: Sequence[Union[int, float]] = (25, 50, 75),
+                 sketch_size: int = 2048, seed: int = 0) -> None:
         """
         Initialize the discretizer
 
         Parameters
         ----------
         data
-            Data to discretize
+            Data to discretize. Can also be an iterable of chunks of rows as 2-D arrays, e.g. read from files,
+            in which case the percentiles are estimated with a quantile sketch of each feature (see
+            `QuantileSketch`) and the data does not need to fit in memory. The estimation error is given by
+            `rank_error`. Other inputs, e.g. data frames or nested lists, raise a `TypeError`.
         numerical_features
             List of indices corresponding to the continuous feature columns. Only these features will be discretized.
         feature_names
             List with feature names
         percentiles
             Percentiles used for discretization
+        sketch_size
+            Size of the quantile sketch buffers if the data is passed in chunks.
+        seed
+            Seed of the quantile sketches.
         """
 
         self.to_discretize = numerical_features
         self.percentiles = percentiles
+        self.sketch_size = sketch_size
+        self.seed = seed
+        self.sketches = {}  # type: Dict[int, QuantileSketch]
 
-        bins = self.bins(data)
+        if isinstance(data, np.ndarray):
+            bins = self.bins(data)
+        elif isinstance(data, Iterable) and not isinstance(data, (str, bytes)):
+            bins = self.sketch_bins(data)
+        else:
+            raise TypeError("Expected a numpy array or an iterable of 2-D numpy arrays, got {}.".format(type(data)))
         bins = [np.unique(x) for x in bins]
 
         self.feature_intervals = {}  # type: Dict[int, list]
@@ -89,6 +218,37 @@ class Discretizer(object):
 
         return bins
 
+    def sketch_bins(self, chunks: Iterable[np.ndarray]) -> List[np.ndarray]:
+        """
+        Parameters
+        ----------
+        chunks
+            Chunks of rows of the data to discretize.
+
+        Returns
+        -------
+        List with bin values for each feature that is discretized, estimated with quantile sketches.
+        """
+
+        self.sketches = {feature: QuantileSketch(k=self.sketch_size, seed=self.seed) for feature in self.to_discretize}
+        for chunk in chunks:
+            if not isinstance(chunk, np.ndarray) or chunk.ndim != 2:
+                raise TypeError("Expected the data chunks to be 2-D numpy arrays, got {}. Convert data frames "
+                                "and lists to numpy arrays first.".format(type(chunk)))
+            for feature in self.to_discretize:
+                self.sketches[feature].update(chunk[:, feature])
+
+        return [self.sketches[feature].percentiles(self.percentiles) for feature in self.to_discretize]
+
+    @property
+    def rank_error(self) -> float:
+        """
+        Bound on the rank error of the percentiles used for discretization, as a fraction of the number
+        of rows. The percentiles are exact (0) unless the discretizer was fitted on chunks of data.
+        """
+
+        return max([sketch.rank_error for sketch in self.sketches.values()], default=0.)
+
     def discretize(self, data: np.ndarray) -> np.ndarray:
         """
         Parameters
@@ -109,3 +269,18 @@ class Discretizer(object):
                 data_disc[:, feature] = self.lambdas[feature](data_disc[:, feature]).astype(int)
 
         return data_disc
+
+    def discretize_chunks(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """
+        Parameters
+        ----------
+        chunks
+            Chunks of rows of the data to discretize.
+
+        Returns
+        -------
+        An iterator over the discretized chunks.
+        """
+
+        for chunk in chunks:
+            yield self.discretize(chunk)
@@ -1,3 +1,23 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import traceback
+import weakref
+import numpy as np
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from multiprocessing.context import DefaultContext, ForkContext, ForkServerContext, SpawnContext
+from multiprocessing.reduction import ForkingPickler
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple, Union, cast
+
+logger = logging.getLogger(__name__)
+
+
 def check_ray():
     """
     Checks if ray is installed
@@ -14,7 +34,479 @@ def check_ray():
     return False
 
 
+def check_shared_memory():
+    """
+    Checks if the multiprocessing.shared_memory module (python>=3.8) is available
+
+    Returns:
+    -------
+        a bool indicating whether shared memory blocks can be created
+    """
+
+    import importlib
+    spec = importlib.util.find_spec('multiprocessing.shared_memory')
+    if spec:
+        return True
+    return False
+
+
 RAY_INSTALLED = check_ray()
+SHARED_MEMORY_AVAILABLE = check_shared_memory()
+
+# shared memory blocks mapped by the current process, kept alive as long as the process runs
+_ATTACHED_BLOCKS = {}  # type: Dict[str, Any]
+
+
+class SharedArray(object):
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        """
+        Handle to a numpy array stored in a shared memory block. The handle only contains the block name
+        and the array shape and type so it can be sent to other processes cheaply. The array is mapped in
+        the receiving process without copying the data.
+
+        Parameters
+        ----------
+        name
+            Name of the shared memory block.
+        shape, dtype
+            Shape and type of the array.
+        """
+
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> Tuple["SharedArray", Any]:
+        """
+        Copies an array to a new shared memory block.
+
+        Returns
+        -------
+            A handle to the array and the shared memory block. The caller owns the block and should
+            unlink it when the array is no longer needed.
+        """
+
+        from multiprocessing.shared_memory import SharedMemory
+
+        array = np.ascontiguousarray(array)
+        block = SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+
+        return cls(block.name, array.shape, array.dtype.str), block
+
+    def attach(self) -> np.ndarray:
+        """
+        Maps the shared array in the current process.
+        """
+
+        if self.name not in _ATTACHED_BLOCKS:
+            from multiprocessing.shared_memory import SharedMemory
+
+            # the process that created the block is responsible for releasing it. Before python 3.13 blocks
+            # are always tracked, which is harmless for child processes since they share the tracker of
+            # the parent process
+            try:
+                block = SharedMemory(name=self.name, track=False)  # type: ignore
+            except TypeError:
+                block = SharedMemory(name=self.name)
+            _ATTACHED_BLOCKS[self.name] = block
+
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=_ATTACHED_BLOCKS[self.name].buf)
+
+
+class MemmapArray(object):
+
+    def __init__(self, path: str, shape: Tuple[int, ...], dtype: str, offset: int = 0, order: str = 'C'):
+        """
+        Handle to a numpy array stored in a file, e.g. a .npy file. Like `SharedArray`, the handle can be sent to
+        other processes cheaply and all the processes that map the file share the same physical pages.
+
+        Parameters
+        ----------
+        path
+            Path to the file.
+        shape, dtype
+            Shape and type of the array.
+        offset
+            Position of the array data in the file, in bytes.
+        order
+            Memory layout of the array, 'C' or 'F'.
+        """
+
+        self.path = path
+        self.shape = shape
+        self.dtype = dtype
+        self.offset = offset
+        self.order = order
+
+    @classmethod
+    def create(cls, array: np.ndarray, directory: str) -> "MemmapArray":
+        """
+        Writes an array to a new .npy file in directory.
+        """
+
+        fd, path = tempfile.mkstemp(suffix='.npy', dir=directory)
+        os.close(fd)
+        memmap = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+        memmap[:] = array
+        memmap.flush()
+        offset = memmap.offset
+        del memmap
+
+        return cls(path, array.shape, array.dtype.str, offset=offset)
+
+    @classmethod
+    def from_memmap(cls, array: np.ndarray) -> "MemmapArray":
+        """
+        Handle to an array memory-mapped from a file, e.g. with `np.load(path, mmap_mode='r')` or `np.memmap`,
+        or to a contiguous slice of such an array. The file is not copied.
+        """
+
+        if not isinstance(array, np.memmap) or array.filename is None:
+            raise TypeError("Expected an array memory-mapped from a file, got {}.".format(type(array)))
+        if array.flags.c_contiguous:
+            order = 'C'
+        elif array.flags.f_contiguous:
+            order = 'F'
+        else:
+            raise ValueError("Only contiguous memory-mapped arrays can be shared without copying them.")
+        # the offset of a slice is the offset of the array it was sliced from, the array data starts further
+        # into the file
+        root = array  # type: np.ndarray
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        offset = cast(np.memmap, root).offset + array.ctypes.data - root.ctypes.data
+
+        return cls(array.filename, array.shape, array.dtype.str, offset=offset, order=order)
+
+    def attach(self) -> np.ndarray:
+        """
+        Maps the array in the current process (read-only).
+        """
+
+        return np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.offset, shape=self.shape,
+                         order='F' if self.order == 'F' else 'C')
+
+
+STORAGE_TYPES = ['shared_memory', 'memmap']
+
+
+def _release_store(blocks: list, directory: str) -> None:
+    for block in blocks:
+        block.close()
+        block.unlink()
+    blocks.clear()
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class ArrayStore(object):
+
+    def __init__(self, storage: str = 'shared_memory', directory: str = None):
+        """
+        Stores arrays that are accessed by several processes so that the processes share one physical copy.
+
+        Parameters
+        ----------
+        storage
+            If 'shared_memory', the arrays are stored in multiprocessing.shared_memory blocks (python>=3.8).
+            If 'memmap', the arrays are written to .npy files which are memory-mapped by the processes.
+        directory
+            Directory where the files are created for the 'memmap' storage. A temporary directory is
+            used by default. The files are deleted when the store is released.
+        """
+
+        if storage not in STORAGE_TYPES:
+            raise ValueError("Unknown storage {}. Accepted values are {}".format(storage, STORAGE_TYPES))
+        if storage == 'shared_memory' and not SHARED_MEMORY_AVAILABLE:
+            raise ImportError("multiprocessing.shared_memory requires python>=3.8. Use storage='memmap' instead.")
+
+        self.storage = storage
+        self._blocks = []  # type: list
+        self.directory = tempfile.mkdtemp(prefix='alibi-', dir=directory) if storage == 'memmap' else None
+        self._finalizer = weakref.finalize(self, _release_store, self._blocks, self.directory)
+
+    def put(self, array: np.ndarray) -> Union[SharedArray, MemmapArray]:
+        """
+        Stores an array.
+
+        Returns
+        -------
+            A handle that can be passed to other processes, where the array is mapped by calling
+            `attach_array`.
+        """
+
+        if self.storage == 'memmap':
+            return MemmapArray.create(array, self.directory)
+        handle, block = SharedArray.create(array)
+        self._blocks.append(block)
+
+        return handle
+
+    def release(self) -> None:
+        """
+        Releases the stored arrays. Processes that mapped the arrays should no longer access them.
+        """
+
+        self._finalizer()
+
+
+def attach_array(value: Any) -> Any:
+    """
+    Maps an array stored in an `ArrayStore` in the current process. Other values are returned unchanged.
+    """
+
+    return value.attach() if isinstance(value, (SharedArray, MemmapArray)) else value
+
+
+def _resolve(value: Any) -> Any:
+    """
+    Maps shared arrays passed as arguments to actor methods.
+    """
+
+    return attach_array(value)
+
+
+def _serve_actor(conn: Any, cls: type, args: tuple) -> None:
+    """
+    Creates an object in the actor process and executes the method calls received through conn in order.
+    The result of each call, or the exception it raised, is sent back through conn.
+    """
+
+    try:
+        obj, error = cls(*[_resolve(arg) for arg in args]), None
+    except Exception as e:
+        obj, error = None, e
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        name, args, kwargs = request
+        try:
+            if error is not None:
+                raise error
+            response = (True, getattr(obj, name)(*[_resolve(arg) for arg in args], **kwargs))
+        except Exception as e:
+            response = (False, e)
+        try:
+            conn.send(response)
+        except Exception:
+            # the exception (or result) could not be pickled
+            conn.send((False, RuntimeError(traceback.format_exc())))
+    conn.close()
+
+
+class ProcessActor(object):
+
+    def __init__(self, cls: type, *args: Any, context: str = None):
+        """
+        Runs an object in a dedicated process, similar to a ray actor. Methods are called with
+        `actor.method.remote(*args, **kwargs)`, which returns a `concurrent.futures.Future` that is
+        resolved when the call completes. The calls are executed in the order they are submitted.
+
+        Parameters
+        ----------
+        cls
+            Class of the object created in the actor process.
+        *args
+            Arguments passed to the class constructor. `SharedArray` arguments are mapped in the
+            actor process.
+        context
+            The multiprocessing start method. The platform default is used if not specified.
+        """
+
+        # `get_context` is typed as returning a `BaseContext`, but every start method returns a concrete context
+        ctx = cast(Union[DefaultContext, SpawnContext, ForkContext, ForkServerContext],
+                   multiprocessing.get_context(context))
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_serve_actor, args=(child_conn, cls, args), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._pending = deque()  # type: deque
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+
+    def __getattr__(self, name: str) -> SimpleNamespace:
+        if name.startswith('__') and name != '__call__':
+            raise AttributeError(name)
+
+        return SimpleNamespace(remote=lambda *args, **kwargs: self._submit(name, args, kwargs))
+
+    def _submit(self, name: str, args: tuple, kwargs: dict) -> Future:
+        # the call is pickled before its future is queued, so that a call whose arguments cannot be pickled
+        # does not leave a future that would receive the result of the next call
+        request = ForkingPickler.dumps((name, args, kwargs))
+        future = Future()  # type: Future
+        with self._lock:
+            self._pending.append(future)
+            try:
+                self._conn.send_bytes(request)
+            except BaseException:
+                self._pending.pop()
+                raise
+
+        return future
+
+    def _read_results(self) -> None:
+        """
+        Resolves the futures of the submitted calls as their results are returned by the actor process.
+        """
+
+        while True:
+            try:
+                success, result = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.popleft()
+            if success:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+        while self._pending:
+            self._pending.popleft().set_exception(RuntimeError('The actor process exited.'))
+
+    @property
+    def pid(self) -> int:
+        """
+        Process id of the actor process.
+        """
+
+        return self._process.pid
+
+    def shutdown(self) -> None:
+        """
+        Stops the actor process after the pending calls complete.
+        """
+
+        if self._process.is_alive():
+            with self._lock:
+                self._conn.send(None)
+            self._process.join()
+        self._conn.close()
+
+
+def _release(actors: List[ProcessActor], store: ArrayStore) -> None:
+    for actor in actors:
+        actor.shutdown()
+    actors.clear()
+    if store is not None:
+        store.release()
+
+
+class MultiprocessingBackend(object):
+
+    def __init__(self, context: str = None, storage: str = 'shared_memory', directory: str = None):
+        """
+        Implements the subset of the ray API used by the distributed explainers (`put`, `get`, `wait` and
+        `remote` actors) with the standard library, so that they can run on a single machine where ray is
+        not available. Actors run in dedicated processes (see `ProcessActor`) and the arrays passed to `put`
+        are stored once in shared memory, so they are not copied to each actor.
+
+        Parameters
+        ----------
+        context
+            The multiprocessing start method used for the actor processes.
+        storage
+            How the arrays passed to `put` are stored (see `ArrayStore`). If None, or if shared memory is
+            not available (python<3.8) for the default storage, the arrays are copied to each actor when
+            passed to its constructor.
+        directory
+            See `ArrayStore`.
+        """
+
+        self.context = context
+        self.storage = storage
+        self.directory = directory
+        self._actors = []  # type: List[ProcessActor]
+        self._store = None  # type: ArrayStore
+        self._finalizer = None  # type: Any
+        self._reset()
+
+    def _reset(self) -> None:
+        if self.storage is None or (self.storage == 'shared_memory' and not SHARED_MEMORY_AVAILABLE):
+            self._store = None
+        else:
+            self._store = ArrayStore(self.storage, directory=self.directory)
+        self._finalizer = weakref.finalize(self, _release, self._actors, self._store)
+
+    @staticmethod
+    def is_initialized() -> bool:
+        return True
+
+    @staticmethod
+    def init(*args, **kwargs) -> None:
+        pass
+
+    def put(self, value: Any) -> Any:
+        """
+        Stores numpy arrays in shared memory and returns a handle that is mapped when passed to an actor.
+        Other objects, or arrays if no storage is used, are returned unchanged and copied to each actor
+        when passed to its constructor.
+        """
+
+        if self._store is None or not isinstance(value, np.ndarray) or value.dtype == object:
+            return value
+
+        return self._store.put(value)
+
+    @staticmethod
+    def get(futures: Any, timeout: float = None) -> Any:
+        """
+        Waits for the result of a future or a list of futures.
+        """
+
+        if isinstance(futures, list):
+            return [future.result(timeout=timeout) for future in futures]
+
+        return futures.result(timeout=timeout)
+
+    @staticmethod
+    def wait(futures: List[Future], num_returns: int = 1, timeout: float = None) -> Tuple[List, List]:
+        """
+        Waits until num_returns futures are completed or until timeout.
+
+        Returns
+        -------
+            A list with the completed futures (at most num_returns) and a list with the remaining futures.
+        """
+
+        done, not_done = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        while len(done) < num_returns and not_done:
+            more_done, not_done = wait(not_done, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not more_done:
+                break
+            done |= more_done
+        ready = [future for future in futures if future in done][:num_returns]
+
+        return ready, [future for future in futures if future not in ready]
+
+    def remote(self, cls: type) -> SimpleNamespace:
+        """
+        Returns an object whose `remote` method creates an actor running an instance of cls.
+        """
+
+        def create_actor(*args: Any) -> ProcessActor:
+            actor = ProcessActor(cls, *args, context=self.context)
+            self._actors.append(actor)
+            return actor
+
+        return SimpleNamespace(remote=create_actor)
+
+    def shutdown(self) -> None:
+        """
+        Stops the actor processes and releases the stored arrays. The backend can be used to create new
+        actors afterwards.
+        """
+
+        self._finalizer()
+        self._reset()
 
 
 class ActorPool(object):
@@ -23,7 +515,7 @@ class ActorPool(object):
         import ray
         ray = ray  # module as a static variable
 
-    def __init__(self, actors):
+    def __init__(self, actors, backend=None):
         """
         Taken fom the ray repository: https://github.com/ray-project/ray/pull/5945
         Create an Actor pool from a list of existing actors.
@@ -31,12 +523,17 @@ class ActorPool(object):
         lets you schedule Ray tasks over a fixed pool of actors.
         Arguments:
             actors (list): List of Ray actor handles to use in this pool.
+            backend: The module used to wait for the results of the actors,
+                ray by default. Pass a MultiprocessingBackend to schedule
+                tasks over ProcessActor actors.
         Examples:
             >>> a1, a2 = Actor.remote(), Actor.remote()
             >>> pool = ActorPool([a1, a2])
             >>> print(pool.map(lambda a, v: a.double.remote(v), [1, 2, 3, 4]))
             [2, 4, 6, 8]
         """
+        if backend is not None:
+            self.ray = backend
         self._idle_actors = list(actors)
         self._future_to_actor = {}
         self._index_to_future = {}
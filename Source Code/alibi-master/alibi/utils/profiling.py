@@ -0,0 +1,105 @@
+import time
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class Profiler(object):
+
+    def __init__(self) -> None:
+        """
+        Records the wall time spent in the phases of an algorithm, the number of times each phase is entered
+        and the number of rows (samples) it processes. Phases can be nested, in which case the time of the
+        inner phases is also included in the time of the outer phase.
+
+        Phases are recorded with the `phase` context manager, e.g.::
+
+            with profiler.phase('predict', rows=X.shape[0]):
+                predictor(X)
+        """
+
+        self.phases = {}  # type: Dict[str, dict]
+        self.cache_growth = []  # type: List[List[int]]
+
+    @contextmanager
+    def phase(self, name: str, rows: int = None) -> Iterator[None]:
+        """
+        Context manager that records the time spent in a phase.
+
+        Parameters
+        ----------
+        name
+            Name of the phase.
+        rows
+            Number of rows processed in the phase, if applicable.
+        """
+
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t_start, rows=rows)
+
+    def record(self, name: str, time_s: float, rows: int = None) -> None:
+        """
+        Adds a call of a phase that took time_s seconds and processed rows rows.
+        """
+
+        phase = self.phases.setdefault(name, {'calls': 0, 'time_s': 0.})
+        phase['calls'] += 1
+        phase['time_s'] += time_s
+        if rows is not None:
+            phase['rows'] = phase.get('rows', 0) + rows
+            phase['max_rows'] = max(phase.get('max_rows', 0), rows)
+
+    def record_cache(self, n_samples: int, nbytes: int) -> None:
+        """
+        Records the size of a cache after n_samples samples were drawn. Only changes in size are stored.
+        """
+
+        if not self.cache_growth or self.cache_growth[-1][1] != nbytes:
+            self.cache_growth.append([n_samples, nbytes])
+
+    def merge(self, summary: dict) -> None:
+        """
+        Adds the phases of a summary returned by another profiler (e.g. running in a different process).
+        The times of the phases are summed, so they can exceed the wall time if the phases ran in parallel.
+        """
+
+        for name, other in summary['phases'].items():
+            phase = self.phases.setdefault(name, {'calls': 0, 'time_s': 0.})
+            phase['calls'] += other['calls']
+            phase['time_s'] += other['time_s']
+            if 'rows' in other:
+                phase['rows'] = phase.get('rows', 0) + other['rows']
+                phase['max_rows'] = max(phase.get('max_rows', 0), other['max_rows'])
+
+    def summary(self) -> dict:
+        """
+        Returns
+        -------
+            A dictionary with the statistics of each phase under 'phases' (number of calls, total time in
+            seconds and, where applicable, total and max number of rows processed in a call) and the
+            `[n_samples, nbytes]` cache size changes under 'cache_growth'.
+        """
+
+        return {
+            'phases': {name: dict(phase) for name, phase in self.phases.items()},
+            'cache_growth': [list(entry) for entry in self.cache_growth],
+        }
+
+
+@contextmanager
+def _no_phase() -> Iterator[None]:
+    yield
+
+
+def profile_phase(profiler: Optional[Profiler], name: str, rows: int = None):
+    """
+    Returns a context manager that records a phase with profiler, or does nothing if profiler is None.
+    """
+
+    if profiler is None:
+        return _no_phase()
+
+    return profiler.phase(name, rows=rows)
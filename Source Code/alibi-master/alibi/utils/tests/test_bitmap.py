@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from alibi.utils import bitmap
+
+sizes = [1, 7, 8, 9, 1000]
+
+
+@pytest.mark.parametrize('size', sizes, ids='size={}'.format)
+def test_bitmap_roundtrip(size):
+    idx = np.unique(np.random.randint(0, size, size=size // 2 + 1))
+    bits = bitmap.from_indices(idx, size)
+
+    assert bits.dtype == np.uint8
+    assert bits.shape == ((size + 7) // 8, )
+    assert (bitmap.to_indices(bits, size) == idx).all()
+    assert bitmap.popcount(bits) == idx.size
+
+
+@pytest.mark.parametrize('size', sizes, ids='size={}'.format)
+def test_bitmap_intersect(size):
+    masks = np.random.randint(0, 2, size=(size, 3)).astype(bool)
+    bits = bitmap.pack(masks)
+    expected = masks.all(axis=1)
+    result = bitmap.intersect(*[np.ascontiguousarray(bits[:, col]) for col in range(masks.shape[1])])
+
+    assert (bitmap.popcount(bits) == masks.sum(axis=0)).all()
+    assert (bitmap.to_indices(result, size) == np.flatnonzero(expected)).all()
+    assert bitmap.popcount(result) == expected.sum()
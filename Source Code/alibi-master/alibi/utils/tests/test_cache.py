@@ -0,0 +1,166 @@
+import itertools
+import numpy as np
+import pickle
+import pytest
+
+from alibi.utils import cache as cache_module
+from alibi.utils.cache import ArrayCache, PersistentCache, PredictionCache, array_key, merge_cache_stats, row_keys
+
+
+class CountingPredictor:
+
+    def __init__(self, proba):
+        self.proba = proba
+        self.rows = 0
+
+    def __call__(self, X):
+        self.rows += X.shape[0]
+        scores = X.sum(axis=1)
+        return np.stack([scores, -scores], axis=1) if self.proba else (scores > 0).astype(int)
+
+
+def test_row_keys():
+    X = np.array([[0., 1.], [2., 3.], [0., 1.]])
+    keys = row_keys(X)
+    assert keys[0] == keys[2]
+    assert keys[0] != keys[1]
+    assert row_keys(X[:, ::-1].T.T[:, ::-1]) == keys  # non-contiguous input
+    assert row_keys(np.array([['a', 1], ['a', 1]], dtype=object)) == [('a', 1), ('a', 1)]
+
+
+def test_array_key():
+    X = np.arange(6.).reshape(2, 3)
+    assert array_key(X) == array_key(X.copy()) == array_key(np.asfortranarray(X))
+    assert array_key(X) != array_key(X.reshape(3, 2))
+    assert array_key(X) != array_key(X.astype(np.float32))
+    assert array_key(X, n_segments=10) != array_key(X, n_segments=11)
+    assert array_key(X, a=1, b=2) == array_key(X, b=2, a=1)
+
+
+def test_array_cache():
+    cache = ArrayCache(max_bytes=100)
+    cache.put('a', np.zeros(5))
+    cache.put('b', (np.zeros(2), np.zeros(2)))
+    assert cache.nbytes == 72
+    assert not cache.get('a').flags.writeable
+    # b is the least recently used entry
+    cache.put('c', np.zeros(4))
+    assert cache.get('b') is None
+    assert len(cache) == 2
+    assert cache.nbytes == 72
+    # values larger than the cache are not stored
+    cache.put('d', np.zeros(13))
+    assert cache.get('d') is None
+    assert cache.stats == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3, 'evicted': 1, 'nbytes': 72}
+
+
+@pytest.mark.parametrize('proba', [True, False], ids='proba={}'.format)
+def test_prediction_cache(proba):
+    predictor = CountingPredictor(proba)
+    cache = PredictionCache(predictor, max_size=5)
+    X = np.random.normal(size=(4, 3))
+    batch = X[[0, 1, 0, 2, 1]]
+
+    preds = cache(batch)
+    assert (preds == predictor(batch)).all()
+    predictor.rows = 0
+    # duplicates within a batch are predicted once
+    assert cache.stats['prediction_cache_hits'] == 2
+    assert cache.stats['prediction_cache_misses'] == 3
+
+    preds = cache(X)
+    assert (preds == CountingPredictor(proba)(X)).all()
+    assert predictor.rows == 1
+    assert cache.hit_rate == 5 / 9
+
+    # the least recently used prediction is evicted
+    new = np.random.normal(size=(2, 3))
+    cache(new)
+    assert len(cache) == 5
+    assert cache.stats['prediction_cache_evicted'] == 1
+    predictor.rows = 0
+    cache(X[[0]])
+    assert predictor.rows == 1
+
+    cache.reset_stats()
+    assert cache.stats['prediction_cache_hits'] == cache.stats['prediction_cache_misses'] == 0
+
+
+def test_merge_cache_stats():
+    stats = [
+        {'prediction_cache_hits': 1, 'prediction_cache_misses': 3, 'prediction_cache_hit_rate': 0.25},
+        {'prediction_cache_hits': 3, 'prediction_cache_misses': 1, 'prediction_cache_hit_rate': 0.75},
+        {},
+    ]
+    merged = merge_cache_stats(stats)
+    assert merged == {'prediction_cache_hits': 4, 'prediction_cache_misses': 4, 'prediction_cache_hit_rate': 0.5}
+    assert merge_cache_stats([{}, {}]) == {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # distinct, increasing access times so that the least recently used entry is well defined
+    ticks = itertools.count()
+    monkeypatch.setattr(cache_module.time, 'time', lambda: float(next(ticks)))
+
+
+def test_persistent_cache(tmp_path, clock):
+    path = str(tmp_path / 'cache' / 'cache.sqlite')
+    cache = PersistentCache(path, max_entries=3, commit_every=1)
+    assert cache.get('a') is None
+    for key in 'abc':
+        cache.put(key, key.encode() * 2)
+    assert cache.get('a') == b'aa'
+    assert cache.stats == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'evicted': 0}
+
+    # b is the least recently used entry
+    cache.put('d', b'dd')
+    assert len(cache) == 3
+    assert cache.get('b') is None
+    assert cache.n_evicted == 1
+
+    # overwriting an entry updates the size but not the number of entries
+    cache.put('d', b'dddd')
+    assert len(cache) == 3
+    assert cache.nbytes == 3 + 3 + 5  # key and value bytes of a, c and d
+
+    # the entries are persisted and shared with other handles on the file
+    cache.close()
+    reopened = PersistentCache(path, max_entries=3)
+    assert len(reopened) == 3
+    assert reopened.get('d') == b'dddd'
+    unpickled = pickle.loads(pickle.dumps(reopened))
+    assert unpickled.get('c') == b'cc'
+    reopened.clear()
+    assert len(reopened) == 0
+    assert reopened.nbytes == 0
+
+
+def test_persistent_cache_buffered_writes(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = PersistentCache(path, max_entries=2, commit_every=3)
+    other = PersistentCache(path)
+    cache.put('a', b'a')
+    cache.put('b', b'b')
+    assert cache.get('a') == b'a'
+    assert other.get('a') is None
+    # the third write commits the buffered writes without locking the file for the other handle
+    cache.put('c', b'c')
+    other.put('d', b'd')
+    other.flush()
+    assert other.get('a') == b'a'
+    # the limits are enforced when the writes are committed, b being the least recently used entry
+    assert len(cache) == 2
+    assert cache.get('b') is None
+
+
+def test_persistent_cache_max_bytes(tmp_path, clock):
+    cache = PersistentCache(str(tmp_path / 'cache.sqlite'), max_bytes=20, commit_every=1)
+    for i in range(4):
+        cache.put(str(i), bytes(5))  # 6 bytes per entry
+    assert len(cache) == 3
+    assert cache.nbytes == 18
+    assert cache.get('0') is None
+    cache.put('big', bytes(14))
+    assert len(cache) == 1
+    assert cache.get('big') == bytes(14)
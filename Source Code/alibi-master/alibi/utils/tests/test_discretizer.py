@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from alibi.utils.discretizer import Discretizer, QuantileSketch
+
+percentiles = np.arange(5, 100, 5)
+
+
+def test_sketch_exact():
+    x = np.random.normal(size=1000)
+    sketch = QuantileSketch(k=1000)
+    for chunk in np.array_split(x, 7):
+        sketch.update(chunk)
+    assert sketch.rank_error == 0.
+    assert np.allclose(sketch.percentiles(percentiles), np.percentile(x, percentiles))
+
+
+@pytest.mark.parametrize('n_chunks', [1, 20])
+def test_sketch_rank_error(n_chunks):
+    x = np.random.standard_cauchy(size=200000)
+    sketch = QuantileSketch(k=256, seed=1)
+    for chunk in np.array_split(x, n_chunks):
+        sketch.update(chunk)
+    assert sketch.n == x.shape[0]
+    assert 0. < sketch.rank_error < 0.1
+    assert sum(items.shape[0] for items in sketch.levels) < 256 * len(sketch.levels)
+
+    # the ranks of the estimated percentiles are within the rank error bound
+    ranks = np.searchsorted(np.sort(x), sketch.percentiles(percentiles), side='right') / x.shape[0]
+    assert np.abs(ranks - percentiles / 100).max() <= sketch.rank_error + 1 / x.shape[0]
+
+    # reproducible
+    other = QuantileSketch(k=256, seed=1)
+    for chunk in np.array_split(x, n_chunks):
+        other.update(chunk)
+    assert (other.percentiles(percentiles) == sketch.percentiles(percentiles)).all()
+
+
+def test_sketch_merge():
+    x = np.random.normal(size=50000)
+    sketches = []
+    for chunk in np.array_split(x, 4):
+        sketches.append(QuantileSketch(k=256))
+        sketches[-1].update(chunk)
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    assert merged.n == x.shape[0]
+    ranks = np.searchsorted(np.sort(x), merged.percentiles(percentiles), side='right') / x.shape[0]
+    assert np.abs(ranks - percentiles / 100).max() <= merged.rank_error + 1 / x.shape[0]
+
+
+def test_sketch_empty():
+    with pytest.raises(ValueError):
+        QuantileSketch().percentiles(50)
+
+
+def test_discretizer_chunks():
+    data = np.random.normal(size=(3000, 3))
+    feature_names = ['a', 'b', 'c']
+    disc = Discretizer(data, [0, 2], feature_names)
+    chunks = np.array_split(data, 10)
+    chunk_disc = Discretizer(iter(chunks), [0, 2], feature_names, sketch_size=5000)
+    assert disc.rank_error == chunk_disc.rank_error == 0.
+    assert chunk_disc.feature_intervals == disc.feature_intervals
+    d_chunks = list(chunk_disc.discretize_chunks(chunks))
+    assert (np.concatenate(d_chunks) == disc.discretize(data)).all()
+
+    # with compaction, the percentiles are approximate
+    sketch_disc = Discretizer(iter(chunks), [0, 2], feature_names, sketch_size=64)
+    assert sketch_disc.rank_error > 0.
+    assert set(sketch_disc.sketches.keys()) == {0, 2}
+
+
+@pytest.mark.parametrize('data', [
+    pytest.param([[0., 1.], [2., 3.]], id='nested_list'),
+    pytest.param([np.zeros(3)], id='1d_chunks'),
+    pytest.param(1., id='scalar'),
+])
+def test_discretizer_bad_data(data):
+    with pytest.raises(TypeError):
+        Discretizer(data, [0], ['a', 'b'])
@@ -0,0 +1,125 @@
+import threading
+import numpy as np
+import pytest
+
+from alibi.utils.distributed import ActorPool, ArrayStore, MemmapArray, MultiprocessingBackend, \
+    SHARED_MEMORY_AVAILABLE, SharedArray, attach_array
+
+
+class Actor:
+
+    def __init__(self, data):
+        self.data = data
+
+    def __call__(self, rows):
+        return [self.data[row].sum() for row in rows]
+
+    def is_shared(self):
+        return not self.data.flags['OWNDATA']
+
+    def fail(self):
+        raise ValueError('fail')
+
+
+@pytest.fixture
+def backend():
+    backend = MultiprocessingBackend()
+    yield backend
+    backend.shutdown()
+
+
+def test_process_actor(backend):
+    data = np.arange(20).reshape(10, 2)
+    actor = backend.remote(Actor).remote(backend.put(data))
+    futures = [actor.__call__.remote([row]) for row in range(10)]
+    assert backend.get(futures) == [[data[row].sum()] for row in range(10)]
+    assert backend.get(actor.is_shared.remote()) == SHARED_MEMORY_AVAILABLE
+    with pytest.raises(ValueError):
+        backend.get(actor.fail.remote())
+    # the actor is still usable after a call fails
+    assert backend.get(actor.__call__.remote([0])) == [data[0].sum()]
+    # or after the arguments of a call cannot be sent to the actor process
+    with pytest.raises(TypeError):
+        actor.__call__.remote([threading.Lock()])
+    assert backend.get(actor.__call__.remote([1])) == [data[1].sum()]
+
+
+@pytest.mark.skipif(not SHARED_MEMORY_AVAILABLE, reason='multiprocessing.shared_memory requires python>=3.8')
+def test_shared_array():
+    data = np.random.normal(size=(5, 3)).astype(np.float32)
+    handle, block = SharedArray.create(data)
+    try:
+        shared = handle.attach()
+        assert shared.dtype == data.dtype
+        assert (shared == data).all()
+    finally:
+        block.close()
+        block.unlink()
+
+
+@pytest.mark.parametrize('storage', ['shared_memory', 'memmap'])
+def test_array_store(storage, tmp_path):
+    if storage == 'shared_memory' and not SHARED_MEMORY_AVAILABLE:
+        pytest.skip('multiprocessing.shared_memory requires python>=3.8')
+    data = np.random.normal(size=(5, 3))
+    store = ArrayStore(storage, directory=str(tmp_path))
+    handle = store.put(data)
+    shared = attach_array(handle)
+    assert not shared.flags['OWNDATA']
+    assert (shared == data).all()
+    assert attach_array(data) is data
+    del shared
+    store.release()
+    if storage == 'memmap':
+        assert not list(tmp_path.iterdir())
+
+
+def test_memmap_array(tmp_path):
+    data = np.arange(30.).reshape(10, 3)
+    path = str(tmp_path / 'data.npy')
+    np.save(path, data)
+    loaded = np.load(path, mmap_mode='r')
+    raw_path = str(tmp_path / 'data.bin')
+    data.astype(np.float32).tofile(raw_path)
+    raw = np.memmap(raw_path, dtype=np.float32, mode='r', shape=(10, 3))
+
+    # the handles map the rows of the array only, not the whole file
+    for array, expected in [(loaded, data), (loaded[2:5], data[2:5]), (raw[7:], data[7:])]:
+        attached = MemmapArray.from_memmap(array).attach()
+        assert attached.shape == expected.shape
+        assert (attached == expected).all()
+    with pytest.raises(ValueError):
+        MemmapArray.from_memmap(loaded[:, 1])
+    with pytest.raises(TypeError):
+        MemmapArray.from_memmap(data)
+
+
+@pytest.mark.parametrize('storage', ['memmap', None])
+def test_backend_storage(storage):
+    backend = MultiprocessingBackend(storage=storage)
+    try:
+        data = np.arange(20).reshape(10, 2)
+        actor = backend.remote(Actor).remote(backend.put(data))
+        assert backend.get(actor.__call__.remote([1])) == [data[1].sum()]
+        if storage is not None:
+            assert backend.get(actor.is_shared.remote())
+    finally:
+        backend.shutdown()
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+@pytest.mark.parametrize('chunksize', [1, 3])
+def test_actor_pool(backend, ordered, chunksize):
+    data = np.arange(20).reshape(10, 2)
+    data_id = backend.put(data)
+    actors = [backend.remote(Actor).remote(data_id) for _ in range(2)]
+    pool = ActorPool(actors, backend=backend)
+    pool_map = pool.map if ordered else pool.map_unordered
+    results = list(pool_map(lambda actor, rows: actor.__call__.remote(rows), list(range(10)), chunksize))
+    assert len(results) == -(-10 // chunksize)
+    sums = [row_sum for chunk in results for row_sum in chunk]
+    expected = [data[row].sum() for row in range(10)]
+    if ordered:
+        assert sums == expected
+    else:
+        assert sorted(sums) == expected
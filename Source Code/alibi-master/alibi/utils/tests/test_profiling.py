@@ -0,0 +1,31 @@
+import time
+
+from alibi.utils.profiling import Profiler, profile_phase
+
+
+def test_profiler():
+    profiler = Profiler()
+    for rows in [3, 5]:
+        with profiler.phase('outer', rows=rows):
+            with profile_phase(profiler, 'inner'):
+                time.sleep(0.001)
+    with profile_phase(None, 'ignored'):
+        pass
+    profiler.record_cache(10, 100)
+    profiler.record_cache(20, 100)
+    profiler.record_cache(30, 200)
+
+    summary = profiler.summary()
+    outer, inner = summary['phases']['outer'], summary['phases']['inner']
+    assert set(summary['phases']) == {'outer', 'inner'}
+    assert outer['calls'] == inner['calls'] == 2
+    assert outer['rows'] == 8 and outer['max_rows'] == 5
+    assert 'rows' not in inner
+    assert outer['time_s'] >= inner['time_s'] >= 0.002
+    assert summary['cache_growth'] == [[10, 100], [30, 200]]
+
+    other = Profiler()
+    other.merge(summary)
+    other.merge(summary)
+    merged = other.summary()['phases']['outer']
+    assert merged['calls'] == 4 and merged['rows'] == 16 and merged['max_rows'] == 5
@@ -1,6 +1,13 @@
+import asyncio
+import threading
+import time
+
 import numpy as np
 
+from collections import deque
+from concurrent.futures import Future
 from functools import singledispatch, update_wrapper
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 
 class Predictor:
@@ -36,6 +43,381 @@ class ArgmaxTransformer:
         return np.argmax(pred, axis=1)
 
 
+# upper bounds in seconds of the predictor latency histogram buckets, the last bucket counts the slower calls
+LATENCY_BUCKETS_S = [1e-4, 1e-3, 1e-2, 1e-1, 1., 10.]
+
+
+def _nbytes(x: Any) -> int:
+    """
+    Returns the size in bytes of an array or of the values of a pandas object, or 0 for other types.
+    """
+
+    nbytes = getattr(x, 'nbytes', None)
+    if nbytes is None:
+        nbytes = getattr(getattr(x, 'values', None), 'nbytes', 0)
+
+    return int(nbytes)
+
+
+def _shape(x: Any) -> List[int]:
+    shape = getattr(x, 'shape', None)
+
+    return [len(x)] if shape is None else list(shape)
+
+
+class InstrumentedPredictor:
+
+    def __init__(self, predictor: Callable, record_shapes: bool = False):
+        """
+        Wraps a predictor to record the number of calls, the number of instances (rows) predicted, the size
+        in bytes of the inputs and outputs and a histogram of the call latencies. The explainers wrap the
+        predictor they are initialised with and report the totals recorded during an explanation in
+        `explanation.meta['stats']['predictor']`.
+
+        Parameters
+        ----------
+        predictor
+            A callable that takes an array of N instances and returns an array (or a sequence) of N outputs.
+        record_shapes
+            If True, the input and output shapes of each call are also recorded. An explainer initialised
+            with an `InstrumentedPredictor` uses it instead of wrapping it, so this is how the shapes are
+            recorded for the explanations.
+        """
+
+        self.predictor = predictor
+        self.record_shapes = record_shapes
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """
+        Resets the recorded statistics.
+        """
+
+        self.calls = 0
+        self.rows = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.latency_s = 0.
+        self.max_latency_s = 0.
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_S) + 1)
+        self.shapes = []  # type: List[List[List[int]]]
+
+    def __call__(self, X: Any) -> Any:
+        t_start = time.perf_counter()
+        output = self.predictor(X)
+        latency_s = time.perf_counter() - t_start
+        bucket = int(np.searchsorted(LATENCY_BUCKETS_S, latency_s))
+        with self._lock:
+            self.calls += 1
+            self.rows += _shape(X)[0]
+            self.input_bytes += _nbytes(X)
+            self.output_bytes += _nbytes(output)
+            self.latency_s += latency_s
+            self.max_latency_s = max(self.max_latency_s, latency_s)
+            self.latency_counts[bucket] += 1
+            if self.record_shapes:
+                self.shapes.append([_shape(X), _shape(output)])
+
+        return output
+
+    def merge(self, summary: Dict[str, Any]) -> None:
+        """
+        Adds the statistics of a summary recorded by another instance (e.g. running in a different process).
+        """
+
+        with self._lock:
+            for key in ['calls', 'rows', 'input_bytes', 'output_bytes', 'latency_s']:
+                setattr(self, key, getattr(self, key) + summary[key])
+            self.max_latency_s = max(self.max_latency_s, summary['max_latency_s'])
+            self.latency_counts = [
+                count + other for count, other in zip(self.latency_counts, summary['latency_histogram']['counts'])
+            ]
+            self.shapes.extend(summary.get('shapes', []))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns
+        -------
+            A dictionary with the number of calls, the number of rows, the total size in bytes of the inputs
+            and outputs (0 for inputs or outputs that are not arrays or pandas objects), the total and maximum
+            latency in seconds and, under 'latency_histogram', the number of calls in each latency bucket.
+            The upper bounds of the buckets are listed under 'bounds_s', the last bucket counts the slower
+            calls. If shapes are recorded, the `[input_shape, output_shape]` of each call are under 'shapes'.
+        """
+
+        with self._lock:
+            summary = {
+                'calls': self.calls,
+                'rows': self.rows,
+                'input_bytes': self.input_bytes,
+                'output_bytes': self.output_bytes,
+                'latency_s': self.latency_s,
+                'max_latency_s': self.max_latency_s,
+                'latency_histogram': {'bounds_s': list(LATENCY_BUCKETS_S), 'counts': list(self.latency_counts)},
+            }  # type: Dict[str, Any]
+            if self.record_shapes:
+                summary['shapes'] = [list(shapes) for shapes in self.shapes]
+
+        return summary
+
+
+def instrument(predictor: Callable) -> InstrumentedPredictor:
+    """
+    Wraps predictor in an `InstrumentedPredictor`, unless it is already one.
+    """
+
+    if isinstance(predictor, InstrumentedPredictor):
+        return predictor
+
+    return InstrumentedPredictor(predictor)
+
+
+class BatchingPredictor:
+
+    def __init__(self, predictor: Callable, max_batch_size: int = 512, max_wait_s: float = 0.005):
+        """
+        Wraps a predictor so that concurrent calls, e.g. from explanations running in different threads
+        or coroutines, are coalesced into larger batches before being passed to the predictor. This is
+        useful for predictors, such as model servers, whose throughput increases with the batch size.
+
+        The batches are assembled and predicted by an asyncio event loop running in a background thread,
+        which is started at the first call. The instances of a call are never split across batches and
+        only calls with the same dtype and instance shape are coalesced (strings of different lengths are
+        coalesced, the shorter strings are not modified). Lists, e.g. the lists of sentences passed to text
+        predictors, are only coalesced with lists and passed to the predictor as a list. The output of a call
+        is the slice of the batch output for its instances, so it is identical to the output of a direct call
+        as long as the predictions of the predictor do not depend on the other instances in the batch.
+
+        Parameters
+        ----------
+        predictor
+            A callable that takes an array (or a list) of N instances and returns an array (or a sequence)
+            of N outputs.
+        max_batch_size
+            Maximum number of instances in a batch. A call with more instances is predicted in its own batch.
+        max_wait_s
+            Maximum time in seconds a call waits for other calls to fill its batch. The batch is predicted
+            earlier if it reaches max_batch_size instances.
+        """
+
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size should be positive, got {}.".format(max_batch_size))
+        if max_wait_s < 0:
+            raise ValueError("max_wait_s should be non-negative, got {}.".format(max_wait_s))
+
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._lock = threading.Lock()
+        self._loop = None  # type: Any
+        self._thread = None  # type: Any
+        # requests waiting for a batch as (instances, compatibility key, arrival time, future) tuples
+        self._requests = deque()  # type: deque
+        self._n_pending = 0
+        self._closing = False
+        self.stats = {'calls': 0, 'batches': 0, 'rows': 0}
+
+    def __getstate__(self) -> dict:
+        # the event loop is not copied, a copy starts its own loop at its first call
+        return {'predictor': self.predictor, 'max_batch_size': self.max_batch_size, 'max_wait_s': self.max_wait_s}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._init_state()
+
+    def __enter__(self) -> 'BatchingPredictor':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def _start(self) -> None:
+        """
+        Starts the event loop thread. Called with the lock held.
+        """
+
+        started = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, args=(started, ), daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def _run(self, started: threading.Event) -> None:
+        """
+        Runs the event loop that assembles and predicts the batches until shutdown is called.
+        """
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        # the events are created in the thread of the loop they are bound to
+        self._arrived, self._full = asyncio.Event(), asyncio.Event()
+        self._loop = loop
+        started.set()
+        try:
+            loop.run_until_complete(self._batch_loop())
+        finally:
+            loop.close()
+
+    def _enqueue(self, request: Tuple[Union[np.ndarray, list], tuple, float, Future]) -> None:
+        """
+        Adds a request to the queue. Runs in the event loop thread.
+        """
+
+        self._requests.append(request)
+        self._n_pending += len(request[0])
+        self._arrived.set()
+        if self._n_pending >= self.max_batch_size:
+            self._full.set()
+
+    def _stop(self) -> None:
+        self._closing = True
+        self._arrived.set()
+        self._full.set()
+
+    async def _batch_loop(self) -> None:
+        """
+        Waits for requests and predicts a batch when it is full or when its oldest request waited max_wait_s.
+        """
+
+        loop = self._loop
+        while True:
+            if not self._requests:
+                if self._closing:
+                    return
+                self._arrived.clear()
+                await self._arrived.wait()
+                continue
+            timeout = self._requests[0][2] + self.max_wait_s - loop.time()
+            if self._n_pending < self.max_batch_size and timeout > 0 and not self._closing:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._predict_batch(self._next_batch())
+
+    def _next_batch(self) -> List[Tuple[Union[np.ndarray, list], tuple, float, Future]]:
+        """
+        Removes the oldest request and the following compatible requests that fit in its batch from the queue.
+        """
+
+        first = self._requests.popleft()
+        batch = [first]
+        n_rows = len(first[0])
+        remaining = deque()  # type: deque
+        while self._requests:
+            request = self._requests.popleft()
+            if request[1] == first[1] and n_rows + len(request[0]) <= self.max_batch_size:
+                batch.append(request)
+                n_rows += len(request[0])
+            else:
+                remaining.append(request)
+        self._requests = remaining
+        self._n_pending -= n_rows
+
+        return batch
+
+    def _predict_batch(self, batch: List[Tuple[Union[np.ndarray, list], tuple, float, Future]]) -> None:
+        """
+        Predicts a batch and resolves the futures of its requests with their slices of the output.
+        """
+
+        futures = [request[3] for request in batch]
+        if len(batch) == 1:
+            X = batch[0][0]
+        elif isinstance(batch[0][0], list):
+            X = [x for request in batch for x in request[0]]
+        else:
+            X = np.concatenate([request[0] for request in batch])
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(X)
+        try:
+            output = self.predictor(X)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        if len(batch) == 1:
+            futures[0].set_result(output)
+            return
+        start = 0
+        for request, future in zip(batch, futures):
+            stop = start + len(request[0])
+            future.set_result(output[start:stop])
+            start = stop
+
+    def submit(self, X: Union[np.ndarray, list]) -> Future:
+        """
+        Submits instances to be predicted in the next batch.
+
+        Parameters
+        ----------
+        X
+            Instances to be predicted. Lists are passed to the predictor as lists, other inputs as arrays.
+
+        Returns
+        -------
+        future
+            A `concurrent.futures.Future` resolved with the predictions for X.
+        """
+
+        if isinstance(X, list):
+            key = ('list', )  # type: tuple
+        else:
+            X = np.asarray(X)
+            key = (X.dtype.kind if X.dtype.kind in 'SU' else X.dtype.str, X.shape[1:])
+        future = Future()  # type: Future
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self.stats['calls'] += 1
+            self._loop.call_soon_threadsafe(self._enqueue, (X, key, self._loop.time(), future))
+
+        return future
+
+    def __call__(self, X: np.ndarray) -> Any:
+        if threading.current_thread() is self._thread:
+            # called by the predictor, waiting for the batch would block the event loop
+            return self.predictor(X)
+
+        return self.submit(X).result()
+
+    async def predict(self, X: np.ndarray) -> Any:
+        """
+        Coroutine version of `__call__`, which can be awaited from any event loop without blocking it.
+        """
+
+        return await asyncio.wrap_future(self.submit(X))
+
+    def shutdown(self) -> None:
+        """
+        Stops the event loop thread after the pending requests are predicted. The thread is restarted by
+        the next call.
+        """
+
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            if thread is None:
+                return
+            loop.call_soon_threadsafe(self._stop)
+            thread.join()
+            self._thread, self._loop = None, None
+
+
 def methdispatch(func):
     """
     A decorator that is used to support singledispatch style functionality
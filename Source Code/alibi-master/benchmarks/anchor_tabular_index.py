@@ -0,0 +1,86 @@
+"""
+Compares the anchor search index representations (`index_type` kwarg of `AnchorBaseBeam`) on the Adult dataset.
+Reports the mean explanation time and the peak memory allocated by the search for each representation.
+
+Usage: python benchmarks/anchor_tabular_index.py --n_instances 20 --coverage_samples 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from alibi.datasets import fetch_adult
+from alibi.explainers import AnchorTabular
+from alibi.explainers.anchor_base import INDEX_TYPES
+
+
+def fit_adult(n_train: int):
+    """
+    Fits a random forest classifier on the Adult dataset and returns the prediction function and data.
+    """
+
+    adult = fetch_adult()
+    data, target, category_map = adult.data, adult.target, adult.category_map
+    X_train, y_train, X_test = data[:n_train], target[:n_train], data[n_train + 1:]
+    ordinal_features = [x for x in range(len(adult.feature_names)) if x not in list(category_map.keys())]
+    categorical_features = list(category_map.keys())
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', Pipeline([('imputer', SimpleImputer(strategy='median')), ('scaler', StandardScaler())]),
+             ordinal_features),
+            ('cat', Pipeline([('imputer', SimpleImputer(strategy='median')),
+                              ('onehot', OneHotEncoder(handle_unknown='ignore'))]),
+             categorical_features),
+        ]
+    )
+    preprocessor.fit(X_train)
+    clf = RandomForestClassifier(n_estimators=50, random_state=0)
+    clf.fit(preprocessor.transform(X_train), y_train)
+
+    def predict_fn(x):
+        return clf.predict(preprocessor.transform(x))
+
+    return predict_fn, adult, X_train, X_test
+
+
+def main(args: argparse.Namespace) -> None:
+
+    predict_fn, adult, X_train, X_test = fit_adult(args.n_train)
+    explainer = AnchorTabular(predict_fn, adult.feature_names, categorical_names=adult.category_map, seed=0)
+    explainer.fit(X_train, disc_perc=(25, 50, 75))
+
+    for index_type in INDEX_TYPES:
+        timings, peaks = [], []
+        for i in range(args.n_instances):
+            np.random.seed(i)
+            tracemalloc.start()
+            t_start = time.perf_counter()
+            explainer.explain(
+                X_test[i],
+                threshold=args.threshold,
+                beam_size=args.beam_size,
+                coverage_samples=args.coverage_samples,
+                index_type=index_type,
+            )
+            timings.append(time.perf_counter() - t_start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print("index_type={}: mean explain time {:.3f}s, mean peak memory {:.1f} MB".format(
+            index_type, np.mean(timings), np.mean(peaks) / 2 ** 20)
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--n_instances', type=int, default=20)
+    parser.add_argument('--n_train', type=int, default=30000)
+    parser.add_argument('--threshold', type=float, default=0.95)
+    parser.add_argument('--beam_size', type=int, default=2)
+    parser.add_argument('--coverage_samples', type=int, default=10000)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""
+Measures the memory used by `AnchorTabular` when the training data is loaded in memory and when the path of a
+.npy file is passed to `fit`, in which case the training data, its discretized version and the training data
+index are memory-mapped and only the pages of the sampled rows are read.
+
+Each mode runs in a separate process, which reports its resident set size (RSS), its anonymous memory (memory
+that is not backed by files, read from /proc/self/smaps_rollup, Linux only) and its peak RSS after `fit` and
+after an explanation. The pages of memory-mapped files are part of the RSS once read, but unlike anonymous
+memory the kernel can evict them under memory pressure, so only the anonymous memory must fit in memory.
+
+Usage: python benchmarks/anchor_tabular_memmap.py --n_rows 20000000 --n_features 8
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from alibi.explainers import AnchorTabular
+
+MODES = ['memory', 'memmap']
+
+
+def memory_usage() -> dict:
+    """
+    Returns the current RSS and anonymous memory and the peak RSS of the process in MB.
+    """
+
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0][:-1]] = int(parts[1]) / 2 ** 10
+
+    return {
+        'rss': fields['Rss'],
+        'anonymous': fields['Anonymous'],
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+    }
+
+
+def report(mode: str, stage: str) -> None:
+    usage = memory_usage()
+    print("{:>6} {:>8}: rss {:.0f} MB, anonymous {:.0f} MB, peak rss {:.0f} MB".format(
+        mode, stage, usage['rss'], usage['anonymous'], usage['peak_rss'])
+    )
+
+
+def write_data(path: str, n_rows: int, n_features: int, chunk_size: int = 1000000) -> None:
+    """
+    Writes normally distributed data to a .npy file chunk by chunk.
+    """
+
+    np.random.seed(0)
+    data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n_rows, n_features))
+    for start in range(0, n_rows, chunk_size):
+        data[start:start + chunk_size] = np.random.normal(size=data[start:start + chunk_size].shape)
+    data.flush()
+
+
+def run(args: argparse.Namespace) -> None:
+
+    n_features = np.load(args.path, mmap_mode='r').shape[1]
+    np.random.seed(1)
+    weights = np.random.normal(size=n_features)
+    feature_names = ['x{}'.format(i) for i in range(n_features)]
+    explainer = AnchorTabular(lambda x: (x @ weights > 0).astype(int), feature_names, seed=0)
+    train_data = np.load(args.path) if args.mode == 'memory' else args.path
+    t_start = time.perf_counter()
+    explainer.fit(train_data, chunk_size=args.chunk_size)
+    t_fit = time.perf_counter() - t_start
+    report(args.mode, 'fit')
+    X = np.load(args.path, mmap_mode='r')[0]
+    t_start = time.perf_counter()
+    explainer.explain(X, threshold=args.threshold, coverage_samples=args.coverage_samples)
+    t_explain = time.perf_counter() - t_start
+    report(args.mode, 'explain')
+    print("{:>6} fit {:.1f}s, explain {:.1f}s".format(args.mode, t_fit, t_explain))
+
+
+def main(args: argparse.Namespace) -> None:
+
+    directory = tempfile.mkdtemp(dir=args.data_dir)
+    path = os.path.join(directory, 'train.npy')
+    write_data(path, args.n_rows, args.n_features)
+    print("training data: {:.0f} MB".format(os.path.getsize(path) / 2 ** 20))
+    try:
+        for mode in args.modes:
+            subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--path', path, '--chunk_size', str(args.chunk_size),
+                 '--threshold', str(args.threshold), '--coverage_samples', str(args.coverage_samples)],
+                check=True,
+            )
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--n_rows', type=int, default=20000000)
+    parser.add_argument('--n_features', type=int, default=8)
+    parser.add_argument('--chunk_size', type=int, default=65536)
+    parser.add_argument('--threshold', type=float, default=0.95)
+    parser.add_argument('--coverage_samples', type=int, default=10000)
+    parser.add_argument('--data_dir', type=str, default=None)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    # used to run a mode in a separate process
+    parser.add_argument('--mode', type=str, default=None, choices=MODES)
+    parser.add_argument('--path', type=str, default=None)
+    args = parser.parse_args()
+    if args.mode is None:
+        main(args)
+    else:
+        run(args)
@@ -0,0 +1,102 @@
+"""
+Measures the memory used by the sampling processes of `DistributedAnchorTabular` (multiprocessing backend) when
+the training data, its discretized version and the training data index are copied to each process and when
+they are shared through shared memory or memory-mapped files (`storage` kwarg of `fit`). The workers are
+started with the 'spawn' method by default: with 'fork', the workers share the pages of the parent process
+copy-on-write, but they keep the pages that the parent frees after the workers are started.
+
+For each worker, the script reports the resident set size (RSS), the proportional set size (PSS, shared pages
+are divided between the processes that map them) and the memory private to the worker (USS), read from
+/proc/<pid>/smaps_rollup (Linux only), after `fit` and after an explanation.
+
+Usage: python benchmarks/anchor_tabular_shared_data.py --n_rows 10000000 --ncpu 2
+"""
+import argparse
+import gc
+import time
+
+import numpy as np
+
+from alibi.explainers import DistributedAnchorTabular
+from alibi.utils.distributed import MultiprocessingBackend
+
+MODES = ['copy', 'shared_memory', 'memmap']
+
+
+class LinearClassifier:
+    """
+    A linear classifier. Defined at module level so that it can be sent to 'spawn' processes.
+    """
+
+    def __init__(self, weights: np.ndarray):
+        self.weights = weights
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return (x @ self.weights > 0).astype(int)
+
+
+def memory_usage(pid: int) -> dict:
+    """
+    Returns the RSS, PSS and USS of a process in MB.
+    """
+
+    fields = {}
+    with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0][:-1]] = int(parts[1]) / 2 ** 10
+
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def report(mode: str, stage: str, explainer: DistributedAnchorTabular) -> None:
+    usage = [memory_usage(actor.pid) for actor in explainer.samplers]
+    print("{:>13} {:>8}: ".format(mode, stage) + ", ".join(
+        "worker {} rss {:.0f} MB pss {:.0f} MB uss {:.0f} MB".format(i, u['rss'], u['pss'], u['uss'])
+        for i, u in enumerate(usage))
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+
+    np.random.seed(0)
+    X = np.random.normal(size=(args.n_rows, args.n_features))
+    predict_fn = LinearClassifier(np.random.normal(size=args.n_features))
+    feature_names = ['x{}'.format(i) for i in range(args.n_features)]
+    for mode in args.modes:
+        explainer = DistributedAnchorTabular(predict_fn, feature_names, seed=0, backend='multiprocessing')
+        # in 'copy' mode, the arrays are pickled and sent to each sampling process
+        storage = None if mode == 'copy' else mode
+        explainer.backend = MultiprocessingBackend(context=args.context, storage=storage)
+        t_start = time.perf_counter()
+        explainer.fit(X, ncpu=args.ncpu, storage=storage, storage_dir=args.storage_dir)
+        # wait for the samplers to be initialised
+        explainer.backend.get([actor.set_n_covered.remote(10) for actor in explainer.samplers])
+        t_fit = time.perf_counter() - t_start
+        report(mode, 'fit', explainer)
+        t_start = time.perf_counter()
+        explainer.explain(X[0], threshold=args.threshold, coverage_samples=args.coverage_samples)
+        t_explain = time.perf_counter() - t_start
+        report(mode, 'explain', explainer)
+        print("{:>13} fit {:.1f}s, explain {:.1f}s".format(mode, t_fit, t_explain))
+        explainer.backend.shutdown()
+        del explainer
+        gc.collect()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--n_rows', type=int, default=10000000)
+    parser.add_argument('--n_features', type=int, default=4)
+    parser.add_argument('--ncpu', type=int, default=2)
+    parser.add_argument('--threshold', type=float, default=0.95)
+    parser.add_argument('--coverage_samples', type=int, default=10000)
+    parser.add_argument('--storage_dir', type=str, default=None)
+    parser.add_argument('--context', type=str, default='spawn', choices=['spawn', 'fork', 'forkserver'])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    main(parser.parse_args())